@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+AOF Traffic Replayer for Capacity Testing
+Streams an append-only file (single file, appendonlydir/ or its manifest) and
+re-issues the recorded writes against a node or cluster with pipelining and
+rate control, then reports achieved ops/sec, latency and schedule lag
+
+Examples:
+  # Twice the recorded speed (needs aof-timestamp-enabled yes), local cluster
+  python3 aof_replayer.py /var/lib/redis/appendonlydir --cluster 127.0.0.1:7000 --speed 2
+
+  # As fast as possible against a single node
+  python3 aof_replayer.py appendonly.aof --target 127.0.0.1:6379 --speed max
+
+  # Fixed rate when the AOF has no timestamps
+  python3 aof_replayer.py appendonly.aof --target 127.0.0.1:6379 --rate 50000
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+from perf_stats import latency_summary
+from redis_resp import RespConnection, RespError, Router, parse_address
+
+# Commands that have no key or must reach every master
+BROADCAST = {b"FLUSHALL", b"FLUSHDB", b"SCRIPT", b"FUNCTION"}
+# Paced replay sends commands up to this early so they go out in batches
+PACING_WINDOW_S = 0.005
+# Commands whose first key is not args[1]
+KEY_AFTER_NUMKEYS = {b"EVAL", b"EVALSHA", b"EVAL_RO", b"EVALSHA_RO", b"FCALL", b"FCALL_RO"}
+
+
+class AofFormatError(Exception):
+    pass
+
+
+def aof_parts(path):
+    """Files to replay, in order, for a single AOF, an appendonlydir or a manifest
+
+    Returns [(file path, kind)] where kind is "base" or "incr"
+    """
+    if os.path.isdir(path):
+        manifests = [name for name in os.listdir(path) if name.endswith(".manifest")]
+        if not manifests:
+            raise AofFormatError("No .manifest file in %s" % path)
+        path = os.path.join(path, manifests[0])
+    if not path.endswith(".manifest"):
+        return [(path, "incr")]
+
+    directory = os.path.dirname(path)
+    base, incrs = [], []
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            entry = dict(zip(fields[::2], fields[1::2]))
+            name = entry["file"].strip('"')
+            if entry.get("type") == "b":
+                base.append((os.path.join(directory, name), "base"))
+            elif entry.get("type") == "i":
+                incrs.append((int(entry.get("seq", 0)), os.path.join(directory, name)))
+            # type h (history) files are already folded into the base
+    return base + [(name, "incr") for _, name in sorted(incrs)]
+
+
+def iter_commands(path):
+    """Yield (timestamp or None, args) for every command in one AOF file
+
+    `#TS:<unix seconds>` annotations (aof-timestamp-enabled) set the timestamp
+    of the commands that follow; an RDB preamble is stepped over
+    """
+    with open(path, "rb") as f:
+        if f.read(5) == b"REDIS":
+            from rdb_analyzer import rdb_length
+            f.seek(rdb_length(path))
+        else:
+            f.seek(0)
+
+        timestamp = None
+        readline = f.readline
+        read = f.read
+        while True:
+            line = readline()
+            if not line:
+                return
+            if line[:1] == b"*":
+                args = []
+                for _ in range(int(line[1:-2])):
+                    header = readline()
+                    if header[:1] != b"$":
+                        return  # truncated tail (aof-load-truncated)
+                    length = int(header[1:-2])
+                    data = read(length + 2)
+                    if len(data) < length + 2:
+                        return
+                    args.append(data[:-2])
+                yield timestamp, args
+            elif line.startswith(b"#TS:"):
+                timestamp = int(line[4:-2])
+            elif line.strip():
+                raise AofFormatError("Unexpected line in %s at offset %d: %r" % (path, f.tell(), line[:40]))
+
+
+def spread_timestamps(items):
+    """Spread the commands under each `#TS` marker evenly over its second
+
+    Markers have one-second resolution, so paced as-is every command of a
+    second would be due at the same instant and replay would come in
+    one-second bursts. One second's commands are held in memory at a time
+    """
+    segment = []
+    current = None
+    for timestamp, args in items:
+        if timestamp != current and segment:
+            for i, command in enumerate(segment):
+                yield (current + i / len(segment) if current is not None else None), command
+            segment = []
+        current = timestamp
+        segment.append(args)
+    for i, command in enumerate(segment):
+        yield (current + i / len(segment) if current is not None else None), command
+
+
+def command_key(args):
+    name = args[0].upper()
+    if name in KEY_AFTER_NUMKEYS:
+        return args[3] if len(args) > 3 and int(args[2]) > 0 else None
+    return args[1] if len(args) > 1 else None
+
+
+class NodeWorker(threading.Thread):
+    """Owns one connection to one node and sends its pipelines in order
+
+    The bounded queue pushes back on the dispatcher, so a saturated node shows
+    up as schedule lag rather than unbounded memory
+    """
+
+    def __init__(self, address):
+        super().__init__(daemon=True)
+        self.address = address
+        self.batches = queue.Queue(maxsize=32)
+        self.latencies = []
+        self.ops = 0
+        self.errors = {}
+        self.failure = None
+
+    def run(self):
+        host, port = parse_address(self.address)
+        conn = None
+        try:
+            conn = RespConnection(host, port)
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    return
+                started = time.perf_counter()
+                replies = conn.pipeline(batch)
+                self.latencies.append((time.perf_counter() - started) * 1000.0)
+                self.ops += len(batch)
+                for reply in replies:
+                    if isinstance(reply, RespError):
+                        self.errors[reply.kind] = self.errors.get(reply.kind, 0) + 1
+                    elif isinstance(reply, list):
+                        # EXEC replies carry the errors of queued commands
+                        for item in reply:
+                            if isinstance(item, RespError):
+                                self.errors[item.kind] = self.errors.get(item.kind, 0) + 1
+        except (OSError, ConnectionError) as error:
+            self.failure = error
+            # Keep draining so the dispatcher never blocks on a dead node
+            while self.batches.get() is not None:
+                pass
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+class Replayer:
+    """Reads commands, applies pacing and routes batches to node workers"""
+
+    def __init__(self, router, pipeline, speed, rate, cluster):
+        self.router = router
+        self.pipeline = pipeline
+        self.speed = speed
+        self.rate = rate
+        self.cluster = cluster
+        self.workers = {address: NodeWorker(address) for address in router.nodes}
+        self.pending = {address: [] for address in router.nodes}
+        self.transaction = None
+        self.skipped = 0
+        self.max_lag = 0.0
+
+    def _flush(self, address=None):
+        for node in [address] if address else list(self.pending):
+            if self.pending[node]:
+                self.workers[node].batches.put(self.pending[node])
+                self.pending[node] = []
+
+    def _route(self, commands, key):
+        # FUNCTION LOAD, SCRIPT FLUSH, FLUSHALL ASYNC, ... have an argument but no key
+        if commands[0][0].upper() in BROADCAST:
+            nodes = self.router.nodes
+        else:
+            nodes = [self.router.node_for(key) if key is not None else self.router.nodes[0]]
+        for node in nodes:
+            self.pending[node].extend(commands)
+            if len(self.pending[node]) >= self.pipeline:
+                self._flush(node)
+
+    def submit(self, args):
+        name = args[0].upper()
+        if self.cluster and name == b"SELECT":
+            self.skipped += 1
+            return
+        # MULTI ... EXEC blocks go to a single node as one unit
+        if name == b"MULTI":
+            self.transaction = [args]
+            return
+        if self.transaction is not None:
+            self.transaction.append(args)
+            if name in (b"EXEC", b"DISCARD"):
+                keys = [command_key(c) for c in self.transaction[1:-1]]
+                key = next((k for k in keys if k is not None), None)
+                commands, self.transaction = self.transaction, None
+                self._route(commands, key)
+            return
+        self._route([args], command_key(args))
+
+    def run(self, commands, limit=None):
+        for worker in self.workers.values():
+            worker.start()
+
+        started = time.perf_counter()
+        first_ts = None
+        sent = 0
+        for timestamp, args in commands:
+            if limit is not None and sent >= limit:
+                break
+            if self.rate:
+                due = started + sent / self.rate
+            elif self.speed is not None and timestamp is not None:
+                if first_ts is None:
+                    first_ts = timestamp
+                due = started + (timestamp - first_ts) / self.speed
+            else:
+                due = None
+
+            if due is not None:
+                now = time.perf_counter()
+                if due > now + PACING_WINDOW_S:
+                    # Ahead of schedule: ship everything due so far as one batch,
+                    # then wait; commands due within the window join the batch
+                    self._flush()
+                    time.sleep(due - now)
+                elif due < now:
+                    self.max_lag = max(self.max_lag, now - due)
+            self.submit(args)
+            sent += 1
+
+        self._flush()
+        for worker in self.workers.values():
+            worker.batches.put(None)
+        for worker in self.workers.values():
+            worker.join()
+        elapsed = time.perf_counter() - started
+        return self.summary(sent, elapsed)
+
+    def summary(self, sent, elapsed):
+        latencies = sorted(l for w in self.workers.values() for l in w.latencies)
+        errors = {}
+        for worker in self.workers.values():
+            for kind, count in worker.errors.items():
+                errors[kind] = errors.get(kind, 0) + count
+        ops = sum(w.ops for w in self.workers.values())
+        return {
+            "commands_read": sent,
+            "commands_sent": ops,
+            "skipped": self.skipped,
+            "elapsed_s": round(elapsed, 3),
+            "ops_per_sec": round(ops / elapsed, 1) if elapsed else 0.0,
+            "max_schedule_lag_s": round(self.max_lag, 3),
+            "batch_latency_ms": latency_summary(latencies),
+            "errors": errors,
+            "failed_nodes": {w.address: str(w.failure) for w in self.workers.values() if w.failure},
+        }
+
+
+def all_commands(parts, include_base):
+    for path, kind in parts:
+        if kind == "base" and path.endswith(".rdb"):
+            print("⚠️  Skipping RDB base %s - load it on the target first" % os.path.basename(path))
+            continue
+        if kind == "base" and not include_base:
+            print("⚠️  Skipping base %s (--include-base to replay it)" % os.path.basename(path))
+            continue
+        print("📄 Replaying %s" % os.path.basename(path))
+        for item in spread_timestamps(iter_commands(path)):
+            yield item
+
+
+def parse_speed(value):
+    if value == "max":
+        return None
+    if value == "original":
+        return 1.0
+    return float(value.rstrip("x"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay AOF traffic against Redis for capacity testing")
+    parser.add_argument("aof", help="AOF file, appendonlydir/ or .manifest")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target", help="host:port of a single node")
+    target.add_argument("--cluster", help="comma-separated cluster seed nodes")
+    parser.add_argument("--speed", default="original",
+                        help="'original', a multiplier such as 2 or 5x, or 'max' (default original)")
+    parser.add_argument("--rate", type=float, help="fixed ops/sec instead of recorded pacing")
+    parser.add_argument("--pipeline", type=int, default=64, help="max commands per pipelined batch")
+    parser.add_argument("--limit", type=int, help="stop after this many commands")
+    parser.add_argument("--include-base", action="store_true", help="also replay an AOF-format base file")
+    parser.add_argument("--json", metavar="PATH", help="write the summary as JSON")
+    args = parser.parse_args()
+
+    parts = aof_parts(args.aof)
+    speed = parse_speed(args.speed)
+    if speed is not None and not args.rate:
+        # Recorded pacing needs #TS annotations; check the start of every incr file
+        incr = [path for path, kind in parts if kind == "incr"]
+        if not any(next(iter_commands(path), (None, None))[0] is not None for path in incr):
+            parser.error("AOF has no #TS timestamps (aof-timestamp-enabled); use --rate or --speed max")
+
+    cluster = bool(args.cluster)
+    router = Router(args.cluster.split(",") if cluster else [args.target], cluster=cluster)
+    print("🔁 AOF Replayer -> %s (%s)" % (", ".join(router.nodes), "rate %s/s" % args.rate if args.rate else
+                                           "speed %s" % args.speed))
+    replayer = Replayer(router, args.pipeline, speed, args.rate, cluster)
+    summary = replayer.run(all_commands(parts, args.include_base), args.limit)
+    router.close()
+
+    print("✅ %d commands in %.1fs: %.0f ops/s, batch p50 %.2f ms, p99 %.2f ms, max lag %.2fs" % (
+        summary["commands_sent"], summary["elapsed_s"], summary["ops_per_sec"],
+        summary["batch_latency_ms"]["p50"], summary["batch_latency_ms"]["p99"], summary["max_schedule_lag_s"]))
+    if summary["errors"]:
+        print("⚠️  Errors: %s" % ", ".join("%s=%d" % item for item in sorted(summary["errors"].items())))
+    for address, failure in summary["failed_nodes"].items():
+        print("❌ %s failed: %s" % (address, failure))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+        print("💾 Summary written to %s" % args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,126 @@
+const cluster = require('cluster');
+const os = require('os');
+const { performance } = require('perf_hooks');
 const express = require('express');
-const { client, connectRedis } = require('./redis-client');
+const {
+  client,
+  connectRedis,
+  clusterMode,
+  keySlot,
+  returnBuffers,
+  masterClients
+} = require('./redis-client');
+const { createCodec } = require('./value-codec');
+const { createStore } = require('./hash-buckets');
+const { createChangeFeed } = require('./change-feed');
 
 const app = express();
 const PORT = process.env.PORT || 3000;
 
-app.use(express.json());
+// Batch tuning
+const BATCH_MAX_KEYS = parseInt(process.env.BATCH_MAX_KEYS || '100000', 10);
+const BATCH_CHUNK_SIZE = parseInt(process.env.BATCH_CHUNK_SIZE || '500', 10);
+const BATCH_PIPELINE_WINDOW = parseInt(process.env.BATCH_PIPELINE_WINDOW || '8', 10);
+const EXPORT_SCAN_COUNT = parseInt(process.env.EXPORT_SCAN_COUNT || '1000', 10);
+
+// Worker mode: WEB_CONCURRENCY workers ('auto' = one per core), each with its
+// own Redis connection, sharing the listening port through the primary
+const WORKERS = (() => {
+  const configured = process.env.WEB_CONCURRENCY || '1';
+  if (configured === 'auto') {
+    return os.availableParallelism ? os.availableParallelism() : os.cpus().length;
+  }
+  return Math.max(1, parseInt(configured, 10) || 1);
+})();
+const SHUTDOWN_TIMEOUT_MS = parseInt(process.env.SHUTDOWN_TIMEOUT_MS || '10000', 10);
+const LOAD_REPORT_INTERVAL_MS = 1000;
+
+// Per-process load, reported to the primary and exposed on /health
+const load = { inFlight: 0, handled: 0, eventLoopUtilization: 0 };
+let lastElu = performance.eventLoopUtilization();
+setInterval(() => {
+  const elu = performance.eventLoopUtilization();
+  load.eventLoopUtilization = performance.eventLoopUtilization(elu, lastElu).utilization;
+  lastElu = elu;
+}, LOAD_REPORT_INTERVAL_MS).unref();
+let workerLoads = [];
+
+const currentLoad = () => ({
+  worker: cluster.isWorker ? cluster.worker.id : 0,
+  pid: process.pid,
+  inFlight: load.inFlight,
+  handled: load.handled,
+  eventLoopUtilization: Number(load.eventLoopUtilization.toFixed(3)),
+  rssBytes: process.memoryUsage().rss
+});
+
+// Stored value encoding; values written by any codec can always be read back
+const codec = createCodec(process.env.VALUE_CODEC || 'json', {
+  compressThreshold: parseInt(process.env.VALUE_COMPRESS_THRESHOLD || '1024', 10)
+});
+
+// Key layout: every value its own string key, or small values bucketed into
+// listpack-encoded hashes (STORAGE_MODE=hash). Hash mode still reads values
+// stored as string keys, so it can be switched on for an existing keyspace
+const bucketPrefix = process.env.HASH_BUCKET_PREFIX || 'kvb:';
+const baseStore = createStore(client, {
+  mode: process.env.STORAGE_MODE || 'string',
+  clusterMode,
+  keySlot,
+  buckets: parseInt(process.env.HASH_BUCKETS || '0', 10),
+  expectedKeys: parseInt(process.env.HASH_EXPECTED_KEYS || '0', 10),
+  prefix: bucketPrefix,
+  maxValueBytes: parseInt(process.env.HASH_BUCKET_MAX_VALUE || '64', 10),
+  maxEntries: parseInt(process.env.HASH_BUCKET_MAX_ENTRIES || '128', 10)
+});
+
+// Change feed, off unless CHANGE_FEED is "keyspace" or "stream": watchers on
+// GET /changes share one Redis subscription per process instead of polling
+const CHANGE_FEED = process.env.CHANGE_FEED || 'off';
+const feed = CHANGE_FEED === 'off' ? null : createChangeFeed(client, {
+  source: CHANGE_FEED,
+  clusterMode,
+  masterClients,
+  readValues: process.env.CHANGE_FEED_VALUES === 'false' ? null : (keys) =>
+    Promise.all(keys.map(async (key) => {
+      const raw = await baseStore.get(key);
+      return raw === null ? null : codec.decode(raw);
+    })),
+  windowMs: parseInt(process.env.CHANGE_FEED_WINDOW_MS || '50', 10),
+  bufferSize: parseInt(process.env.CHANGE_FEED_BUFFER || '1000', 10),
+  streamKey: process.env.CHANGE_FEED_STREAM || 'kv:changes',
+  streamMaxLen: parseInt(process.env.CHANGE_FEED_STREAM_MAXLEN || '100000', 10),
+  ignorePrefixes: baseStore.mode === 'hash' ? [bucketPrefix] : []
+});
+if (feed && feed.source === 'keyspace' && baseStore.mode === 'hash') {
+  console.warn('⚠️  CHANGE_FEED=keyspace only sees values stored as string keys; use CHANGE_FEED=stream with STORAGE_MODE=hash');
+}
+
+// With the stream feed, every write through the store is also recorded there
+const store = feed ? feed.track(baseStore) : baseStore;
+
+app.use(express.json({ limit: process.env.JSON_BODY_LIMIT || '10mb' }));
+
+app.use((req, res, next) => {
+  load.inFlight++;
+  res.on('close', () => {
+    load.inFlight--;
+    load.handled++;
+  });
+  next();
+});
 
 // Health check endpoint
 app.get('/health', (req, res) => {
-  res.json({ status: 'OK', timestamp: new Date().toISOString() });
+  const self = currentLoad();
+  res.json({
+    status: 'OK',
+    timestamp: new Date().toISOString(),
+    worker: self,
+    workers: cluster.isWorker ? workerLoads : [self],
+    storage: store.stats(),
+    changeFeed: feed ? feed.stats() : undefined
+  });
 });
 
 // Redis test endpoint
@@ -38,7 +150,7 @@ app.post('/set/:key', async (req, res) => {
     const { key } = req.params;
     const { value } = req.body;
     
-    await client.set(key, JSON.stringify(value));
+    await store.set(key, codec.encode(value));
     res.json({ success: true, key, value });
   } catch (error) {
     res.status(500).json({ success: false, error: error.message });
@@ -49,27 +161,374 @@ app.post('/set/:key', async (req, res) => {
 app.get('/get/:key', async (req, res) => {
   try {
     const { key } = req.params;
-    const value = await client.get(key);
+    const value = await store.get(key);
     
     if (value === null) {
       return res.status(404).json({ success: false, message: 'Key not found' });
     }
     
-    res.json({ success: true, key, value: JSON.parse(value) });
+    res.json({ success: true, key, value: codec.decode(value) });
   } catch (error) {
     res.status(500).json({ success: false, error: error.message });
   }
 });
 
+// Split keys into MGET/MSET sized chunks; in cluster mode every chunk
+// belongs to a single hash slot
+const chunkKeys = (keys) => {
+  const chunks = [];
+  if (!clusterMode) {
+    for (let i = 0; i < keys.length; i += BATCH_CHUNK_SIZE) {
+      chunks.push(keys.slice(i, i + BATCH_CHUNK_SIZE));
+    }
+    return chunks;
+  }
+
+  const bySlot = new Map();
+  for (const key of keys) {
+    const slot = keySlot(key);
+    let group = bySlot.get(slot);
+    if (!group || group.length >= BATCH_CHUNK_SIZE) {
+      group = [];
+      chunks.push(group);
+      bySlot.set(slot, group);
+    }
+    group.push(key);
+  }
+  return chunks;
+};
+
+// Run tasks with at most BATCH_PIPELINE_WINDOW in flight (commands issued in
+// the same tick share one pipelined round-trip) and hand results back in order
+const runWindowed = async (tasks, onResult) => {
+  const inFlight = [];
+  let next = 0;
+  while (next < tasks.length && inFlight.length < BATCH_PIPELINE_WINDOW) {
+    inFlight.push(tasks[next++]());
+  }
+  try {
+    while (inFlight.length > 0) {
+      const result = await inFlight.shift();
+      if (next < tasks.length) {
+        inFlight.push(tasks[next++]());
+      }
+      await onResult(result);
+    }
+  } catch (error) {
+    // Don't leave abandoned requests as unhandled rejections
+    inFlight.forEach((pending) => pending.catch(() => {}));
+    throw error;
+  }
+};
+
+// Write to a streaming response, waiting for the socket to drain when full
+const writeChunk = (res, chunk) => {
+  if (res.destroyed) {
+    return Promise.reject(new Error('Client disconnected'));
+  }
+  if (res.write(chunk)) {
+    return Promise.resolve();
+  }
+  return new Promise((resolve, reject) => {
+    const cleanup = () => {
+      res.off('drain', onDrain);
+      res.off('close', onClose);
+    };
+    const onDrain = () => {
+      cleanup();
+      resolve();
+    };
+    const onClose = () => {
+      cleanup();
+      reject(new Error('Client disconnected'));
+    };
+    res.on('drain', onDrain);
+    res.on('close', onClose);
+  });
+};
+
+const validateKeys = (keys) => {
+  if (!Array.isArray(keys) || keys.length === 0) {
+    return 'keys must be a non-empty array';
+  }
+  if (keys.length > BATCH_MAX_KEYS) {
+    return `batch exceeds ${BATCH_MAX_KEYS} keys`;
+  }
+  if (!keys.every((key) => typeof key === 'string' && key.length > 0)) {
+    return 'keys must be non-empty strings';
+  }
+  return null;
+};
+
+// Get many values in one request: { "keys": ["a", "b"] }
+// Values are streamed back chunk by chunk as they arrive from Redis
+app.post('/mget', async (req, res) => {
+  const { keys } = req.body;
+  const invalid = validateKeys(keys);
+  if (invalid) {
+    return res.status(400).json({ success: false, error: invalid });
+  }
+
+  const chunks = chunkKeys(keys);
+  const tasks = chunks.map((chunk) => async () => ({ chunk, values: await store.mGet(chunk) }));
+  let first = true;
+
+  try {
+    res.type('application/json');
+    await writeChunk(res, '{"success":true,"values":{');
+    await runWindowed(tasks, async ({ chunk, values }) => {
+      let body = '';
+      chunk.forEach((key, i) => {
+        const value = codec.decode(values[i]);
+        body += `${first ? '' : ','}${JSON.stringify(key)}:${JSON.stringify(value)}`;
+        first = false;
+      });
+      await writeChunk(res, body);
+    });
+    res.end('}}');
+  } catch (error) {
+    console.error('MGET batch failed:', error);
+    if (!res.headersSent) {
+      return res.status(500).json({ success: false, error: error.message });
+    }
+    res.destroy(error);
+  }
+});
+
+// Set many values in one request: { "entries": { "a": 1, "b": { "x": 2 } } }
+app.post('/mset', async (req, res) => {
+  const { entries } = req.body;
+  if (!entries || typeof entries !== 'object' || Array.isArray(entries)) {
+    return res.status(400).json({ success: false, error: 'entries must be an object' });
+  }
+
+  const keys = Object.keys(entries);
+  const invalid = validateKeys(keys);
+  if (invalid) {
+    return res.status(400).json({ success: false, error: invalid });
+  }
+
+  try {
+    const tasks = chunkKeys(keys).map((chunk) => () =>
+      store.mSet(chunk.map((key) => [key, codec.encode(entries[key])]))
+    );
+    await runWindowed(tasks, async () => {});
+    res.json({ success: true, count: keys.length });
+  } catch (error) {
+    res.status(500).json({ success: false, error: error.message });
+  }
+});
+
+// Operations accepted by /pipeline, using the same value encoding as /set and /get
+const pipelineOps = {
+  get: async ({ key }) => {
+    return codec.decode(await store.get(key));
+  },
+  set: ({ key, value }) => store.set(key, codec.encode(value)),
+  del: ({ key }) => store.del(key),
+  exists: ({ key }) => store.exists(key),
+  expire: ({ key, seconds }) => store.expire(key, seconds),
+  ttl: ({ key }) => store.ttl(key),
+  incr: ({ key, by = 1 }) => store.incrBy(key, by)
+};
+
+// Run a list of operations as one pipelined request:
+// { "commands": [{ "op": "set", "key": "a", "value": 1 }, { "op": "get", "key": "a" }] }
+// Results are streamed back in command order
+app.post('/pipeline', async (req, res) => {
+  const { commands } = req.body;
+  if (!Array.isArray(commands) || commands.length === 0) {
+    return res.status(400).json({ success: false, error: 'commands must be a non-empty array' });
+  }
+  if (commands.length > BATCH_MAX_KEYS) {
+    return res.status(400).json({ success: false, error: `batch exceeds ${BATCH_MAX_KEYS} commands` });
+  }
+  const unknown = commands.find((command) =>
+    !command || !Object.hasOwn(pipelineOps, command.op) || typeof command.key !== 'string'
+  );
+  if (unknown) {
+    return res.status(400).json({ success: false, error: `invalid command: ${JSON.stringify(unknown)}` });
+  }
+
+  // In hash storage mode one operation can take more than one round-trip, so
+  // a command waits for the previous command on the same key instead of
+  // overtaking it
+  const previousByKey = new Map();
+  const execute = (command) => {
+    const run = () => pipelineOps[command.op](command);
+    if (store.mode === 'string') {
+      return run();
+    }
+    const previous = previousByKey.get(command.key);
+    const result = previous ? previous.then(run, run) : run();
+    previousByKey.set(command.key, result);
+    return result;
+  };
+
+  // Each task sends a chunk of commands in the same tick so they are pipelined
+  const tasks = [];
+  for (let i = 0; i < commands.length; i += BATCH_CHUNK_SIZE) {
+    const chunk = commands.slice(i, i + BATCH_CHUNK_SIZE);
+    tasks.push(() => Promise.all(chunk.map((command) =>
+      execute(command).then(
+        (result) => ({ ok: true, result }),
+        (error) => ({ ok: false, error: error.message })
+      )
+    )));
+  }
+  let first = true;
+
+  try {
+    res.type('application/json');
+    await writeChunk(res, '{"success":true,"results":[');
+    await runWindowed(tasks, async (results) => {
+      let body = '';
+      for (const result of results) {
+        body += `${first ? '' : ','}${JSON.stringify(result)}`;
+        first = false;
+      }
+      await writeChunk(res, body);
+    });
+    res.end(']}');
+  } catch (error) {
+    console.error('Pipeline batch failed:', error);
+    res.destroy(error);
+  }
+});
+
+// Export the keyspace as NDJSON ({"key": ..., "value": ...} per line):
+// GET /export?match=user:*
+// Every master is walked with SCAN; each batch of keys is fetched with one
+// pipelined round of GETs and written before the next SCAN is issued, so only
+// one batch is held in memory and a slow client pauses the walk instead of
+// buffering the dataset. In hash storage mode the buckets are walked the same
+// way after the string keys
+app.get('/export', async (req, res) => {
+  const match = typeof req.query.match === 'string' && req.query.match ? req.query.match : '*';
+  const count = Math.max(1, Math.min(parseInt(req.query.count || EXPORT_SCAN_COUNT, 10) || EXPORT_SCAN_COUNT, 10000));
+  let exported = 0;
+
+  const writeEntries = async (pairs) => {
+    let body = '';
+    for (const [key, raw] of pairs) {
+      if (raw === null) {
+        continue; // expired or deleted since SCAN returned it
+      }
+      let entry;
+      try {
+        entry = raw instanceof Error ? { key, error: raw.message } : { key, value: codec.decode(raw) };
+      } catch (error) {
+        entry = { key, error: error.message };
+      }
+      body += `${JSON.stringify(entry)}\n`;
+      exported++;
+    }
+    await writeChunk(res, body);
+  };
+
+  try {
+    const nodes = await masterClients();
+    res.type('application/x-ndjson');
+    res.set({ 'Cache-Control': 'no-store' });
+    res.flushHeaders();
+
+    for (const node of nodes) {
+      let cursor = 0;
+      do {
+        const reply = await node.scan(cursor, { MATCH: match, COUNT: count, TYPE: 'string' });
+        cursor = Number(reply.cursor);
+        if (reply.keys.length === 0) {
+          continue;
+        }
+
+        const values = await Promise.all(reply.keys.map((key) =>
+          node.get(returnBuffers, key).catch((error) => error)
+        ));
+        await writeEntries(reply.keys.map((key, i) => [key, values[i]]));
+      } while (cursor !== 0);
+
+      for await (const pairs of store.bucketEntries(node, { match, count })) {
+        await writeEntries(pairs);
+      }
+    }
+    res.end();
+    console.log(`Export of "${match}" finished: ${exported} keys`);
+  } catch (error) {
+    console.error(`Export of "${match}" stopped after ${exported} keys:`, error.message);
+    if (!res.headersSent) {
+      return res.status(500).json({ success: false, error: error.message });
+    }
+    res.destroy();
+  }
+});
+
+// Change feed as Server-Sent Events: GET /changes?match=user:*
+// (a key or SCAN-style pattern). Each "change" event carries the key, the
+// operation and, unless CHANGE_FEED_VALUES=false, the value after the change;
+// writes to the same key within CHANGE_FEED_WINDOW_MS arrive as one event
+app.get('/changes', (req, res) => {
+  if (!feed) {
+    return res.status(404).json({ success: false, error: 'Change feed is disabled (set CHANGE_FEED)' });
+  }
+  const match = typeof req.query.match === 'string' && req.query.match ? req.query.match : '*';
+  res.status(200).set({
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-store',
+    Connection: 'keep-alive',
+    'X-Accel-Buffering': 'no'
+  });
+  res.flushHeaders();
+  feed.watch(match, res);
+});
+
+let server = null;
+let shuttingDown = false;
+
+// Stop accepting connections, let in-flight requests finish, then close Redis
+const shutdown = async (reason) => {
+  if (shuttingDown) {
+    return;
+  }
+  shuttingDown = true;
+  console.log(`${reason} received, shutting down gracefully (pid ${process.pid})`);
+  setTimeout(() => {
+    console.error('Graceful shutdown timed out, forcing exit');
+    process.exit(1);
+  }, SHUTDOWN_TIMEOUT_MS).unref();
+
+  // Watchers hold their connections open until the feed ends them
+  if (feed) {
+    await feed.close();
+  }
+  if (server) {
+    const closed = new Promise((resolve) => server.close(resolve));
+    // close() only stops new connections: idle keep-alive sockets would hold
+    // it open until they time out, busy ones close after their response
+    if (typeof server.closeIdleConnections === 'function') {
+      server.closeIdleConnections();
+    }
+    await closed;
+  }
+  try {
+    await client.quit();
+  } catch (error) {
+    console.error('Error closing Redis connection:', error);
+  }
+  process.exit(0);
+};
+
 // Start server after Redis connection
 const startServer = async () => {
   try {
     // Connect to Redis first
     await connectRedis();
+    if (feed) {
+      await feed.start();
+    }
     
     // Start Express server
-    app.listen(PORT, '0.0.0.0', () => {
-      console.log(`Server running on port ${PORT}`);
+    server = app.listen(PORT, '0.0.0.0', () => {
+      console.log(`Server running on port ${PORT}${cluster.isWorker ? ` (worker ${cluster.worker.id})` : ''}`);
       console.log(`Environment: ${process.env.NODE_ENV || 'development'}`);
       console.log(`Redis URL configured: ${!!process.env.REDIS_URL}`);
     });
@@ -79,17 +538,107 @@ const startServer = async () => {
   }
 };
 
-// Graceful shutdown
-process.on('SIGTERM', async () => {
-  console.log('SIGTERM received, shutting down gracefully');
-  await client.quit();
-  process.exit(0);
-});
+// Primary process: fork workers, replace crashed ones, aggregate their load
+// and coordinate draining on shutdown
+const startPrimary = () => {
+  console.log(`Primary ${process.pid} starting ${WORKERS} workers`);
+  const loads = new Map();
+  const restarts = new Set();
+  let stopping = false;
 
-process.on('SIGINT', async () => {
-  console.log('SIGINT received, shutting down gracefully');
-  await client.quit();
-  process.exit(0);
-});
+  const broadcast = (message) => {
+    for (const worker of Object.values(cluster.workers)) {
+      if (worker.isConnected()) {
+        worker.send(message);
+      }
+    }
+  };
+
+  cluster.on('message', (worker, message) => {
+    if (message && message.type === 'load') {
+      loads.set(worker.id, message.load);
+    }
+  });
+
+  cluster.on('exit', (worker, code, signal) => {
+    loads.delete(worker.id);
+    if (stopping) {
+      if (Object.keys(cluster.workers).length === 0) {
+        console.log('All workers drained, exiting');
+        process.exit(0);
+      }
+      return;
+    }
+    console.error(`Worker ${worker.id} exited (${signal || code}), restarting`);
+    const restart = setTimeout(() => {
+      restarts.delete(restart);
+      cluster.fork();
+    }, 1000);
+    restarts.add(restart);
+  });
 
-startServer();
+  setInterval(() => {
+    broadcast({ type: 'load-table', workers: [...loads.values()] });
+  }, LOAD_REPORT_INTERVAL_MS).unref();
+
+  const drain = (reason) => {
+    if (stopping) {
+      return;
+    }
+    stopping = true;
+    for (const restart of restarts) {
+      clearTimeout(restart);
+    }
+    restarts.clear();
+    if (Object.keys(cluster.workers).length === 0) {
+      console.log(`${reason} received, no workers running, exiting`);
+      process.exit(0);
+    }
+    console.log(`${reason} received, draining ${Object.keys(cluster.workers).length} workers`);
+    broadcast({ type: 'shutdown', reason });
+    setTimeout(() => {
+      console.error('Workers did not drain in time, killing');
+      for (const worker of Object.values(cluster.workers)) {
+        worker.process.kill('SIGKILL');
+      }
+      process.exit(1);
+    }, SHUTDOWN_TIMEOUT_MS + 1000).unref();
+  };
+
+  process.on('SIGTERM', () => drain('SIGTERM'));
+  process.on('SIGINT', () => drain('SIGINT'));
+
+  for (let i = 0; i < WORKERS; i++) {
+    cluster.fork();
+  }
+};
+
+const startWorker = () => {
+  process.on('message', (message) => {
+    if (message && message.type === 'load-table') {
+      workerLoads = message.workers;
+    } else if (message && message.type === 'shutdown') {
+      shutdown(`${message.reason} (from primary)`);
+    }
+  });
+
+  setInterval(() => {
+    process.send({ type: 'load', load: currentLoad() });
+  }, LOAD_REPORT_INTERVAL_MS).unref();
+
+  startServer();
+};
+
+if (WORKERS > 1 && cluster.isPrimary) {
+  startPrimary();
+} else {
+  // Graceful shutdown
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+  process.on('SIGINT', () => shutdown('SIGINT'));
+
+  if (cluster.isWorker) {
+    startWorker();
+  } else {
+    startServer();
+  }
+}
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Post-Deploy Artifact Stage
+Renders everything the pipeline hands out after a deploy from one parsed
+topology (infra_model.load(): terraform/ + terraform-outputs.json) instead of
+querying EC2 again for each file: the connection guide, the Ansible inventory
+and the diagram inputs, plus the diagrams themselves with --diagrams.
+Text artifacts come from string.Template files under templates/. Artifacts
+render in parallel, and one whose inputs (template, model data, generator
+source) and output file are unchanged since the last run is skipped
+
+Examples:
+  # Everything, as the Jenkins "Generate Connection Guide" stage does
+  python3 artifact_stage.py --key-name redis-infra-key
+
+  # Only the inventory, before running the playbook
+  python3 artifact_stage.py inventory
+
+  # Also re-render the PNG diagrams, whatever changed
+  python3 artifact_stage.py --diagrams --force --json artifacts.json
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import string
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import infra_model
+
+TEMPLATE_DIR = os.path.join(infra_model.ROOT, "templates")
+MANIFEST = ".artifact-stage.json"
+DIAGRAM_FILES = {
+    "redis_infrastructure_diagram": "redis_infrastructure_diagram.png",
+    "jenkins_pipeline_diagram": "jenkins_pipeline_diagram.png",
+    "network_architecture_diagram": "network_architecture_diagram.png",
+}
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def _digest(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _file_digest(path):
+    try:
+        with open(path, "rb") as f:
+            return _digest(f.read())
+    except OSError:
+        return None
+
+
+def _write(path, data):
+    """Replace path atomically so a failed run never leaves half a file"""
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".partial")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(partial, path)
+
+
+def _port_range(group, name, default):
+    for rule in group.ingress:
+        if rule.service.startswith(name + "("):
+            return str(rule.from_port) if rule.from_port == rule.to_port else "%d-%d" % (rule.from_port, rule.to_port)
+    return default
+
+
+def template_context(topology, key_name):
+    """Values the templates under templates/ may use"""
+    host = topology.bastion
+    nodes = [node for node in topology.redis_nodes if node.private_ip]
+    if host is None or not host.public_ip:
+        raise ArtifactError("No bastion host found (is terraform-outputs.json from a deployed stack?)")
+    if not nodes:
+        raise ArtifactError("No Redis nodes found")
+
+    key_file = "%s.pem" % key_name
+    public_sg = topology.groups_of(host)[0]
+    private_sg = topology.groups_of(nodes[0])[0]
+    width = max(len(node.private_ip) for node in nodes)
+    return {
+        "key_file": key_file,
+        "bastion_ip": host.public_ip,
+        "node_ips": " ".join(node.private_ip for node in nodes),
+        "node_commands": "\n".join("ssh -i %s -J ubuntu@%s ubuntu@%s" % (key_file, host.public_ip, node.private_ip)
+                                   for node in nodes),
+        "node_details": "\n".join("- %s: %-*s (%s)" % (node.name, width, node.private_ip, topology.subnet(node.subnet).az)
+                                  for node in nodes),
+        "node_hosts": "\n".join("redis-node-%d ansible_host=%s ansible_user=ubuntu" % (index, node.private_ip)
+                                for index, node in enumerate(nodes, 1)),
+        "redis_port": _port_range(private_sg, "Redis", "6379"),
+        "cluster_ports": _port_range(private_sg, "Cluster", "16379-16384"),
+        "security_groups": "\n".join("- %s: %s" % (label, ", ".join(s.replace("(", " (") for s in group.services()))
+                                     for label, group in (("Public SG", public_sg), ("Private SG", private_sg))),
+    }
+
+
+class Artifact:
+    """One output file: a digest of everything it is rendered from, and how to render it"""
+
+    def __init__(self, name, path, inputs, render):
+        self.name = name
+        self.path = path
+        self.inputs = inputs
+        self.render = render
+
+
+def text_artifact(name, path, template_name, context):
+    with open(os.path.join(TEMPLATE_DIR, template_name)) as f:
+        template = f.read()
+    # A template only depends on the placeholders it actually uses
+    used = sorted({m.group("named") or m.group("braced") for m in string.Template.pattern.finditer(template)} - {None})
+    inputs = _digest(template, json.dumps({key: context.get(key) for key in used}, sort_keys=True))
+
+    def render():
+        _write(path, string.Template(template).substitute(context).encode())
+    return Artifact(name, path, inputs, render)
+
+
+def model_artifact(path, topology):
+    data = json.dumps(topology.as_dict(), indent=2, sort_keys=True) + "\n"
+    return Artifact("model", path, _digest(data), lambda: _write(path, data.encode()))
+
+
+def diagram_artifacts(topology):
+    """One artifact per PNG; empty if the diagrams package is not installed"""
+    try:
+        import create_redis_infrastructure_diagram as generator
+        import diagram_assets
+    except ImportError:
+        return []
+    diagram_assets.install()
+    model = json.dumps(topology.as_dict(), sort_keys=True)
+    artifacts = []
+    for function_name, filename in DIAGRAM_FILES.items():
+        function = getattr(generator, "create_" + function_name)
+        inputs = _digest(model, inspect.getsource(function), inspect.getsource(diagram_assets))
+        artifacts.append(Artifact(function_name, filename, inputs, lambda f=function: f(topology)))
+    return artifacts
+
+
+def build(artifacts, manifest, force=False, workers=4):
+    """Render stale artifacts in parallel; returns (results, updated manifest)"""
+    def run(artifact):
+        previous = manifest.get(artifact.name, {})
+        if (not force and previous.get("inputs") == artifact.inputs
+                and previous.get("output") and previous.get("output") == _file_digest(artifact.path)):
+            return {"name": artifact.name, "path": artifact.path, "status": "unchanged", "seconds": 0.0}
+        start = time.perf_counter()
+        artifact.render()
+        return {"name": artifact.name, "path": artifact.path, "status": "rendered",
+                "seconds": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, artifacts))
+
+    updated = dict(manifest)
+    for artifact, result in zip(artifacts, results):
+        updated[artifact.name] = {"inputs": artifact.inputs, "output": _file_digest(artifact.path)}
+    return results, updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the post-deploy artifacts from the infrastructure model")
+    parser.add_argument("artifacts", nargs="*",
+                        help="subset to render: guide, inventory, model (default all)")
+    parser.add_argument("--key-name", default=os.environ.get("KEY_PAIR_NAME", "redis-infra-key"),
+                        help="EC2 key pair name, for <name>.pem (default $KEY_PAIR_NAME or redis-infra-key)")
+    parser.add_argument("--terraform", help="Terraform root module (default terraform/)")
+    parser.add_argument("--outputs", help="terraform output -json file (default terraform-outputs.json)")
+    parser.add_argument("--output-dir", default=".", help="where the artifacts are written (default .)")
+    parser.add_argument("--diagrams", action="store_true", help="also render the PNG diagrams (needs diagrams)")
+    parser.add_argument("--force", action="store_true", help="render even if nothing changed")
+    parser.add_argument("--json", help="write the per-artifact results to this file")
+    args = parser.parse_args()
+    selected = set(args.artifacts) or {"guide", "inventory", "model"}
+    unknown = selected - {"guide", "inventory", "model"}
+    if unknown:
+        parser.error("unknown artifact(s): %s" % ", ".join(sorted(unknown)))
+    if args.terraform:
+        args.terraform = os.path.abspath(args.terraform)
+    if args.outputs:
+        args.outputs = os.path.abspath(args.outputs)
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    print("📋 Post-Deploy Artifacts")
+    print("=" * 50)
+    start = time.perf_counter()
+    try:
+        topology = infra_model.load(args.terraform, args.outputs)
+        context = template_context(topology, args.key_name)
+    except (ArtifactError, infra_model.HclError, OSError) as exc:
+        print("❌ %s" % exc)
+        sys.exit(1)
+
+    # Diagrams render into the working directory, so every artifact path is relative to it
+    os.makedirs(args.output_dir, exist_ok=True)
+    os.chdir(args.output_dir)
+    artifacts = []
+    if "guide" in selected:
+        artifacts.append(text_artifact("guide", "connection-guide.txt", "connection-guide.txt.tmpl", context))
+    if "inventory" in selected:
+        artifacts.append(text_artifact("inventory", "inventory.ini", "inventory.ini.tmpl", context))
+    if "model" in selected:
+        artifacts.append(model_artifact("infra-model.json", topology))
+    if args.diagrams:
+        diagrams = diagram_artifacts(topology)
+        if not diagrams:
+            print("⚠️  diagrams is not installed - skipping the PNG diagrams")
+        artifacts.extend(diagrams)
+
+    try:
+        with open(MANIFEST) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    results, manifest = build(artifacts, manifest, force=args.force)
+    _write(MANIFEST, (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode())
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        icon = "✅" if result["status"] == "rendered" else "⏭️ "
+        print("%s %-34s %-9s %6.2fs" % (icon, result["path"], result["status"], result["seconds"]))
+    rendered = sum(1 for result in results if result["status"] == "rendered")
+    print("\n🏁 %d rendered, %d unchanged in %.2fs" % (rendered, len(results) - rendered, elapsed))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"seconds": elapsed, "artifacts": results}, f, indent=2)
+        print("💾 Results written to %s" % args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+const redis = require('redis');
+const { globMatcher } = require('./hash-buckets');
+
+// Change feed for app.js
+//
+// Instead of every downstream service polling GET /get/:key, each process
+// keeps ONE Redis subscription and fans changes out to any number of watchers
+// (Server-Sent Events responses). Changes come from one of two sources:
+//
+//   "keyspace"  keyspace notifications (PSUBSCRIBE __keyspace@*__:*, one
+//               subscriber connection per master). Sees every write, including
+//               ones made outside this app, but only for string keys: a write
+//               into a hash bucket (STORAGE_MODE=hash) names the bucket, not
+//               the entry, so bucket keys are ignored
+//   "stream"    this app appends {key, op} to a capped Redis Stream after every
+//               write it makes through the store, and each process follows the
+//               stream with a blocking XREAD. Works with either storage mode
+//
+// Changes are coalesced per key for `windowMs`: a key written 500 times in a
+// window produces one event, its value read once and serialized once for all
+// of its watchers. Each watcher has a bounded buffer (events per key, latest
+// wins) for when its socket is not draining; a watcher that overflows it is
+// sent an "overflow" event and disconnected, to re-read and reconnect.
+const CHANGE_FEED_SOURCES = ['keyspace', 'stream'];
+
+// Operations after which the key holds no value
+const REMOVED = new Set(['del', 'expired', 'evicted', 'rename_from', 'move_from']);
+
+// Keyspace notification classes: K (keyspace channel), g (generic: del,
+// expire, rename), $ (strings), x (expired), e (evicted)
+const KEYSPACE_FLAGS = 'Kg$xe';
+const KEYSPACE_PATTERN = '__keyspace@*__:*';
+const HEARTBEAT_MS = 15000;
+
+const isolated = redis.commandOptions({ isolated: true });
+
+// Patterns without glob characters are indexed by key, the rest matched per flush
+const isGlob = (pattern) => /[*?[\\]/.test(pattern);
+
+const createChangeFeed = (client, {
+  source,
+  clusterMode = false,
+  masterClients = async () => [client],
+  readValues = null,
+  windowMs = 50,
+  bufferSize = 1000,
+  streamKey = 'kv:changes',
+  streamMaxLen = 100000,
+  ignorePrefixes = []
+} = {}) => {
+  if (!CHANGE_FEED_SOURCES.includes(source)) {
+    throw new Error(`Unknown change feed source "${source}" (expected one of: ${CHANGE_FEED_SOURCES.join(', ')})`);
+  }
+
+  const exact = new Map(); // key -> Set of watchers
+  const patterns = new Map(); // pattern -> { matches, watchers }
+  const watchers = new Set();
+  const subscribers = [];
+  const stats = { received: 0, coalesced: 0, flushes: 0, delivered: 0, overflowed: 0 };
+  let pending = new Map(); // key -> op, latest wins
+  let flushTimer = null;
+  let heartbeat = null;
+  let closed = false;
+
+  const send = (watcher, events) => {
+    if (watcher.closed) {
+      return;
+    }
+    if (watcher.blocked) {
+      for (const [key, payload] of events) {
+        watcher.buffer.set(key, payload);
+      }
+      if (watcher.buffer.size > bufferSize) {
+        stats.overflowed++;
+        watcher.buffer.clear();
+        watcher.res.end(`event: overflow\ndata: {"buffered":${bufferSize}}\n\n`);
+        watcher.close();
+      }
+      return;
+    }
+    let body = '';
+    for (const [, payload] of events) {
+      body += payload;
+    }
+    stats.delivered += events.length;
+    if (!watcher.res.write(body)) {
+      watcher.blocked = true;
+    }
+  };
+
+  const onDrain = (watcher) => {
+    watcher.blocked = false;
+    if (watcher.buffer.size > 0) {
+      const events = [...watcher.buffer];
+      watcher.buffer.clear();
+      send(watcher, events);
+    }
+  };
+
+  // Stream changes matching `pattern` (a key or SCAN-style glob) to an HTTP
+  // response as SSE; returns the watcher, removed again when the response closes
+  const watch = (pattern, res) => {
+    const watcher = { pattern, res, buffer: new Map(), blocked: false, closed: false };
+    watcher.close = () => {
+      if (watcher.closed) {
+        return;
+      }
+      watcher.closed = true;
+      watchers.delete(watcher);
+      if (isGlob(pattern)) {
+        const entry = patterns.get(pattern);
+        entry.watchers.delete(watcher);
+        if (entry.watchers.size === 0) {
+          patterns.delete(pattern);
+        }
+      } else {
+        const set = exact.get(pattern);
+        set.delete(watcher);
+        if (set.size === 0) {
+          exact.delete(pattern);
+        }
+      }
+    };
+
+    if (isGlob(pattern)) {
+      if (!patterns.has(pattern)) {
+        patterns.set(pattern, { matches: globMatcher(pattern), watchers: new Set() });
+      }
+      patterns.get(pattern).watchers.add(watcher);
+    } else {
+      if (!exact.has(pattern)) {
+        exact.set(pattern, new Set());
+      }
+      exact.get(pattern).add(watcher);
+    }
+    watchers.add(watcher);
+
+    res.on('drain', () => onDrain(watcher));
+    res.on('close', watcher.close);
+    res.write(`retry: 1000\nevent: ready\ndata: ${JSON.stringify({ match: pattern, source })}\n\n`);
+    return watcher;
+  };
+
+  const flush = async () => {
+    flushTimer = null;
+    const changes = pending;
+    pending = new Map();
+    stats.flushes++;
+
+    // Who wants which key; keys nobody watches are dropped here
+    const interested = new Map();
+    for (const key of changes.keys()) {
+      const targets = [];
+      const direct = exact.get(key);
+      if (direct) {
+        targets.push(...direct);
+      }
+      for (const { matches, watchers: matching } of patterns.values()) {
+        if (matches(key)) {
+          targets.push(...matching);
+        }
+      }
+      if (targets.length > 0) {
+        interested.set(key, targets);
+      }
+    }
+    if (interested.size === 0) {
+      return;
+    }
+
+    // One read per changed key, shared by all of its watchers
+    const readable = readValues ? [...interested.keys()].filter((key) => !REMOVED.has(changes.get(key))) : [];
+    const values = new Map();
+    if (readable.length > 0) {
+      try {
+        const read = await readValues(readable);
+        readable.forEach((key, i) => values.set(key, read[i]));
+      } catch (error) {
+        console.error('Change feed value read failed:', error.message);
+      }
+    }
+
+    const perWatcher = new Map();
+    for (const [key, targets] of interested) {
+      const event = { key, op: changes.get(key) };
+      if (values.has(key)) {
+        event.value = values.get(key);
+      }
+      const payload = `event: change\ndata: ${JSON.stringify(event)}\n\n`;
+      for (const watcher of targets) {
+        let events = perWatcher.get(watcher);
+        if (!events) {
+          events = [];
+          perWatcher.set(watcher, events);
+        }
+        events.push([key, payload]);
+      }
+    }
+    for (const [watcher, events] of perWatcher) {
+      send(watcher, events);
+    }
+  };
+
+  const receive = (key, op) => {
+    if (ignorePrefixes.some((prefix) => key.startsWith(prefix))) {
+      return;
+    }
+    stats.received++;
+    if (pending.has(key)) {
+      stats.coalesced++;
+    }
+    pending.set(key, op);
+    if (!flushTimer) {
+      flushTimer = setTimeout(() => {
+        flush().catch((error) => console.error('Change feed flush failed:', error.message));
+      }, windowMs);
+    }
+  };
+
+  // Enable the notification classes the feed needs, keeping any already set.
+  // Managed Redis services often refuse CONFIG SET: then they must be enabled
+  // in the service's settings instead
+  const enableNotifications = async (node) => {
+    try {
+      const current = (await node.configGet('notify-keyspace-events'))['notify-keyspace-events'] || '';
+      // "A" covers every class, but not the K/E channel choice
+      const covered = (flag) => current.includes(flag) || (flag !== 'K' && current.includes('A'));
+      const missing = [...KEYSPACE_FLAGS].filter((flag) => !covered(flag)).join('');
+      if (missing) {
+        await node.configSet('notify-keyspace-events', current + missing);
+      }
+    } catch (error) {
+      console.warn(`⚠️  Could not enable keyspace notifications (${error.message}); ` +
+        `set notify-keyspace-events to "${KEYSPACE_FLAGS}" on the server`);
+    }
+  };
+
+  const startKeyspace = async () => {
+    // Notifications are local to the node that holds the key: one per master
+    for (const node of await masterClients()) {
+      await enableNotifications(node);
+      const subscriber = node.duplicate();
+      subscriber.on('error', (error) => console.error('Change feed subscriber error:', error.message));
+      await subscriber.connect();
+      await subscriber.pSubscribe(KEYSPACE_PATTERN, (op, channel) => {
+        receive(channel.slice(channel.indexOf('__:') + 3), op);
+      });
+      subscribers.push(subscriber);
+    }
+  };
+
+  // Follow the stream from its current end on an isolated connection, so the
+  // blocking XREAD never holds up regular commands
+  const startStream = () => {
+    let lastId = '$';
+    const follow = async () => {
+      while (!closed) {
+        try {
+          const reply = await client.xRead(isolated, [{ key: streamKey, id: lastId }], {
+            BLOCK: 5000,
+            COUNT: 1000
+          });
+          for (const { messages } of reply || []) {
+            for (const { id, message } of messages) {
+              lastId = id;
+              receive(message.key, message.op);
+            }
+          }
+        } catch (error) {
+          if (closed) {
+            return;
+          }
+          console.error('Change feed stream read failed:', error.message);
+          await new Promise((resolve) => setTimeout(resolve, 1000));
+        }
+      }
+    };
+    follow();
+  };
+
+  const start = async () => {
+    if (source === 'keyspace') {
+      await startKeyspace();
+    } else {
+      startStream();
+    }
+    heartbeat = setInterval(() => {
+      for (const watcher of watchers) {
+        if (!watcher.blocked) {
+          watcher.res.write(': keep-alive\n\n');
+        }
+      }
+    }, HEARTBEAT_MS);
+    heartbeat.unref();
+    console.log(`Change feed on (${source}${clusterMode ? ', cluster' : ''}, ${windowMs}ms window)`);
+  };
+
+  // Record writes made through a store (stream source only): once a write has
+  // succeeded its keys are appended to the stream, the XADDs sent together
+  // (node-redis pipelines commands issued in the same tick), so a failed
+  // write records nothing
+  const record = (entries) => {
+    if (source !== 'stream' || entries.length === 0) {
+      return Promise.resolve();
+    }
+    const trim = { TRIM: { strategy: 'MAXLEN', strategyModifier: '~', threshold: streamMaxLen } };
+    return Promise.all(entries.map(([key, op]) => client.xAdd(streamKey, '*', { key, op }, trim)));
+  };
+
+  // The store from hash-buckets.js with its writes recorded in the feed
+  const track = (store) => {
+    if (source !== 'stream') {
+      return store;
+    }
+    const recorded = (method, op, keysOf) => async (...args) => {
+      const result = await store[method](...args);
+      await record(keysOf(...args).map((key) => [key, op]));
+      return result;
+    };
+    return {
+      ...store,
+      set: recorded('set', 'set', (key) => [key]),
+      mSet: recorded('mSet', 'set', (pairs) => pairs.map(([key]) => key)),
+      del: recorded('del', 'del', (key) => [key]),
+      // EXPIRE with a TTL <= 0 deletes the key right away
+      expire: async (key, seconds) => {
+        const result = await store.expire(key, seconds);
+        await record([[key, seconds <= 0 ? 'del' : 'expire']]);
+        return result;
+      },
+      incrBy: recorded('incrBy', 'incrby', (key) => [key])
+    };
+  };
+
+  // End every watcher (so server.close() is not held open) and the subscription
+  const close = async () => {
+    closed = true;
+    clearTimeout(flushTimer);
+    clearInterval(heartbeat);
+    for (const watcher of [...watchers]) {
+      watcher.res.end();
+      watcher.close();
+    }
+    await Promise.all(subscribers.map((subscriber) => subscriber.quit().catch(() => {})));
+  };
+
+  return {
+    source,
+    start,
+    watch,
+    track,
+    close,
+    stats: () => ({
+      source,
+      watchers: watchers.size,
+      keys: exact.size,
+      patterns: patterns.size,
+      ...stats
+    })
+  };
+};
+
+module.exports = { CHANGE_FEED_SOURCES, createChangeFeed };
@@ -9,7 +9,14 @@ import matplotlib.patches as patches
 from matplotlib.patches import FancyBboxPatch, ConnectionPatch
 import numpy as np
 
-def create_infrastructure_diagram():
+import infra_model
+
+def create_infrastructure_diagram(topology=None):
+    topology = topology or infra_model.load()
+    host = topology.require_bastion()
+    public_sg = topology.groups_of(host)[0]
+    private_sg = topology.groups_of(topology.redis_nodes[0])[0]
+    
     # Create figure and axis
     fig, ax = plt.subplots(1, 1, figsize=(16, 12))
     ax.set_xlim(0, 16)
@@ -37,7 +44,7 @@ def create_infrastructure_diagram():
                                edgecolor=aws_orange, 
                                linewidth=3)
     ax.add_patch(aws_cloud)
-    ax.text(1, 10.2, 'AWS Cloud (ap-south-1)', fontsize=12, fontweight='bold', color=aws_orange)
+    ax.text(1, 10.2, f'AWS Cloud ({topology.region})', fontsize=12, fontweight='bold', color=aws_orange)
     
     # VPC
     vpc_box = FancyBboxPatch((1, 1.5), 14, 8.5, 
@@ -46,7 +53,7 @@ def create_infrastructure_diagram():
                              edgecolor=vpc_blue, 
                              linewidth=2)
     ax.add_patch(vpc_box)
-    ax.text(1.5, 9.7, 'Custom VPC (10.0.0.0/16)', fontsize=12, fontweight='bold', color=vpc_blue)
+    ax.text(1.5, 9.7, f'Custom VPC ({topology.vpc_cidr})', fontsize=12, fontweight='bold', color=vpc_blue)
     
     # Internet Gateway
     igw_box = FancyBboxPatch((7.5, 9), 1.5, 0.8, 
@@ -63,7 +70,7 @@ def create_infrastructure_diagram():
                                    edgecolor=public_green, 
                                    linewidth=2)
     ax.add_patch(public_subnet)
-    ax.text(2.5, 8.5, 'Public Subnet (10.0.1.0/24)', fontsize=11, fontweight='bold', color=public_green)
+    ax.text(2.5, 8.5, f'Public Subnet ({topology.subnet(host.subnet).cidr})', fontsize=11, fontweight='bold', color=public_green)
     
     # Bastion Host
     bastion_box = FancyBboxPatch((3, 7.3), 2, 1.2, 
@@ -72,7 +79,7 @@ def create_infrastructure_diagram():
                                  edgecolor='black')
     ax.add_patch(bastion_box)
     ax.text(4, 8.1, 'Bastion Host', fontsize=10, fontweight='bold', ha='center')
-    ax.text(4, 7.8, 'EC2 t3.micro', fontsize=9, ha='center', color='gray')
+    ax.text(4, 7.8, f'EC2 {host.instance_type}', fontsize=9, ha='center', color='gray')
     ax.text(4, 7.5, 'Public IP', fontsize=9, ha='center', color=public_green)
     
     # NAT Gateway
@@ -85,11 +92,11 @@ def create_infrastructure_diagram():
     ax.text(12, 7.8, 'Elastic IP', fontsize=9, ha='center', color='white')
     
     # Private Subnets
-    subnet_positions = [(2, 4.5), (6, 4.5), (10, 4.5)]
-    subnet_azs = ['ap-south-1a', 'ap-south-1b', 'ap-south-1c']
-    subnet_cidrs = ['10.0.2.0/24', '10.0.3.0/24', '10.0.4.0/24']
+    subnet_positions = [(2 + i * 4, 4.5) for i in range(len(topology.redis_nodes))]
     
     for i, (x, y) in enumerate(subnet_positions):
+        node = topology.redis_nodes[i]
+        subnet = topology.subnet(node.subnet)
         # Private subnet box
         private_subnet = FancyBboxPatch((x, y), 3.5, 2.5, 
                                         boxstyle="round,pad=0.1", 
@@ -98,8 +105,8 @@ def create_infrastructure_diagram():
                                         linewidth=2)
         ax.add_patch(private_subnet)
         ax.text(x + 0.2, y + 2.2, f'Private Subnet', fontsize=10, fontweight='bold', color=private_red)
-        ax.text(x + 0.2, y + 1.9, f'{subnet_cidrs[i]}', fontsize=9, color=private_red)
-        ax.text(x + 0.2, y + 1.6, f'{subnet_azs[i]}', fontsize=9, color='gray')
+        ax.text(x + 0.2, y + 1.9, f'{subnet.cidr}', fontsize=9, color=private_red)
+        ax.text(x + 0.2, y + 1.6, f'{subnet.az}', fontsize=9, color='gray')
         
         # Redis Node
         redis_box = FancyBboxPatch((x + 0.5, y + 0.3), 2.5, 1.2, 
@@ -108,7 +115,7 @@ def create_infrastructure_diagram():
                                    edgecolor='black')
         ax.add_patch(redis_box)
         ax.text(x + 1.75, y + 1.1, f'Redis Node {i+1}', fontsize=10, fontweight='bold', ha='center', color='white')
-        ax.text(x + 1.75, y + 0.8, 'EC2 t3.micro', fontsize=9, ha='center', color='white')
+        ax.text(x + 1.75, y + 0.8, f'EC2 {node.instance_type}', fontsize=9, ha='center', color='white')
         ax.text(x + 1.75, y + 0.5, 'Port: 6379', fontsize=9, ha='center', color='white')
     
     # Security Groups
@@ -119,9 +126,10 @@ def create_infrastructure_diagram():
                             linewidth=2)
     ax.add_patch(sg_box)
     ax.text(2, 3.5, 'Security Groups', fontsize=11, fontweight='bold', color=security_purple)
-    ax.text(2, 3.1, '• Public SG: SSH(22), HTTP(80)', fontsize=9, color='black')
-    ax.text(2, 2.8, '• Private SG: Redis(6379)', fontsize=9, color='black')
-    ax.text(2, 2.5, '• Cluster: 16379-16384', fontsize=9, color='black')
+    ax.text(2, 3.1, f'• Public SG: {", ".join(public_sg.services())}', fontsize=9, color='black')
+    private_services = private_sg.services()
+    ax.text(2, 2.8, f'• Private SG: {", ".join(private_services[:1])}', fontsize=9, color='black')
+    ax.text(2, 2.5, f'• {", ".join(private_services[1:])}', fontsize=9, color='black')
     ax.text(2, 2.2, '• SSH access via Bastion', fontsize=9, color='black')
     
     # VPC Peering
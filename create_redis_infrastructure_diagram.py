@@ -17,9 +17,16 @@ from diagrams.onprem.vcs import Git
 from diagrams.programming.language import Python
 from diagrams.aws.management import Cloudformation
 
-def create_redis_infrastructure_diagram():
+import diagram_assets
+import infra_model
+
+def create_redis_infrastructure_diagram(topology=None):
     """Create the main Redis infrastructure diagram"""
     
+    topology = topology or infra_model.load()
+    host = topology.require_bastion()
+    public = topology.subnet(host.subnet)
+    
     with Diagram("Redis Infrastructure on AWS - Multi-AZ Deployment", 
                  filename="redis_infrastructure_diagram", 
                  show=False, 
@@ -35,34 +42,31 @@ def create_redis_infrastructure_diagram():
         users = Users("DevOps Team")
         internet = InternetAlt1("Internet")
         
-        with Cluster("AWS Cloud (ap-south-1)"):
+        with Cluster(f"AWS Cloud ({topology.region})"):
             
-            with Cluster("Custom VPC (10.0.0.0/16)\nvpc-0bb85e2fb441d0fdd"):
+            with Cluster(f"Custom VPC ({topology.vpc_cidr})\n{topology.vpc_id or topology.vpc_name}"):
                 
                 # Internet Gateway
                 igw = InternetGateway("Internet Gateway")
                 
-                with Cluster("Public Subnet (10.0.1.0/24)\nap-south-1b"):
+                with Cluster(f"Public Subnet ({public.cidr})\n{public.az}"):
                     # Bastion Host
-                    bastion = EC2("Bastion Host\ni-0a5f4742d750b6f1d\n3.110.104.52")
+                    bastion = EC2(f"Bastion Host\n{host.details}")
                     
                     # NAT Gateway
                     nat = NATGateway("NAT Gateway\nElastic IP")
                 
                 # Security Groups
                 with Cluster("Security Groups"):
-                    public_sg = IAM("Public SG\nSSH(22), HTTP(80)\nICMP")
-                    private_sg = IAM("Private SG\nSSH(22), Redis(6379)\nCluster(16379-16384)")
+                    public_sg = IAM("Public SG\n" + topology.groups_of(host)[0].summary())
+                    private_sg = IAM("Private SG\n" + topology.groups_of(topology.redis_nodes[0])[0].summary())
                 
                 # Private Subnets with Redis Nodes
-                with Cluster("Private Subnet 1 (10.0.2.0/24)\nap-south-1a"):
-                    redis1 = EC2("Redis Node 1\ni-026ca7ca8e8fc9b10\n10.0.2.143")
-                
-                with Cluster("Private Subnet 2 (10.0.3.0/24)\nap-south-1b"):
-                    redis2 = EC2("Redis Node 2\ni-02c2701141b0bdfb5\n10.0.3.32")
-                
-                with Cluster("Private Subnet 3 (10.0.4.0/24)\nap-south-1c"):
-                    redis3 = EC2("Redis Node 3\ni-0e6b028479cc401bb\n10.0.4.214")
+                redis_nodes = []
+                for index, node in enumerate(topology.redis_nodes, 1):
+                    subnet = topology.subnet(node.subnet)
+                    with Cluster(f"Private Subnet {index} ({subnet.cidr})\n{subnet.az}"):
+                        redis_nodes.append(EC2(f"Redis Node {index}\n{node.details}"))
         
         # Connections
         users >> Edge(label="SSH Access") >> internet
@@ -70,28 +74,27 @@ def create_redis_infrastructure_diagram():
         igw >> Edge(label="Public Access") >> bastion
         
         # Bastion to Redis nodes (SSH tunneling)
-        bastion >> Edge(label="SSH Tunnel", style="dashed", color="red") >> redis1
-        bastion >> Edge(label="SSH Tunnel", style="dashed", color="red") >> redis2
-        bastion >> Edge(label="SSH Tunnel", style="dashed", color="red") >> redis3
+        for redis in redis_nodes:
+            bastion >> Edge(label="SSH Tunnel", style="dashed", color="red") >> redis
         
         # NAT Gateway for outbound internet access
         nat >> Edge(label="Outbound Internet") >> igw
-        redis1 >> Edge(label="Updates/Packages", style="dotted") >> nat
-        redis2 >> Edge(label="Updates/Packages", style="dotted") >> nat
-        redis3 >> Edge(label="Updates/Packages", style="dotted") >> nat
+        for redis in redis_nodes:
+            redis >> Edge(label="Updates/Packages", style="dotted") >> nat
         
         # Redis cluster communication
-        redis1 >> Edge(label="Cluster Sync", color="purple") >> redis2
-        redis2 >> Edge(label="Cluster Sync", color="purple") >> redis3
-        redis3 >> Edge(label="Cluster Sync", color="purple") >> redis1
+        for redis, peer in zip(redis_nodes, redis_nodes[1:] + redis_nodes[:1]):
+            redis >> Edge(label="Cluster Sync", color="purple") >> peer
         
         # Security group associations
         public_sg >> Edge(style="dotted", color="green") >> bastion
-        private_sg >> Edge(style="dotted", color="blue") >> [redis1, redis2, redis3]
+        private_sg >> Edge(style="dotted", color="blue") >> redis_nodes
 
-def create_jenkins_pipeline_diagram():
+def create_jenkins_pipeline_diagram(topology=None):
     """Create Jenkins CI/CD pipeline diagram"""
     
+    topology = topology or infra_model.load()
+    
     with Diagram("Jenkins CI/CD Pipeline - Redis Infrastructure", 
                  filename="jenkins_pipeline_diagram", 
                  show=False, 
@@ -121,7 +124,7 @@ def create_jenkins_pipeline_diagram():
         with Cluster("AWS Infrastructure"):
             vpc = VPC("VPC Creation")
             subnets = PublicSubnet("Subnets & Security Groups")
-            instances = EC2("EC2 Instances\n1 Bastion + 3 Redis Nodes")
+            instances = EC2(f"EC2 Instances\n{topology.fleet}")
             redis_cluster = ElasticacheForRedis("Redis Cluster\nConfiguration")
         
         # Pipeline flow
@@ -134,9 +137,12 @@ def create_jenkins_pipeline_diagram():
         terraform >> Edge(label="Launches") >> instances
         ansible >> Edge(label="Configures") >> redis_cluster
 
-def create_network_architecture_diagram():
+def create_network_architecture_diagram(topology=None):
     """Create detailed network architecture diagram"""
     
+    topology = topology or infra_model.load()
+    numbers = {node.key: index for index, node in enumerate(topology.redis_nodes, 1)}
+    
     with Diagram("Network Architecture - Redis Infrastructure", 
                  filename="network_architecture_diagram", 
                  show=False, 
@@ -148,64 +154,73 @@ def create_network_architecture_diagram():
                  }):
         
         users = Users("Administrators")
+        redis_nodes = []
+        bastion = nat = None
         
-        with Cluster("AWS Region: ap-south-1"):
+        with Cluster(f"AWS Region: {topology.region}"):
             
             with Cluster("Availability Zones"):
                 
-                with Cluster("AZ-1a (ap-south-1a)"):
-                    with Cluster("Private Subnet\n10.0.2.0/24"):
-                        redis_1a = EC2("Redis Node 1\nPort: 6379\nCluster: 16379-16384")
-                
-                with Cluster("AZ-1b (ap-south-1b)"):
-                    with Cluster("Public Subnet\n10.0.1.0/24"):
-                        bastion_1b = EC2("Bastion Host\nSSH Gateway")
-                        nat_1b = NATGateway("NAT Gateway")
-                    
-                    with Cluster("Private Subnet\n10.0.3.0/24"):
-                        redis_1b = EC2("Redis Node 2\nPort: 6379\nCluster: 16379-16384")
-                
-                with Cluster("AZ-1c (ap-south-1c)"):
-                    with Cluster("Private Subnet\n10.0.4.0/24"):
-                        redis_1c = EC2("Redis Node 3\nPort: 6379\nCluster: 16379-16384")
+                for az in topology.availability_zones:
+                    with Cluster(f"AZ-{az.rsplit('-', 1)[-1]} ({az})"):
+                        for subnet in (s for s in topology.subnets if s.az == az):
+                            with Cluster(f"{'Public' if subnet.public else 'Private'} Subnet\n{subnet.cidr}"):
+                                for node in topology.instances_in(subnet.key):
+                                    if node.public:
+                                        bastion = EC2("Bastion Host\nSSH Gateway")
+                                    else:
+                                        redis_nodes.append(EC2(f"Redis Node {numbers[node.key]}\nPort: 6379\nCluster: 16379-16384"))
+                                if subnet.key == topology.nat_subnet:
+                                    nat = NATGateway("NAT Gateway")
             
             # Internet Gateway
             igw = InternetGateway("Internet Gateway")
         
         # Network connections
         users >> Edge(label="SSH (Port 22)") >> igw
-        igw >> bastion_1b
-        
-        # Bastion to Redis nodes
-        bastion_1b >> Edge(label="SSH Jump", style="dashed") >> redis_1a
-        bastion_1b >> Edge(label="SSH Jump", style="dashed") >> redis_1b
-        bastion_1b >> Edge(label="SSH Jump", style="dashed") >> redis_1c
+        if bastion:
+            igw >> bastion
+            
+            # Bastion to Redis nodes
+            for redis in redis_nodes:
+                bastion >> Edge(label="SSH Jump", style="dashed") >> redis
         
         # Redis cluster communication
-        redis_1a >> Edge(label="Redis Cluster", color="red") >> redis_1b
-        redis_1b >> Edge(label="Redis Cluster", color="red") >> redis_1c
-        redis_1c >> Edge(label="Redis Cluster", color="red") >> redis_1a
+        for redis, peer in zip(redis_nodes, redis_nodes[1:] + redis_nodes[:1]):
+            redis >> Edge(label="Redis Cluster", color="red") >> peer
         
         # NAT Gateway for outbound
-        [redis_1a, redis_1b, redis_1c] >> Edge(label="Outbound", style="dotted") >> nat_1b >> igw
+        if nat and redis_nodes:
+            redis_nodes >> Edge(label="Outbound", style="dotted") >> nat >> igw
 
 if __name__ == "__main__":
     print("🎨 Creating Redis Infrastructure Diagrams...")
     print("=" * 50)
     
+    # Resize each icon once and share it across all three renders
+    diagram_assets.install()
+    
+    # Parse terraform/ and terraform-outputs.json once for all three renders
+    topology = infra_model.load()
+    try:
+        topology.require_bastion()
+    except infra_model.TopologyError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    
     # Create main infrastructure diagram
     print("📊 1. Creating main infrastructure diagram...")
-    create_redis_infrastructure_diagram()
+    create_redis_infrastructure_diagram(topology)
     print("   ✅ redis_infrastructure_diagram.png created")
     
     # Create Jenkins pipeline diagram
     print("🔄 2. Creating Jenkins pipeline diagram...")
-    create_jenkins_pipeline_diagram()
+    create_jenkins_pipeline_diagram(topology)
     print("   ✅ jenkins_pipeline_diagram.png created")
     
     # Create network architecture diagram
     print("🌐 3. Creating network architecture diagram...")
-    create_network_architecture_diagram()
+    create_network_architecture_diagram(topology)
     print("   ✅ network_architecture_diagram.png created")
     
     print("\n🎉 All diagrams created successfully!")
@@ -214,8 +229,8 @@ if __name__ == "__main__":
     print("2. jenkins_pipeline_diagram.png - CI/CD pipeline flow")
     print("3. network_architecture_diagram.png - Detailed network topology")
     print("\n📋 Current Infrastructure Status:")
-    print("• Bastion Host: 3.110.104.52 (i-0a5f4742d750b6f1d)")
-    print("• Redis Node 1: 10.0.2.143 (i-026ca7ca8e8fc9b10)")
-    print("• Redis Node 2: 10.0.3.32 (i-02c2701141b0bdfb5)")
-    print("• Redis Node 3: 10.0.4.214 (i-0e6b028479cc401bb)")
-    print("• VPC: vpc-0bb85e2fb441d0fdd (10.0.0.0/16)")
+    host = topology.require_bastion()
+    print(f"• Bastion Host: {host.public_ip} ({host.instance_id})")
+    for index, node in enumerate(topology.redis_nodes, 1):
+        print(f"• Redis Node {index}: {node.private_ip} ({node.instance_id})")
+    print(f"• VPC: {topology.vpc_id or 'not deployed'} ({topology.vpc_cidr})")
@@ -20,9 +20,18 @@ from diagrams.generic.blank import Blank
 from diagrams.generic.network import Firewall
 from diagrams.generic.storage import Storage
 
-def create_infrastructure_architecture():
+import diagram_assets
+import infra_model
+
+def create_infrastructure_architecture(topology=None):
     """Create AWS Infrastructure Architecture Diagram"""
     
+    topology = topology or infra_model.load()
+    host = topology.require_bastion()
+    public = topology.subnet(host.subnet)
+    public_rules = topology.groups_of(host)[0].ingress
+    private_rules = topology.groups_of(topology.redis_nodes[0])[0].ingress
+    
     with Diagram("Redis Infrastructure Architecture", 
                  filename="redis_infrastructure_architecture", 
                  direction="TB",
@@ -33,30 +42,25 @@ def create_infrastructure_architecture():
         users = Users("End Users")
         internet = InternetAlt1("Internet")
         
-        with Cluster("AWS Cloud Region: ap-south-1"):
+        with Cluster(f"AWS Cloud Region: {topology.region}"):
             
-            with Cluster("Custom VPC (10.0.0.0/16)"):
+            with Cluster(f"Custom VPC ({topology.vpc_cidr})"):
                 igw = InternetGateway("Internet\nGateway")
                 
-                with Cluster("Public Subnet (10.0.1.0/24)"):
-                    bastion = EC2("Bastion Host\nt3.micro\nPublic IP")
+                with Cluster(f"Public Subnet ({public.cidr})"):
+                    bastion = EC2(f"Bastion Host\n{host.instance_type}\nPublic IP")
                     nat_gw = NATGateway("NAT Gateway\nElastic IP")
-                    public_sg = Firewall("Public Security Group\n• SSH (22): 0.0.0.0/0\n• HTTP (80): 0.0.0.0/0")
+                    public_sg = Firewall("Public Security Group\n" + "\n".join("• " + rule.describe() for rule in public_rules))
                 
                 with Cluster("Private Subnets - Multi-AZ"):
-                    with Cluster("Availability Zone 1a\n(10.0.2.0/24)"):
-                        redis1 = EC2("Redis Node 1\nt3.micro")
-                        redis1_db = MongoDB("Redis Service\nPort: 6379")
-                        
-                    with Cluster("Availability Zone 1b\n(10.0.3.0/24)"):
-                        redis2 = EC2("Redis Node 2\nt3.micro")
-                        redis2_db = MongoDB("Redis Service\nPort: 6379")
-                        
-                    with Cluster("Availability Zone 1c\n(10.0.4.0/24)"):
-                        redis3 = EC2("Redis Node 3\nt3.micro")
-                        redis3_db = MongoDB("Redis Service\nPort: 6379")
+                    redis_nodes, redis_services = [], []
+                    for index, node in enumerate(topology.redis_nodes, 1):
+                        subnet = topology.subnet(node.subnet)
+                        with Cluster(f"Availability Zone {subnet.az.rsplit('-', 1)[-1]}\n({subnet.cidr})"):
+                            redis_nodes.append(EC2(f"Redis Node {index}\n{node.instance_type}"))
+                            redis_services.append(MongoDB("Redis Service\nPort: 6379"))
                     
-                    private_sg = Firewall("Private Security Group\n• Redis (6379): 0.0.0.0/0\n• Cluster (16379-16384)\n• SSH (22): VPC CIDR")
+                    private_sg = Firewall("Private Security Group\n" + "\n".join("• " + rule.describe() for rule in private_rules))
                 
                 # Persistent Storage
                 ebs_storage = EBS("EBS Volumes\nData Persistence")
@@ -68,26 +72,27 @@ def create_infrastructure_architecture():
         igw >> Edge(label="Route to NAT") >> nat_gw
         
         # SSH Jump Host Access
-        bastion >> Edge(label="SSH Jump Host\n(Secure Access)", style="dashed", color="red") >> [redis1, redis2, redis3]
+        bastion >> Edge(label="SSH Jump Host\n(Secure Access)", style="dashed", color="red") >> redis_nodes
         
         # Internet Access for Private Instances
-        nat_gw >> Edge(label="Internet Access\n(Updates/Packages)") >> [redis1, redis2, redis3]
+        nat_gw >> Edge(label="Internet Access\n(Updates/Packages)") >> redis_nodes
         
         # Redis Cluster Communication
-        redis1_db >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis2_db
-        redis2_db >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis3_db
-        redis3_db >> Edge(label="Cluster Sync", style="dotted", color="blue") >> redis1_db
+        for service, peer in zip(redis_services, redis_services[1:] + redis_services[:1]):
+            service >> Edge(label="Cluster Sync", style="dotted", color="blue") >> peer
         
         # Security Group Controls
         public_sg >> Edge(label="Controls Access") >> bastion
-        private_sg >> Edge(label="Controls Access") >> [redis1, redis2, redis3]
+        private_sg >> Edge(label="Controls Access") >> redis_nodes
         
         # Data Storage
-        [redis1, redis2, redis3] >> Edge(label="Data Storage") >> ebs_storage
+        redis_nodes >> Edge(label="Data Storage") >> ebs_storage
 
-def create_cicd_pipeline_architecture():
+def create_cicd_pipeline_architecture(topology=None):
     """Create CI/CD Pipeline Architecture Diagram"""
     
+    topology = topology or infra_model.load()
+    
     with Diagram("CI/CD Pipeline Architecture", 
                  filename="cicd_pipeline_architecture", 
                  direction="LR",
@@ -126,7 +131,7 @@ def create_cicd_pipeline_architecture():
         # Target AWS Infrastructure
         with Cluster("AWS Target Infrastructure"):
             vpc_networking = VPC("VPC & Networking\nSubnets, Routes, Gateways")
-            compute_instances = EC2("EC2 Instances\n1 Bastion + 3 Redis Nodes")
+            compute_instances = EC2(f"EC2 Instances\n{topology.fleet}")
             redis_cluster = MongoDB("Redis Cluster\nDistributed Database")
             security_groups = Firewall("Security Groups\nNetwork Access Control")
         
@@ -169,9 +174,11 @@ def create_cicd_pipeline_architecture():
         jenkins_server >> Edge(label="Updates") >> monitoring_dashboard
         jenkins_server >> Edge(label="Sends") >> notifications
 
-def create_detailed_pipeline_flow():
+def create_detailed_pipeline_flow(topology=None):
     """Create Detailed Pipeline Flow Diagram"""
     
+    topology = topology or infra_model.load()
+    
     with Diagram("Detailed Jenkins Pipeline Flow", 
                  filename="detailed_pipeline_flow", 
                  direction="TB",
@@ -225,7 +232,7 @@ def create_detailed_pipeline_flow():
         # AWS Resources Created/Managed
         with Cluster("AWS Resources Created"):
             vpc_resources = VPC("VPC Resources\nVPC, Subnets, Route Tables")
-            compute_resources = EC2("Compute Resources\n4 EC2 Instances")
+            compute_resources = EC2(f"Compute Resources\n{len(topology.instances)} EC2 Instances")
             network_resources = Blank("Network Resources\nIGW, NAT Gateway, EIPs")
             security_resources = Firewall("Security Resources\nSecurity Groups, NACLs")
             redis_services = MongoDB("Redis Services\nCluster Configuration")
@@ -267,9 +274,16 @@ def create_detailed_pipeline_flow():
         # Output Generation Flow
         workspace_cleanup >> Edge(label="Generates") >> [ssh_key_file, terraform_outputs, build_summary, connection_guide, monitoring_data]
 
-def create_network_topology():
+def create_network_topology(topology=None):
     """Create Network Topology Diagram"""
     
+    topology = topology or infra_model.load()
+    host = topology.require_bastion()
+    public = topology.subnet(host.subnet)
+    public_prefix = public.cidr.rsplit(".", 1)[0]
+    public_rules = topology.groups_of(host)[0].ingress
+    private_rules = topology.groups_of(topology.redis_nodes[0])[0].ingress
+    
     with Diagram("Network Topology & Security Architecture", 
                  filename="network_topology", 
                  direction="TB",
@@ -279,39 +293,34 @@ def create_network_topology():
         # External Network
         internet = InternetAlt1("Internet\nPublic Network")
         
-        with Cluster("AWS VPC (10.0.0.0/16) - Custom Network"):
+        with Cluster(f"AWS VPC ({topology.vpc_cidr}) - Custom Network"):
             igw = InternetGateway("Internet Gateway\nPublic Internet Access")
             
             # Public Network Tier
             with Cluster("Public Network Tier"):
                 public_route_table = Blank("Public Route Table\n0.0.0.0/0 → IGW")
                 
-                with Cluster("Public Subnet (10.0.1.0/24)"):
-                    bastion_host = EC2("Bastion Host\nJump Server\n10.0.1.x")
-                    nat_gateway = NATGateway("NAT Gateway\nOutbound Internet\n10.0.1.y")
+                with Cluster(f"Public Subnet ({public.cidr})"):
+                    bastion_host = EC2(f"Bastion Host\nJump Server\n{public_prefix}.x")
+                    nat_gateway = NATGateway(f"NAT Gateway\nOutbound Internet\n{public_prefix}.y")
                     
                     with Cluster("Public Security Group"):
-                        public_sg_rules = Firewall("Security Rules:\n• SSH (22): 0.0.0.0/0\n• HTTP (80): 0.0.0.0/0\n• ICMP: All Sources")
+                        public_sg_rules = Firewall("Security Rules:\n" + "\n".join("• " + rule.describe() for rule in public_rules))
             
             # Private Network Tier
             with Cluster("Private Network Tier"):
                 private_route_table = Blank("Private Route Table\n0.0.0.0/0 → NAT Gateway")
                 
                 with Cluster("Multi-AZ Private Subnets"):
-                    with Cluster("AZ-1a Subnet (10.0.2.0/24)"):
-                        redis_node1 = EC2("Redis Node 1\nDatabase Server\n10.0.2.x")
-                        redis_service1 = MongoDB("Redis Service\nPort: 6379\nCluster: 16379-16384")
-                    
-                    with Cluster("AZ-1b Subnet (10.0.3.0/24)"):
-                        redis_node2 = EC2("Redis Node 2\nDatabase Server\n10.0.3.x")
-                        redis_service2 = MongoDB("Redis Service\nPort: 6379\nCluster: 16379-16384")
-                    
-                    with Cluster("AZ-1c Subnet (10.0.4.0/24)"):
-                        redis_node3 = EC2("Redis Node 3\nDatabase Server\n10.0.4.x")
-                        redis_service3 = MongoDB("Redis Service\nPort: 6379\nCluster: 16379-16384")
+                    redis_nodes, redis_services = [], []
+                    for index, node in enumerate(topology.redis_nodes, 1):
+                        subnet = topology.subnet(node.subnet)
+                        with Cluster(f"AZ-{subnet.az.rsplit('-', 1)[-1]} Subnet ({subnet.cidr})"):
+                            redis_nodes.append(EC2(f"Redis Node {index}\nDatabase Server\n{node.private_ip or subnet.cidr}"))
+                            redis_services.append(MongoDB("Redis Service\nPort: 6379\nCluster: 16379-16384"))
                     
                     with Cluster("Private Security Group"):
-                        private_sg_rules = Firewall("Security Rules:\n• Redis (6379): 0.0.0.0/0\n• Cluster (16379-16384): 0.0.0.0/0\n• SSH (22): VPC CIDR Only\n• ICMP: VPC CIDR Only")
+                        private_sg_rules = Firewall("Security Rules:\n" + "\n".join("• " + rule.describe() for rule in private_rules))
         
         # Network Traffic Flow
         internet >> Edge(label="Public Internet Traffic") >> igw
@@ -320,29 +329,30 @@ def create_network_topology():
         public_route_table >> Edge(label="NAT Traffic") >> nat_gateway
         
         # Secure SSH Access Pattern
-        bastion_host >> Edge(label="SSH Jump Connection\n(Port 22 - Secure)", style="dashed", color="red") >> [redis_node1, redis_node2, redis_node3]
+        bastion_host >> Edge(label="SSH Jump Connection\n(Port 22 - Secure)", style="dashed", color="red") >> redis_nodes
         
         # Outbound Internet Access
         nat_gateway >> Edge(label="Outbound Internet Access\n(Updates, Packages)") >> private_route_table
-        private_route_table >> Edge(label="Route to Private Instances") >> [redis_node1, redis_node2, redis_node3]
+        private_route_table >> Edge(label="Route to Private Instances") >> redis_nodes
         
         # Redis Service Hosting
-        redis_node1 >> Edge(label="Hosts") >> redis_service1
-        redis_node2 >> Edge(label="Hosts") >> redis_service2
-        redis_node3 >> Edge(label="Hosts") >> redis_service3
+        for redis_node, redis_service in zip(redis_nodes, redis_services):
+            redis_node >> Edge(label="Hosts") >> redis_service
         
         # Redis Cluster Inter-node Communication
-        redis_service1 >> Edge(label="Cluster Synchronization", style="dotted", color="blue") >> redis_service2
-        redis_service2 >> Edge(label="Cluster Synchronization", style="dotted", color="blue") >> redis_service3
-        redis_service3 >> Edge(label="Cluster Synchronization", style="dotted", color="blue") >> redis_service1
+        for service, peer in zip(redis_services, redis_services[1:] + redis_services[:1]):
+            service >> Edge(label="Cluster Synchronization", style="dotted", color="blue") >> peer
         
         # Security Group Application
         public_sg_rules >> Edge(label="Applied to") >> bastion_host
-        private_sg_rules >> Edge(label="Applied to") >> [redis_node1, redis_node2, redis_node3]
+        private_sg_rules >> Edge(label="Applied to") >> redis_nodes
 
-def create_project_overview():
+def create_project_overview(topology=None):
     """Create Project Overview Diagram"""
     
+    topology = topology or infra_model.load()
+    redis_count = len(topology.redis_nodes)
+    
     with Diagram("Redis Infrastructure Project - Complete Overview", 
                  filename="redis_project_overview", 
                  direction="TB",
@@ -369,11 +379,11 @@ def create_project_overview():
             
             # Infrastructure Components Layer
             with Cluster("AWS Infrastructure Components"):
-                network_infrastructure = VPC("Network Infrastructure\nCustom VPC (10.0.0.0/16)\nMulti-AZ Subnets")
-                compute_infrastructure = EC2("Compute Infrastructure\nBastion Host (Public)\n3x Redis Nodes (Private)")
+                network_infrastructure = VPC(f"Network Infrastructure\nCustom VPC ({topology.vpc_cidr})\nMulti-AZ Subnets")
+                compute_infrastructure = EC2(f"Compute Infrastructure\nBastion Host (Public)\n{redis_count}x Redis Nodes (Private)")
                 security_infrastructure = Firewall("Security Infrastructure\nSecurity Groups & NACLs\nNetwork Access Control")
                 storage_infrastructure = EBS("Storage Infrastructure\nEBS Volumes\nData Persistence")
-                redis_cluster_service = MongoDB("Redis Cluster Service\n3-Node Cluster\nHigh Availability Setup")
+                redis_cluster_service = MongoDB(f"Redis Cluster Service\n{redis_count}-Node Cluster\nHigh Availability Setup")
             
             # Monitoring & Operations Layer
             with Cluster("Monitoring & Operations"):
@@ -412,25 +422,31 @@ def main():
     print("🎨 Creating Redis Project Architecture Diagrams with Python Diagrams...")
     print("=" * 70)
     
+    # Resize each icon once and share it across all five renders
+    diagram_assets.install()
+    
     try:
+        # Parse terraform/ and terraform-outputs.json once for all five renders
+        topology = infra_model.load()
+        
         print("1. Creating Infrastructure Architecture Diagram...")
-        create_infrastructure_architecture()
+        create_infrastructure_architecture(topology)
         print("   ✅ redis_infrastructure_architecture.png created")
         
         print("2. Creating CI/CD Pipeline Architecture Diagram...")
-        create_cicd_pipeline_architecture()
+        create_cicd_pipeline_architecture(topology)
         print("   ✅ cicd_pipeline_architecture.png created")
         
         print("3. Creating Detailed Pipeline Flow Diagram...")
-        create_detailed_pipeline_flow()
+        create_detailed_pipeline_flow(topology)
         print("   ✅ detailed_pipeline_flow.png created")
         
         print("4. Creating Network Topology Diagram...")
-        create_network_topology()
+        create_network_topology(topology)
         print("   ✅ network_topology.png created")
         
         print("5. Creating Project Overview Diagram...")
-        create_project_overview()
+        create_project_overview(topology)
         print("   ✅ redis_project_overview.png created")
         
         print("\n🎉 All architecture diagrams created successfully!")
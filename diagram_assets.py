@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Shared icon cache for the diagrams-based generators
+Every diagrams node class points graphviz at a 300x300 icon PNG that gets
+decoded and scaled again for every node of every render. install() routes
+the icon lookup through a process-wide cache of copies resized once to the
+rendered node size (kept on disk between runs), and dedupe_svg() rewrites SVG
+output so each distinct icon is embedded once in <defs> and reused with <use>
+
+Usage:
+  import diagram_assets
+  diagram_assets.install()          # before building any Diagram
+  ...
+  diagram_assets.dedupe_svg("redis_infrastructure_diagram.svg")
+"""
+
+import base64
+import hashlib
+import os
+import re
+import struct
+import tempfile
+
+# Node icons are drawn at 1.4in; 96 dpi for PNG output, a little headroom
+ICON_SIZE = int(os.environ.get("DIAGRAM_ICON_SIZE", "144"))
+CACHE_DIR = os.environ.get("DIAGRAM_ICON_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "redis-diagrams", "icons"))
+
+_icons = {}
+_data_uris = {}
+
+IMAGE_TAG = re.compile(r"<image\b([^>]*?)/?>(?:\s*</image>)?")
+ATTRIBUTE = re.compile(r'([\w:-]+)="([^"]*)"')
+
+
+def png_size(path):
+    with open(path, "rb") as f:
+        header = f.read(24)
+    if header[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def cached_icon(source, size=ICON_SIZE):
+    """Path of `source` resized to fit size x size, created at most once per file version"""
+    key = (source, size)
+    if key in _icons:
+        return _icons[key]
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return source
+    dimensions = png_size(source)
+    if dimensions is None or max(dimensions) <= size:
+        _icons[key] = source
+        return source
+
+    digest = hashlib.sha1(("%s:%d:%d:%d" % (source, stat.st_mtime_ns, stat.st_size, size)).encode()).hexdigest()
+    target = os.path.join(CACHE_DIR, "%s-%s.png" % (os.path.splitext(os.path.basename(source))[0], digest[:12]))
+    if not os.path.exists(target):
+        try:
+            from PIL import Image
+        except ImportError:
+            # Pillow is optional: without it graphviz just scales the original
+            _icons[key] = source
+            return source
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with Image.open(source) as image:
+            image.thumbnail((size, size), Image.LANCZOS)
+            fd, partial = tempfile.mkstemp(dir=CACHE_DIR, suffix=".png")
+            with os.fdopen(fd, "wb") as out:
+                image.save(out, format="PNG", optimize=True)
+        os.replace(partial, target)
+    _icons[key] = target
+    return target
+
+
+def install(size=ICON_SIZE):
+    """Route every diagrams node's icon through the cache; safe to call repeatedly"""
+    from diagrams import Node
+
+    if getattr(Node, "_cached_icons", False):
+        return
+    load_icon = Node._load_icon
+
+    def _load_icon(self):
+        return cached_icon(load_icon(self), size)
+
+    Node._load_icon = _load_icon
+    Node._cached_icons = True
+
+
+def data_uri(path):
+    if path not in _data_uris:
+        with open(path, "rb") as f:
+            _data_uris[path] = "data:image/png;base64," + base64.b64encode(f.read()).decode()
+    return _data_uris[path]
+
+
+def dedupe_svg(path, output=None):
+    """Embed each distinct icon of a graphviz SVG once and reference it per node
+
+    graphviz writes one <image xlink:href="/abs/path.png"> per node, which only
+    renders on the machine that produced it. Each distinct icon becomes a
+    <symbol> holding the PNG as a data URI, and every node a <use> of it.
+    Returns (bytes before, bytes after)
+    """
+    with open(path, encoding="utf-8") as f:
+        svg = f.read()
+    symbols = {}
+
+    def replace(match):
+        attrs = dict(ATTRIBUTE.findall(match.group(1)))
+        href = attrs.get("xlink:href") or attrs.get("href")
+        if not href or href.startswith("data:") or not os.path.exists(href):
+            return match.group(0)
+        if href not in symbols:
+            width, height = png_size(href) or (1, 1)
+            symbol = "icon%d" % len(symbols)
+            symbols[href] = (symbol, '<symbol id="%s" viewBox="0 0 %d %d" preserveAspectRatio="%s">'
+                                     '<image width="%d" height="%d" xlink:href="%s"/></symbol>' % (
+                                         symbol, width, height,
+                                         attrs.get("preserveAspectRatio", "xMinYMin meet"),
+                                         width, height, data_uri(href)))
+        symbol = symbols[href][0]
+        return '<use xlink:href="#%s" x="%s" y="%s" width="%s" height="%s"/>' % (
+            symbol, attrs.get("x", "0"), attrs.get("y", "0"), attrs.get("width", "0"), attrs.get("height", "0"))
+
+    body = IMAGE_TAG.sub(replace, svg)
+    if symbols:
+        if 'xmlns:xlink=' not in body:
+            body = body.replace("<svg ", '<svg xmlns:xlink="http://www.w3.org/1999/xlink" ', 1)
+        # Definitions go right after the opening <svg ...> tag
+        opening = body.index(">", body.index("<svg")) + 1
+        body = body[:opening] + "\n<defs>" + "".join(m for _, m in symbols.values()) + "</defs>" + body[opening:]
+
+    with open(output or path, "w", encoding="utf-8") as f:
+        f.write(body)
+    return len(svg.encode()), len(body.encode())
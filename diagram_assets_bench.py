@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Icon cache benchmark for the diagrams-based generators
+Renders the same batch of diagrams (node classes used by the generators,
+repeated) to PNG and SVG without and then with diagram_assets, and compares
+render time and SVG size. Without the cache a portable SVG has to inline the
+icon for every node; with it each icon is embedded once
+
+Example:
+  python3 diagram_assets_bench.py --diagrams 5 --nodes 40
+"""
+
+import argparse
+import os
+import re
+import shutil
+import tempfile
+import time
+
+from diagrams import Cluster, Diagram, Edge
+from diagrams.aws.compute import EC2
+from diagrams.aws.network import InternetGateway, NATGateway
+from diagrams.generic.blank import Blank
+from diagrams.generic.network import Firewall
+from diagrams.onprem.database import MongoDB
+from diagrams.onprem.iac import Ansible, Terraform
+
+import diagram_assets
+
+NODE_CLASSES = (EC2, Firewall, Blank, MongoDB, Terraform, Ansible, NATGateway, InternetGateway)
+
+
+def build(name, nodes):
+    with Diagram(name, filename=name, outformat=["png", "svg"], show=False, direction="LR"):
+        previous = InternetGateway("igw")
+        for group in range(0, nodes, 8):
+            with Cluster("group %d" % group):
+                members = [NODE_CLASSES[i % len(NODE_CLASSES)]("node %d" % i)
+                           for i in range(group, min(group + 8, nodes))]
+            previous >> Edge() >> members
+            previous = members[0]
+
+
+def inline_svg(path):
+    """Size of the SVG with every <image> carrying its own data URI (portable, no sharing)"""
+    with open(path, encoding="utf-8") as f:
+        svg = f.read()
+    hrefs = re.findall(r'xlink:href="([^"#][^"]*\.png)"', svg)
+    return len(svg.encode()) + sum(len(diagram_assets.data_uri(h)) - len(h) for h in hrefs)
+
+
+def run_batch(label, diagrams, nodes, dedupe):
+    workdir = tempfile.mkdtemp(prefix="diagram-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        started = time.perf_counter()
+        for index in range(diagrams):
+            build("bench_%d" % index, nodes)
+        render_s = time.perf_counter() - started
+
+        raw = portable = 0
+        started = time.perf_counter()
+        for index in range(diagrams):
+            path = "bench_%d.svg" % index
+            if dedupe:
+                before, after = diagram_assets.dedupe_svg(path)
+                raw += before
+                portable += after
+            else:
+                raw += os.path.getsize(path)
+                portable += inline_svg(path)
+        post_s = time.perf_counter() - started
+        png = sum(os.path.getsize("bench_%d.png" % i) for i in range(diagrams))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print("   %-22s render %6.2fs  svg post %5.2fs  png %8d B  svg %8d B  portable svg %9d B" % (
+        label, render_s, post_s, png, raw, portable))
+    return render_s + post_s, portable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared diagram icon cache")
+    parser.add_argument("--diagrams", type=int, default=5, help="diagrams per batch")
+    parser.add_argument("--nodes", type=int, default=40, help="nodes per diagram")
+    args = parser.parse_args()
+
+    print("🎨 Diagram Icon Cache Benchmark (%d diagrams x %d nodes)" % (args.diagrams, args.nodes))
+    print("=" * 50)
+    base_time, base_size = run_batch("original icons", args.diagrams, args.nodes, dedupe=False)
+    # A private cache directory so the cold run really starts empty
+    diagram_assets.CACHE_DIR = tempfile.mkdtemp(prefix="diagram-icons-")
+    diagram_assets.install()
+    try:
+        run_batch("cache (cold)", args.diagrams, args.nodes, dedupe=True)
+        warm_time, warm_size = run_batch("cache (warm)", args.diagrams, args.nodes, dedupe=True)
+    finally:
+        shutil.rmtree(diagram_assets.CACHE_DIR, ignore_errors=True)
+    print("\n✅ Batch time %.2fs -> %.2fs (%.0f%%), portable SVG %d -> %d bytes (%.0f%%)" % (
+        base_time, warm_time, (warm_time - base_time) / base_time * 100,
+        base_size, warm_size, (warm_size - base_size) / base_size * 100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Redis Cluster Failover Measurement
+Starts a local cluster with replicas for each cluster-node-timeout value, keeps
+write load running, kills or pauses a master and measures how long its slots
+stay unwritable, how many redirects clients see and how long latency takes to
+settle again
+
+Examples:
+  # Compare the values used by playbook.yml and the ansible role
+  python3 failover_harness.py --rounds 3 --json failover.json
+
+  # Explicit timeouts, SIGSTOP only (a hung rather than a crashed master)
+  python3 failover_harness.py --timeouts 2000,5000,15000 --faults pause
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import signal
+import statistics
+import threading
+import time
+
+from perf_stats import percentile
+from redis_resp import LocalDeployment, RespConnection, RespError, Router, key_slot, parse_info
+
+OK_OUTCOMES = ("ok", "redirect")
+# Where the repo configures cluster-node-timeout
+TIMEOUT_SOURCES = {
+    "playbook.yml": r"cluster-node-timeout (\d+)",
+    os.path.join("ansible", "roles", "redis", "vars", "main.yml"): r"redis_cluster_node_timeout:\s*(\d+)",
+}
+
+
+def repo_timeouts():
+    """{file: timeout ms} for every cluster-node-timeout setting in the repo"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    found = {}
+    for name, pattern in TIMEOUT_SOURCES.items():
+        try:
+            with open(os.path.join(root, name)) as f:
+                match = re.search(pattern, f.read())
+        except OSError:
+            continue
+        if match:
+            found[name] = int(match.group(1))
+    return found
+
+
+class WriteLoad:
+    """Client threads issuing SETs over the whole keyspace
+
+    Every operation is recorded as (start, end, slot, outcome) so a round can be
+    analysed afterwards against the failed master's slots
+    """
+
+    def __init__(self, seeds, clients, keyspace, value_size, op_timeout):
+        self.seeds = seeds
+        self.clients = clients
+        self.keyspace = keyspace
+        self.value = b"x" * value_size
+        self.op_timeout = op_timeout
+        self.events = []
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _client(self, client_id):
+        rng = random.Random(client_id)
+        router = Router(self.seeds, cluster=True, pool_size=1, timeout=self.op_timeout)
+        events = self.events
+        try:
+            while not self._stop.is_set():
+                key = b"failover:%d" % rng.randrange(self.keyspace)
+                redirects = router.redirects
+                started = time.perf_counter()
+                try:
+                    reply = router.execute_many([(b"SET", key, self.value)])[0]
+                    if isinstance(reply, RespError):
+                        outcome = reply.kind.lower()
+                    else:
+                        outcome = "redirect" if router.redirects > redirects else "ok"
+                except (OSError, ConnectionError):
+                    outcome = "connection"
+                events.append((started, time.perf_counter(), key_slot(key), outcome))
+                if outcome == "connection" or outcome == "clusterdown":
+                    # Pick up a promoted replica; the seed list may point at the dead master
+                    try:
+                        router.refresh()
+                    except ConnectionError:
+                        time.sleep(0.05)
+        finally:
+            router.close()
+
+    def start(self):
+        self._stop.clear()
+        self.events = []
+        self._threads = [threading.Thread(target=self._client, args=(i,), daemon=True)
+                         for i in range(self.clients)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        return self.events
+
+
+def slot_owners(port):
+    """{master port: set of slots} as seen by the node on `port`"""
+    conn = RespConnection("127.0.0.1", port, timeout=1.0)
+    try:
+        ranges = conn.execute("CLUSTER", "SLOTS")
+    finally:
+        conn.close()
+    owners = {}
+    for start, end, master, *_ in ranges:
+        owners.setdefault(master[1], set()).update(range(start, end + 1))
+    return owners
+
+
+def wait_for_promotion(observer, victim, first_slot, deadline):
+    """perf_counter() time at which `observer` stops routing first_slot to victim"""
+    while time.perf_counter() < deadline:
+        try:
+            owners = slot_owners(observer)
+        except (OSError, RespError):
+            owners = {}
+        owner = next((port for port, slots in owners.items() if first_slot in slots), victim)
+        if owner != victim:
+            return time.perf_counter()
+        time.sleep(0.02)
+    return None
+
+
+def wait_for_replica_sync(port, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = RespConnection("127.0.0.1", port, timeout=1.0)
+            try:
+                info = parse_info(conn.execute("INFO", "replication"))
+            finally:
+                conn.close()
+            if info.get("role") == "slave" and info.get("master_link_status") == "up":
+                return True
+        except (OSError, RespError):
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def analyse(events, fault_at, victim_slots, promoted_at, bucket=0.25):
+    """Unavailability window, redirect storm and latency recovery for one round"""
+    before = sorted((end - start) * 1000.0 for start, end, _, outcome in events
+                    if end < fault_at and outcome in OK_OUTCOMES)
+    after = [e for e in events if e[0] >= fault_at]
+    victim = [e for e in after if e[2] in victim_slots]
+    failures = [e for e in victim if e[3] not in OK_OUTCOMES]
+
+    if failures:
+        last_failure = max(e[1] for e in failures)
+        recovered = [e[1] for e in victim if e[3] in OK_OUTCOMES and e[0] >= last_failure]
+        recovered_at = min(recovered) if recovered else None
+    else:
+        recovered_at = fault_at
+    unavailable = None if recovered_at is None else recovered_at - fault_at
+
+    # Latency has settled once a whole bucket's p99 is back near the baseline
+    baseline_p99 = percentile(before, 0.99)
+    threshold = max(2 * baseline_p99, baseline_p99 + 1.0)
+    settled = None
+    if recovered_at is not None:
+        buckets = {}
+        for start, end, _, outcome in after:
+            if start >= recovered_at and outcome in OK_OUTCOMES:
+                buckets.setdefault(int((start - recovered_at) / bucket), []).append((end - start) * 1000.0)
+        for index in sorted(buckets):
+            if percentile(sorted(buckets[index]), 0.99) <= threshold:
+                settled = recovered_at + (index + 1) * bucket - fault_at
+                break
+
+    outcomes = {}
+    for e in after:
+        if e[3] != "ok":
+            outcomes[e[3]] = outcomes.get(e[3], 0) + 1
+    return {
+        "write_unavailable_s": None if unavailable is None else round(unavailable, 3),
+        "promotion_s": None if promoted_at is None else round(promoted_at - fault_at, 3),
+        "latency_settled_s": None if settled is None else round(settled, 3),
+        "failed_writes": len(failures),
+        "collateral_failures": sum(1 for e in after if e[2] not in victim_slots and e[3] not in OK_OUTCOMES),
+        "redirects": outcomes.get("redirect", 0) + outcomes.get("moved", 0) + outcomes.get("ask", 0),
+        "outcomes": outcomes,
+        "baseline_p99_ms": round(baseline_p99, 3),
+    }
+
+
+def run_round(deployment, load, fault, round_index, args):
+    masters = slot_owners(next(p for p in deployment.master_ports if deployment.alive(p)))
+    victim = sorted(masters)[round_index % len(masters)]
+    observer = next(port for port in sorted(masters) if port != victim)
+    victim_slots = masters[victim]
+    process = deployment.processes[victim]
+
+    load.start()
+    time.sleep(args.baseline)
+    fault_at = time.perf_counter()
+    if fault == "kill":
+        process.kill()
+        process.wait()
+    else:
+        process.send_signal(signal.SIGSTOP)
+
+    deadline = fault_at + deployment.node_timeout * 4 / 1000.0 + 30
+    promoted_at = wait_for_promotion(observer, victim, min(victim_slots), deadline)
+    time.sleep(args.settle)
+    events = load.stop()
+
+    # Bring the old master back; it rejoins as a replica of its successor
+    if fault == "kill":
+        deployment.start_node(victim)
+    else:
+        process.send_signal(signal.SIGCONT)
+    deployment.wait_for_cluster_ok()
+    wait_for_replica_sync(victim)
+
+    result = analyse(events, fault_at, victim_slots, promoted_at)
+    result.update({"fault": fault, "victim_port": victim, "operations": len(events)})
+    return result
+
+
+def summarise(rounds):
+    summary = {}
+    for metric in ("write_unavailable_s", "promotion_s", "latency_settled_s",
+                   "failed_writes", "collateral_failures", "redirects"):
+        values = [r[metric] for r in rounds if r[metric] is not None]
+        summary[metric] = {
+            "median": round(statistics.median(values), 3) if values else None,
+            "max": max(values) if values else None,
+            "missing": len(rounds) - len(values),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Redis Cluster failover per cluster-node-timeout")
+    parser.add_argument("--timeouts", help="comma-separated cluster-node-timeout values in ms "
+                                           "(default: the values configured in this repo)")
+    parser.add_argument("--faults", default="kill,pause",
+                        help="comma-separated faults: kill (SIGKILL) and/or pause (SIGSTOP)")
+    parser.add_argument("--rounds", type=int, default=3, help="failovers per timeout and fault")
+    parser.add_argument("--masters", type=int, default=3)
+    parser.add_argument("--replicas", type=int, default=1, help="replicas per master")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent writer threads")
+    parser.add_argument("--keyspace", type=int, default=100000)
+    parser.add_argument("--value-size", type=int, default=64)
+    parser.add_argument("--op-timeout", type=float, default=0.5, help="client socket timeout in seconds")
+    parser.add_argument("--baseline", type=float, default=3.0, help="seconds of load before each fault")
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds of load kept after promotion")
+    parser.add_argument("--base-port", type=int, default=7300)
+    parser.add_argument("--redis-server", default="redis-server")
+    parser.add_argument("--json", metavar="PATH", help="write all rounds and summaries as JSON")
+    args = parser.parse_args()
+
+    print("📊 Redis Cluster Failover Measurement")
+    print("=" * 50)
+    configured = repo_timeouts()
+    for name, value in sorted(configured.items()):
+        print("ℹ️  %s: cluster-node-timeout %d ms" % (name, value))
+    if args.timeouts:
+        timeouts = [int(t) for t in args.timeouts.split(",")]
+    else:
+        timeouts = sorted(set(configured.values())) or [5000, 15000]
+    faults = args.faults.split(",")
+    if args.replicas < 1:
+        parser.error("--replicas must be at least 1 for a failover to happen")
+
+    results = []
+    for timeout in timeouts:
+        deployment = LocalDeployment(masters=args.masters, replicas=args.replicas, cluster=True,
+                                     base_port=args.base_port, node_timeout=timeout,
+                                     redis_server=args.redis_server)
+        with deployment:
+            load = WriteLoad(deployment.seeds, args.clients, args.keyspace, args.value_size, args.op_timeout)
+            for fault in faults:
+                rounds = []
+                print("🚀 cluster-node-timeout %d ms, %s x%d" % (timeout, fault, args.rounds))
+                for index in range(args.rounds):
+                    result = run_round(deployment, load, fault, index, args)
+                    rounds.append(result)
+                    print("   • port %d: writes down %ss, promoted %ss, latency settled %ss, "
+                          "%d failed, %d redirects" % (
+                              result["victim_port"], result["write_unavailable_s"], result["promotion_s"],
+                              result["latency_settled_s"], result["failed_writes"], result["redirects"]))
+                results.append({"node_timeout_ms": timeout, "fault": fault,
+                                "rounds": rounds, "summary": summarise(rounds)})
+
+    print("\n%-10s %-6s %14s %12s %12s %10s %10s" % (
+        "timeout", "fault", "unavailable s", "promoted s", "settled s", "failed", "redirects"))
+    for entry in results:
+        s = entry["summary"]
+        print("%-10d %-6s %14s %12s %12s %10s %10s" % (
+            entry["node_timeout_ms"], entry["fault"], s["write_unavailable_s"]["median"],
+            s["promotion_s"]["median"], s["latency_settled_s"]["median"],
+            s["failed_writes"]["median"], s["redirects"]["median"]))
+    print("(medians over %d rounds)" % args.rounds)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"configured": configured, "results": results}, f, indent=2)
+        print("💾 Results written to %s" % args.json)
+
+
+if __name__ == "__main__":
+    main()
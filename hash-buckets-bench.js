@@ -0,0 +1,140 @@
+// Storage layout benchmark: bytes per key and set/get/mget throughput of the
+// "string" and "hash" layouts from hash-buckets.js, against a real Redis
+// (REDIS_URL, or REDIS_HOST/REDIS_PORT). Only keys under the bench prefix are
+// written and removed again; run it on an otherwise idle instance so the
+// used_memory deltas are not skewed by other traffic.
+//
+//   node hash-buckets-bench.js [--keys 200000] [--per-bucket 100] [--value-size 40] [--window 256] [--json]
+const { performance } = require('perf_hooks');
+const redis = require('redis');
+const { STORAGE_MODES, createStore } = require('./hash-buckets');
+const { createCodec } = require('./value-codec');
+
+const args = process.argv.slice(2);
+const option = (name, fallback) => {
+  const index = args.indexOf(`--${name}`);
+  return index === -1 ? fallback : args[index + 1];
+};
+const KEYS = parseInt(option('keys', '200000'), 10);
+const PER_BUCKET = parseInt(option('per-bucket', '100'), 10);
+const VALUE_SIZE = parseInt(option('value-size', '40'), 10);
+const WINDOW = parseInt(option('window', '256'), 10);
+const MGET_SIZE = 100;
+const AS_JSON = args.includes('--json');
+
+const PREFIX = 'bench:hb:';
+const BUCKETS = Math.max(1, Math.ceil(KEYS / PER_BUCKET));
+const codec = createCodec('json');
+const keyOf = (i) => `${PREFIX}k:${i}`;
+const valueOf = (i) => codec.encode({ id: i, tag: 'x'.repeat(Math.max(0, VALUE_SIZE - 20 - String(i).length)) });
+
+const client = process.env.REDIS_URL
+  ? redis.createClient({ url: process.env.REDIS_URL })
+  : redis.createClient({
+    socket: { host: process.env.REDIS_HOST || 'localhost', port: parseInt(process.env.REDIS_PORT || '6379', 10) }
+  });
+
+const usedMemory = async () => Number(/used_memory:(\d+)/.exec(await client.info('memory'))[1]);
+
+const cleanup = async () => {
+  let cursor = 0;
+  do {
+    const reply = await client.scan(cursor, { MATCH: `${PREFIX}*`, COUNT: 1000 });
+    cursor = Number(reply.cursor);
+    if (reply.keys.length > 0) {
+      await client.del(reply.keys);
+    }
+  } while (cursor !== 0);
+};
+
+// Operations per second for `count` calls of fn(i), WINDOW of them in flight
+const rate = async (count, fn) => {
+  const start = performance.now();
+  for (let i = 0; i < count; i += WINDOW) {
+    const batch = [];
+    for (let j = i; j < Math.min(count, i + WINDOW); j++) {
+      batch.push(fn(j));
+    }
+    await Promise.all(batch);
+  }
+  return count / ((performance.now() - start) / 1000);
+};
+
+const measure = async (mode) => {
+  await cleanup();
+  const store = createStore(client, { mode, buckets: BUCKETS, prefix: `${PREFIX}b:` });
+  const memoryBefore = await usedMemory();
+  const keysBefore = await client.dbSize();
+
+  const setRate = await rate(KEYS, (i) => store.set(keyOf(i), valueOf(i)));
+  const memoryAfter = await usedMemory();
+  const redisKeys = (await client.dbSize()) - keysBefore;
+
+  const getRate = await rate(KEYS, async (i) => {
+    const value = codec.decode(await store.get(keyOf(i)));
+    if (value.id !== i) {
+      throw new Error(`${mode}: ${keyOf(i)} read back ${JSON.stringify(value)}`);
+    }
+  });
+  const chunks = Math.ceil(KEYS / MGET_SIZE);
+  const mgetRate = (await rate(chunks, (c) => {
+    const keys = [];
+    for (let i = c * MGET_SIZE; i < Math.min(KEYS, (c + 1) * MGET_SIZE); i++) {
+      keys.push(keyOf(i));
+    }
+    return store.mGet(keys);
+  })) * MGET_SIZE;
+
+  const sample = mode === 'hash' ? store.bucketOf(keyOf(0)) : keyOf(0);
+  return {
+    layout: mode,
+    bytesPerKey: (memoryAfter - memoryBefore) / KEYS,
+    setOpsPerSec: setRate,
+    getOpsPerSec: getRate,
+    mgetKeysPerSec: mgetRate,
+    redisKeys,
+    encoding: String(await client.sendCommand(['OBJECT', 'ENCODING', sample]))
+  };
+};
+
+const main = async () => {
+  await client.connect();
+  const averageValue = Buffer.byteLength(valueOf(Math.floor(KEYS / 2)));
+  const results = [];
+  try {
+    for (const mode of STORAGE_MODES) {
+      results.push(await measure(mode));
+    }
+  } finally {
+    await cleanup();
+    await client.quit();
+  }
+
+  if (AS_JSON) {
+    console.log(JSON.stringify({ keys: KEYS, buckets: BUCKETS, valueBytes: averageValue, results }, null, 2));
+    return;
+  }
+  console.log(`📦 Storage Layout Benchmark (${KEYS} keys, ~${averageValue}-byte values, ${BUCKETS} buckets)`);
+  console.log('='.repeat(50));
+  console.log(`${'layout'.padEnd(8)} ${'bytes/key'.padStart(10)} ${'set ops/s'.padStart(11)} ${'get ops/s'.padStart(11)} ` +
+    `${'mget keys/s'.padStart(12)} ${'redis keys'.padStart(11)}  encoding`);
+  for (const r of results) {
+    console.log(`${r.layout.padEnd(8)} ${r.bytesPerKey.toFixed(1).padStart(10)} ${Math.round(r.setOpsPerSec).toString().padStart(11)} ` +
+      `${Math.round(r.getOpsPerSec).toString().padStart(11)} ${Math.round(r.mgetKeysPerSec).toString().padStart(12)} ` +
+      `${String(r.redisKeys).padStart(11)}  ${r.encoding}`);
+  }
+
+  const [base, hashed] = results;
+  const change = (after, before) => `${after >= before ? '+' : ''}${((after - before) / before * 100).toFixed(0)}%`;
+  console.log(`\n✅ hash layout: ${change(hashed.bytesPerKey, base.bytesPerKey)} bytes per key, ` +
+    `set ${change(hashed.setOpsPerSec, base.setOpsPerSec)}, get ${change(hashed.getOpsPerSec, base.getOpsPerSec)}, ` +
+    `mget ${change(hashed.mgetKeysPerSec, base.mgetKeysPerSec)}`);
+  if (!/listpack|ziplist/.test(hashed.encoding)) {
+    console.log(`⚠️  Buckets are ${hashed.encoding}: lower --per-bucket or raise hash-max-listpack-entries`);
+  }
+};
+
+main().catch((error) => {
+  console.error(`❌ ${error.message}`);
+  process.exit(1);
+});
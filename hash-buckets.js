@@ -0,0 +1,415 @@
+const crypto = require('crypto');
+const redis = require('redis');
+
+// Storage layouts for app.js values
+//
+// "string" (default) keeps every value in its own top-level key. "hash" puts
+// small entries into hash buckets instead: key k becomes field k of bucket
+// `${prefix}${fnv1a(k) % buckets}`. Redis stores a small hash as a single
+// listpack, so a bucket of ~100 entries costs a fraction of ~100 keys, each
+// with its own dict entry, object header, key SDS and expiry bookkeeping.
+//
+// A field or value longer than hash-max-listpack-value (64 bytes by default)
+// would convert its whole bucket to a real hashtable and lose the saving, so
+// such entries stay string keys. Reads therefore look in both places and
+// writes remove the copy in the other one: switching modes, or a value
+// growing past the limit, never leaves a stale value behind. Each write does
+// both in one script, so concurrent writers cannot interleave them. In a
+// cluster that needs the bucket in the same slot as the key: buckets there are
+// per slot (`${prefix}{tag}`, tag hashing to the slot), at least 16384 of them.
+//
+// The same conversion happens once a bucket holds more than
+// hash-max-listpack-entries (128 by default) fields, so writes report bucket
+// sizes and the store warns when the bucket count is too small for the keyspace.
+const STORAGE_MODES = ['string', 'hash'];
+
+// Entries per bucket when the count is derived from the expected keys: headroom
+// below hash-max-listpack-entries for buckets filling unevenly
+const ENTRIES_PER_BUCKET = 100;
+const CLUSTER_SLOTS = 16384;
+
+// Reads return raw Buffers for the value codec
+const returnBuffers = redis.commandOptions({ returnBuffers: true });
+
+// 32-bit FNV-1a: cheap and spreads similar keys ("user:1", "user:2") evenly
+const fnv1a = (key) => {
+  let hash = 0x811c9dc5;
+  for (const byte of Buffer.from(key)) {
+    hash ^= byte;
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return hash >>> 0;
+};
+
+// SCAN-style glob (*, ?, [...], \x) as a predicate, for filtering bucket fields
+const globMatcher = (pattern) => {
+  if (pattern === '*') {
+    return () => true;
+  }
+  const escape = (char) => char.replace(/[.*+?^${}()|[\]\\/]/g, '\\$&');
+  let source = '';
+  for (let i = 0; i < pattern.length; i++) {
+    const char = pattern[i];
+    if (char === '*') {
+      source += '.*';
+    } else if (char === '?') {
+      source += '.';
+    } else if (char === '\\' && i + 1 < pattern.length) {
+      source += escape(pattern[++i]);
+    } else if (char === '[' && pattern.indexOf(']', i + 2) !== -1) {
+      const close = pattern.indexOf(']', i + 2);
+      const body = pattern.slice(i + 1, close);
+      source += `[${body[0] === '^' ? '^' : ''}${body.slice(body[0] === '^' ? 1 : 0).replace(/\\/g, '\\\\')}]`;
+      i = close;
+    } else {
+      source += escape(char);
+    }
+  }
+  const regex = new RegExp(`^${source}$`, 's');
+  return (key) => regex.test(key);
+};
+
+// One HGET per (bucket, field) pair, all in a single command. Standalone only:
+// a cluster cannot run a script over keys from different slots
+const HGET_MANY = `local values = {}
+for i, bucket in ipairs(KEYS) do
+  values[i] = redis.call('HGET', bucket, ARGV[i])
+end
+return values`;
+
+// Bucket and string key writes, one pair per entry: KEYS bucket, key; ARGV
+// value, then "h" (into the bucket), "s" (string key, bucket copy removed) or
+// "k" (string key only, the key is too long for a bucket). Returns the size of
+// the largest bucket written to
+const STORE_MANY = `local largest = 0
+for i = 1, #KEYS, 2 do
+  local bucket, key = KEYS[i], KEYS[i + 1]
+  if ARGV[i + 1] == 'h' then
+    redis.call('HSET', bucket, key, ARGV[i])
+    redis.call('DEL', key)
+    largest = math.max(largest, redis.call('HLEN', bucket))
+  else
+    redis.call('SET', key, ARGV[i])
+    if ARGV[i + 1] == 's' then
+      redis.call('HDEL', bucket, key)
+    end
+  end
+end
+return largest`;
+
+const DEL_ENTRY = `return redis.call('HDEL', KEYS[1], KEYS[2]) + redis.call('DEL', KEYS[2])`;
+
+// Without field TTLs an entry given a TTL moves to a string key that can expire
+const EXPIRE_ENTRY = `local raw = redis.call('HGET', KEYS[1], KEYS[2])
+if not raw then
+  return redis.call('EXPIRE', KEYS[2], ARGV[1])
+end
+if tonumber(ARGV[1]) > 0 then
+  redis.call('SET', KEYS[2], raw, 'EX', ARGV[1])
+end
+redis.call('HDEL', KEYS[1], KEYS[2])
+return 1`;
+
+// Counters already stored as string keys keep incrementing there
+const INCRBY_ENTRY = `if redis.call('EXISTS', KEYS[2]) == 1 then
+  return redis.call('INCRBY', KEYS[2], ARGV[1])
+end
+return redis.call('HINCRBY', KEYS[1], KEYS[2], ARGV[1])`;
+
+const script = (source) => ({ source, sha: crypto.createHash('sha1').update(source).digest('hex') });
+const SCRIPTS = {
+  hGetMany: script(HGET_MANY),
+  storeMany: script(STORE_MANY),
+  delEntry: script(DEL_ENTRY),
+  expireEntry: script(EXPIRE_ENTRY),
+  incrByEntry: script(INCRBY_ENTRY)
+};
+
+const group = (map, name, item) => {
+  const items = map.get(name);
+  if (items) {
+    items.push(item);
+  } else {
+    map.set(name, [item]);
+  }
+};
+
+// The "string" layout: exactly the commands app.js always issued
+const createStringStore = (client) => ({
+  mode: 'string',
+  get: (key) => client.get(returnBuffers, key),
+  set: (key, raw) => client.set(key, raw),
+  mGet: (keys) => client.mGet(returnBuffers, keys),
+  mSet: (pairs) => client.mSet(pairs),
+  del: (key) => client.del(key),
+  exists: (key) => client.exists(key),
+  expire: (key, seconds) => client.expire(key, seconds),
+  ttl: (key) => client.ttl(key),
+  incrBy: (key, by) => client.incrBy(key, by),
+  // Bucketed entries of one node, in [key, raw] batches (none in this layout)
+  async *bucketEntries() {},
+  stats: () => ({ mode: 'string' })
+});
+
+// Slot -> a short hash tag in that slot, found once by trying base-36 counters
+let slotTags = null;
+const slotTag = (keySlot, slot) => {
+  if (!slotTags) {
+    slotTags = new Array(CLUSTER_SLOTS);
+    for (let i = 0, found = 0; found < CLUSTER_SLOTS; i++) {
+      const tag = i.toString(36);
+      const tagSlot = keySlot(tag);
+      if (slotTags[tagSlot] === undefined) {
+        slotTags[tagSlot] = tag;
+        found++;
+      }
+    }
+  }
+  return slotTags[slot];
+};
+
+// The "hash" layout. In cluster mode mGet/mSet expect keys of one slot, like
+// MGET/MSET, since entries that stay string keys are batched the same way
+const createHashStore = (client, { clusterMode, keySlot, buckets, prefix, maxValueBytes, maxEntries }) => {
+  const perSlot = Math.ceil(buckets / CLUSTER_SLOTS);
+  const bucketOf = clusterMode
+    ? (key) => `${prefix}{${slotTag(keySlot, keySlot(key))}}${perSlot > 1 ? `:${fnv1a(key) % perSlot}` : ''}`
+    : (key) => `${prefix}${fnv1a(key) % buckets}`;
+  const fits = (key) => Buffer.byteLength(key) <= maxValueBytes;
+  const small = (key, raw) => fits(key) && Buffer.byteLength(raw) <= maxValueBytes;
+  const send = (key, isReadonly, args) =>
+    clusterMode ? client.sendCommand(key, isReadonly, args) : client.sendCommand(args);
+
+  const run = async ({ source, sha }, keys, args, options = null) => {
+    const params = options ? [options] : [];
+    try {
+      return await client.evalSha(...params, sha, { keys, arguments: args });
+    } catch (error) {
+      if (!/NOSCRIPT/.test(error.message)) {
+        throw error;
+      }
+      return client.eval(...params, source, { keys, arguments: args });
+    }
+  };
+
+  // A bucket past hash-max-listpack-entries is a hashtable: warn once, count all
+  let oversizedWrites = 0;
+  const checkSize = (entries) => {
+    if (entries <= maxEntries) {
+      return;
+    }
+    if (oversizedWrites++ === 0) {
+      console.warn(`⚠️  A hash bucket holds ${entries} entries, above hash-max-listpack-entries (${maxEntries}), ` +
+        'and is no longer a listpack: raise HASH_BUCKETS or set HASH_EXPECTED_KEYS');
+    }
+  };
+
+  const store = async (pairs) => {
+    const keys = [];
+    const args = [];
+    for (const [key, raw] of pairs) {
+      keys.push(fits(key) ? bucketOf(key) : key, key);
+      args.push(raw, small(key, raw) ? 'h' : fits(key) ? 's' : 'k');
+    }
+    checkSize(Number(await run(SCRIPTS.storeMany, keys, args)));
+    return 'OK';
+  };
+
+  // Per-field TTLs need HEXPIRE/HTTL (Redis 7.4+); null until the server tells us
+  let fieldTtl = null;
+  const fieldCommand = async (args) => {
+    if (fieldTtl === false) {
+      return null;
+    }
+    try {
+      const reply = await send(args[1], args[0] === 'HTTL', args);
+      fieldTtl = true;
+      return Number(reply[0]);
+    } catch (error) {
+      if (/unknown command/i.test(error.message)) {
+        fieldTtl = false;
+        return null;
+      }
+      throw error;
+    }
+  };
+
+  return {
+    mode: 'hash',
+    bucketOf,
+
+    // Bucketed values cost one HGET; the string key is only read on a miss
+    get: async (key) => {
+      if (fits(key)) {
+        const field = await client.hGet(returnBuffers, bucketOf(key), key);
+        if (field !== null) {
+          return field;
+        }
+      }
+      return client.get(returnBuffers, key);
+    },
+
+    // Replies 'OK' like SET/MSET
+    set: (key, raw) => store([[key, raw]]),
+
+    // Bucketed values first (one script call, or one HMGET per bucket in a
+    // cluster), then a single MGET for whatever was not in a bucket
+    mGet: async (keys) => {
+      const values = new Array(keys.length).fill(null);
+      const indexes = [];
+      keys.forEach((key, i) => {
+        if (fits(key)) {
+          indexes.push(i);
+        }
+      });
+      if (indexes.length > 0 && !clusterMode) {
+        const fields = await run(SCRIPTS.hGetMany, indexes.map((i) => bucketOf(keys[i])),
+          indexes.map((i) => keys[i]), returnBuffers);
+        indexes.forEach((index, j) => {
+          values[index] = fields[j] ?? null;
+        });
+      } else if (indexes.length > 0) {
+        const byBucket = new Map();
+        indexes.forEach((i) => group(byBucket, bucketOf(keys[i]), i));
+        await Promise.all([...byBucket].map(async ([bucket, members]) => {
+          const fields = await client.hmGet(returnBuffers, bucket, members.map((i) => keys[i]));
+          members.forEach((index, j) => {
+            values[index] = fields[j] ?? null;
+          });
+        }));
+      }
+
+      const missing = [];
+      values.forEach((value, i) => {
+        if (value === null) {
+          missing.push(i);
+        }
+      });
+      if (missing.length > 0) {
+        const rest = await client.mGet(returnBuffers, missing.map((i) => keys[i]));
+        missing.forEach((index, j) => {
+          values[index] = rest[j];
+        });
+      }
+      return values;
+    },
+
+    // All entries in one script, atomic like MSET
+    mSet: (pairs) => store(pairs),
+
+    del: async (key) => {
+      if (!fits(key)) {
+        return client.del(key);
+      }
+      return Number(await run(SCRIPTS.delEntry, [bucketOf(key), key], []));
+    },
+
+    exists: async (key) => {
+      if (!fits(key)) {
+        return client.exists(key);
+      }
+      const [field, count] = await Promise.all([client.hExists(bucketOf(key), key), client.exists(key)]);
+      return field ? 1 : count;
+    },
+
+    expire: async (key, seconds) => {
+      if (!fits(key)) {
+        return client.expire(key, seconds);
+      }
+      const bucket = bucketOf(key);
+      const result = await fieldCommand(['HEXPIRE', bucket, String(seconds), 'FIELDS', '1', key]);
+      if (result === -2) {
+        return client.expire(key, seconds);
+      }
+      if (result !== null) {
+        return result > 0;
+      }
+      return Number(await run(SCRIPTS.expireEntry, [bucket, key], [String(seconds)])) === 1;
+    },
+
+    ttl: async (key) => {
+      if (!fits(key)) {
+        return client.ttl(key);
+      }
+      const bucket = bucketOf(key);
+      const result = await fieldCommand(['HTTL', bucket, 'FIELDS', '1', key]);
+      if (result !== null && result !== -2) {
+        return result;
+      }
+      if (result === null && await client.hExists(bucket, key)) {
+        return -1;
+      }
+      return client.ttl(key);
+    },
+
+    incrBy: async (key, by) => {
+      if (!fits(key)) {
+        return client.incrBy(key, by);
+      }
+      return Number(await run(SCRIPTS.incrByEntry, [bucketOf(key), key], [String(by)]));
+    },
+
+    // Walk the buckets of one node with SCAN, yielding [key, raw] batches
+    // whose keys match the SCAN-style pattern
+    async *bucketEntries(node, { match = '*', count = 1000 } = {}) {
+      const matches = globMatcher(match);
+      let cursor = 0;
+      do {
+        const reply = await node.scan(cursor, { MATCH: `${prefix}*`, COUNT: count, TYPE: 'hash' });
+        cursor = Number(reply.cursor);
+        const contents = await Promise.all(reply.keys.map((bucket) => node.hGetAll(returnBuffers, bucket)));
+        const batch = [];
+        for (const fields of contents) {
+          for (const [key, raw] of Object.entries(fields)) {
+            if (matches(key)) {
+              batch.push([key, raw]);
+            }
+          }
+        }
+        if (batch.length > 0) {
+          yield batch;
+        }
+      } while (cursor !== 0);
+    },
+
+    stats: () => ({
+      mode: 'hash',
+      buckets: clusterMode ? CLUSTER_SLOTS * perSlot : buckets,
+      maxEntries,
+      oversizedWrites
+    })
+  };
+};
+
+// Build the store for one of STORAGE_MODES. `buckets` defaults to about 100
+// entries each at `expectedKeys`: well under the default
+// hash-max-listpack-entries (128) so buckets stay listpacks, yet large enough
+// to amortise each bucket's own key overhead. Cluster mode needs `keySlot`
+const createStore = (client, {
+  mode = 'string',
+  clusterMode = false,
+  keySlot = null,
+  buckets = null,
+  expectedKeys = 0,
+  prefix = 'kvb:',
+  maxValueBytes = 64,
+  maxEntries = 128
+} = {}) => {
+  if (!STORAGE_MODES.includes(mode)) {
+    throw new Error(`Unknown storage mode "${mode}" (expected one of: ${STORAGE_MODES.join(', ')})`);
+  }
+  if (mode === 'string') {
+    return createStringStore(client);
+  }
+  if (prefix.includes('{')) {
+    // A hash tag would pin every bucket to the same cluster slot
+    throw new Error(`Bucket prefix "${prefix}" must not contain a {hash tag}`);
+  }
+  if (clusterMode && !keySlot) {
+    throw new Error('Hash storage in cluster mode needs keySlot');
+  }
+  const count = buckets || (expectedKeys > 0 ? Math.ceil(expectedKeys / ENTRIES_PER_BUCKET) : 16384);
+  return createHashStore(client, { clusterMode, keySlot, buckets: count, prefix, maxValueBytes, maxEntries });
+};
+
+module.exports = { STORAGE_MODES, createStore, fnv1a, globMatcher };
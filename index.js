@@ -1,17 +1,11 @@
 const express = require("express");
-const redis = require("redis");
+const { client, connectRedis } = require("./redis-client");
 
 const app = express();
 const port = process.env.PORT || 3000; // ✅ important for Render
 
-const client = redis.createClient({
-  url: `redis://${process.env.REDIS_HOST || "localhost"}:${process.env.REDIS_PORT || 6379}`,
-});
-
-client.on("error", (err) => console.error("Redis Client Error", err));
-
 (async () => {
-  await client.connect();
+  await connectRedis();
   await client.set("demo_key", "Redis working!");
 })();
 
@@ -23,4 +17,3 @@ app.get("/", async (req, res) => {
 app.listen(port, () => {
   console.log(`🚀 Server running on port ${port}`);
 });
-
@@ -0,0 +1,669 @@
+#!/usr/bin/env python3
+"""
+Infrastructure Model
+Parses the Terraform modules under terraform/ and terraform-outputs.json into
+one immutable topology (VPC, subnets, security group rules, instances) that
+every diagram generator renders from, instead of each script keeping its own
+hand-written copy. The parsed model is cached on disk, keyed by the mtime and
+size of the input files
+
+Usage:
+  import infra_model
+  topology = infra_model.load()
+  for node in topology.redis_nodes:
+      print(node.name, node.private_ip, topology.subnet(node.subnet).cidr)
+
+  python3 infra_model.py            # print the model
+  python3 infra_model.py --json     # dump it as JSON
+"""
+
+import argparse
+import glob
+import hashlib
+import ipaddress
+import json
+import os
+import pickle
+import re
+import tempfile
+
+MODEL_VERSION = 4
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("INFRA_MODEL_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "redis-diagrams"))
+PORT_NAMES = {22: "SSH", 80: "HTTP", 443: "HTTPS", 6379: "Redis", 16379: "Cluster"}
+
+_loaded = {}
+
+
+class HclError(Exception):
+    pass
+
+
+class TopologyError(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# HCL subset: blocks, attributes, strings, numbers, lists, maps, references
+# ---------------------------------------------------------------------------
+
+TOKEN = re.compile(r"""
+    (?P<space>\s+|\#[^\n]*|//[^\n]*|/\*.*?\*/)
+  | (?P<heredoc><<-?(?P<tag>\w+)\n(?P<body>.*?)\n\s*(?P=tag)\b)
+  | (?P<number>-?\d+(?:\.\d+)?)(?![\w.-])
+  | (?P<ident>[A-Za-z_][\w\-.*]*(?:\[\d+\][\w\-.]*)*)
+  | (?P<punct>[{}\[\]=,:()])
+""", re.VERBOSE | re.DOTALL)
+
+
+class Reference:
+    """An unevaluated traversal such as var.vpc_cidr or aws_vpc.redis-VPC.id"""
+
+    __slots__ = ("path",)
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return "Reference(%s)" % self.path
+
+
+def _read_string(text, pos):
+    """Quoted string starting at text[pos] == '"'; ${...} kept verbatim"""
+    out = []
+    i = pos + 1
+    depth = 0
+    while i < len(text):
+        char = text[i]
+        if depth == 0 and char == "\\":
+            out.append({"n": "\n", "t": "\t", '"': '"', "\\": "\\"}.get(text[i + 1], text[i + 1]))
+            i += 2
+            continue
+        if text.startswith("${", i):
+            depth += 1
+            out.append("${")
+            i += 2
+            continue
+        if depth and char == "}":
+            depth -= 1
+        elif depth == 0 and char == '"':
+            return "".join(out), i + 1
+        out.append(char)
+        i += 1
+    raise HclError("Unterminated string at offset %d" % pos)
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        if text[pos] == '"':
+            value, pos = _read_string(text, pos)
+            tokens.append(("string", value))
+            continue
+        match = TOKEN.match(text, pos)
+        if not match:
+            raise HclError("Unexpected %r at offset %d" % (text[pos:pos + 20], pos))
+        pos = match.end()
+        kind = match.lastgroup if match.lastgroup != "tag" else "heredoc"
+        if match.group("space"):
+            continue
+        if match.group("heredoc"):
+            tokens.append(("string", match.group("body")))
+        elif match.group("number"):
+            number = match.group("number")
+            tokens.append(("number", float(number) if "." in number else int(number)))
+        elif match.group("ident"):
+            tokens.append(("ident", match.group("ident")))
+        else:
+            tokens.append((kind, match.group("punct")))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if value is not None and token[1] != value:
+            raise HclError("Expected %r, got %r" % (value, token[1]))
+        self.pos += 1
+        return token
+
+    def body(self, closing=None):
+        """{"attrs": {name: value}, "blocks": [(type, labels, body)]}"""
+        attrs, blocks = {}, []
+        while True:
+            kind, value = self.peek()
+            if kind is None:
+                if closing:
+                    raise HclError("Missing closing brace")
+                return {"attrs": attrs, "blocks": blocks}
+            if value == closing and kind == "punct":
+                self.take()
+                return {"attrs": attrs, "blocks": blocks}
+            name = self.take()[1]
+            if self.peek()[1] == "=":
+                self.take()
+                attrs[name] = self.expression()
+                continue
+            labels = []
+            while self.peek()[1] != "{":
+                labels.append(self.take()[1])
+            self.take("{")
+            blocks.append((name, tuple(labels), self.body("}")))
+
+    def expression(self):
+        kind, value = self.take()
+        if kind in ("string", "number"):
+            return value
+        if kind == "punct" and value == "[":
+            items = []
+            while self.peek()[1] != "]":
+                items.append(self.expression())
+                if self.peek()[1] == ",":
+                    self.take()
+            self.take("]")
+            return items
+        if kind == "punct" and value == "{":
+            items = {}
+            while self.peek()[1] != "}":
+                key = self.take()[1]
+                self.take()  # = or :
+                items[key] = self.expression()
+                if self.peek()[1] == ",":
+                    self.take()
+            self.take("}")
+            return items
+        if kind == "ident":
+            if value in ("true", "false"):
+                return value == "true"
+            if value == "null":
+                return None
+            if self.peek()[1] == "(":
+                # Function calls are kept unevaluated
+                self.take()
+                args = []
+                while self.peek()[1] != ")":
+                    args.append(self.expression())
+                    if self.peek()[1] == ",":
+                        self.take()
+                self.take(")")
+                return Reference("%s()" % value)
+            return Reference(value)
+        raise HclError("Unexpected %r in expression" % (value,))
+
+
+def parse_hcl(text):
+    return _Parser(tokenize(text)).body()
+
+
+# ---------------------------------------------------------------------------
+# Modules and reference resolution
+# ---------------------------------------------------------------------------
+
+class _Module:
+    """All .tf files of one directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.variables, self.outputs, self.resources, self.calls, self.providers = {}, {}, {}, {}, {}
+        for path in sorted(glob.glob(os.path.join(directory, "*.tf"))):
+            with open(path) as f:
+                body = parse_hcl(f.read())
+            for block, labels, inner in body["blocks"]:
+                attrs = inner["attrs"]
+                if block == "variable":
+                    self.variables[labels[0]] = attrs.get("default")
+                elif block == "output":
+                    self.outputs[labels[0]] = attrs.get("value")
+                elif block == "resource":
+                    self.resources[(labels[0], labels[1])] = inner
+                elif block == "data":
+                    self.resources[("data." + labels[0], labels[1])] = inner
+                elif block == "module":
+                    self.calls[labels[0]] = attrs
+                elif block == "provider":
+                    self.providers[labels[0]] = attrs
+
+
+class _ResourceRef:
+    __slots__ = ("scope", "type", "name", "attr")
+
+    def __init__(self, scope, type_, name, attr):
+        self.scope, self.type, self.name, self.attr = scope, type_, name, attr
+
+    @property
+    def key(self):
+        return (self.scope.path, self.type, self.name)
+
+
+class _Scope:
+    """One module instance: the module plus the arguments it was called with"""
+
+    def __init__(self, module, path="root", args=None, parent=None):
+        self.module = module
+        self.path = path
+        self.args = args or {}
+        self.parent = parent
+        self.children = {}
+
+    def child(self, name):
+        if name not in self.children:
+            call = self.module.calls[name]
+            directory = os.path.normpath(os.path.join(self.module.directory, call["source"]))
+            self.children[name] = _Scope(_Module(directory), "module.%s" % name, call, self)
+        return self.children[name]
+
+    def scopes(self):
+        yield self
+        for name in self.module.calls:
+            yield from self.child(name).scopes()
+
+    def resolve(self, value, depth=0):
+        if depth > 32:
+            raise HclError("Reference cycle while resolving in %s" % self.path)
+        if isinstance(value, list):
+            return [self.resolve(item, depth + 1) for item in value]
+        if isinstance(value, dict):
+            return {key: self.resolve(item, depth + 1) for key, item in value.items()}
+        if isinstance(value, str) and "${" in value:
+            return self._interpolate(value, depth)
+        if not isinstance(value, Reference):
+            return value
+
+        parts = value.path.split(".")
+        if parts[0] == "var":
+            if parts[1] in self.args:
+                return self.parent.resolve(self.args[parts[1]], depth + 1)
+            return self.resolve(self.module.variables.get(parts[1]), depth + 1)
+        if parts[0] == "module":
+            child = self.child(parts[1])
+            return child.resolve(child.module.outputs.get(parts[2]), depth + 1)
+        if parts[0] == "data" and len(parts) >= 3:
+            return _ResourceRef(self, "data." + parts[1], parts[2], ".".join(parts[3:]) or None)
+        if len(parts) >= 2 and (parts[0], parts[1]) in self.module.resources:
+            return _ResourceRef(self, parts[0], parts[1], ".".join(parts[2:]) or None)
+        return None  # locals, functions, unknown attributes
+
+    def _interpolate(self, text, depth):
+        # Values only known after apply (random_id.x.hex, ...) are dropped along
+        # with the separator before them: "sg-${random_id.s.hex}" -> "sg"
+        def substitute(match):
+            value = self.resolve(Reference(match.group(2).strip()), depth + 1)
+            return match.group(1) + str(value) if isinstance(value, (str, int, float)) else ""
+        return re.sub(r"([-_.]?)\$\{([^}]*)\}", substitute, text)
+
+
+# ---------------------------------------------------------------------------
+# Immutable topology
+# ---------------------------------------------------------------------------
+
+class _Frozen:
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        values = dict(zip(self.__slots__, args))
+        values.update(kwargs)
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__reduce__() == other.__reduce__()
+
+    def __hash__(self):
+        return hash(self.__reduce__())
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join(
+            "%s=%r" % (name, getattr(self, name)) for name in self.__slots__))
+
+    def as_dict(self):
+        def plain(value):
+            if isinstance(value, _Frozen):
+                return value.as_dict()
+            if isinstance(value, tuple):
+                return [plain(item) for item in value]
+            return value
+        return {name: plain(getattr(self, name)) for name in self.__slots__}
+
+
+class Rule(_Frozen):
+    """One ingress/egress rule of a security group"""
+
+    __slots__ = ("direction", "protocol", "from_port", "to_port", "cidrs")
+
+    @property
+    def service(self):
+        if self.protocol == "icmp":
+            return "ICMP"
+        if self.protocol == "-1":
+            return "All traffic"
+        name = PORT_NAMES.get(self.from_port, self.protocol.upper())
+        ports = str(self.from_port) if self.from_port == self.to_port else "%s-%s" % (self.from_port, self.to_port)
+        return "%s(%s)" % (name, ports)
+
+    def describe(self):
+        """'SSH (22): 0.0.0.0/0' style line"""
+        service = self.service.replace("(", " (")
+        return "%s: %s" % (service, ", ".join(self.cidrs)) if self.cidrs else service
+
+
+class SecurityGroup(_Frozen):
+    __slots__ = ("key", "name", "default_vpc", "rules")
+
+    @property
+    def ingress(self):
+        return tuple(rule for rule in self.rules if rule.direction == "ingress")
+
+    def services(self):
+        return [rule.service for rule in self.ingress]
+
+    def summary(self, per_line=2):
+        """'SSH(22), HTTP(80)\nICMP' style label"""
+        services = self.services()
+        return "\n".join(", ".join(services[i:i + per_line]) for i in range(0, len(services), per_line))
+
+
+class Subnet(_Frozen):
+    """route is 'igw' for public subnets, 'nat' for private ones"""
+
+    __slots__ = ("key", "name", "cidr", "az", "route")
+
+    @property
+    def public(self):
+        return self.route == "igw"
+
+
+class Instance(_Frozen):
+    __slots__ = ("key", "name", "instance_type", "ami", "subnet", "security_groups", "public",
+                 "instance_id", "private_ip", "public_ip")
+
+    @property
+    def details(self):
+        """Instance id and reachable address, one per line, once deployed"""
+        address = self.public_ip if self.public else self.private_ip
+        return "\n".join(value for value in (self.instance_id, address) if value) or "not deployed"
+
+
+class Topology(_Frozen):
+    __slots__ = ("region", "vpc_name", "vpc_cidr", "vpc_id", "internet_gateway", "nat_subnet",
+                 "peering", "subnets", "security_groups", "instances", "source")
+
+    def subnet(self, key):
+        return next(s for s in self.subnets if s.key == key)
+
+    def security_group(self, key):
+        return next(g for g in self.security_groups if g.key == key)
+
+    @property
+    def public_subnets(self):
+        return tuple(s for s in self.subnets if s.public)
+
+    @property
+    def private_subnets(self):
+        return tuple(s for s in self.subnets if not s.public)
+
+    @property
+    def bastion(self):
+        return next((i for i in self.instances if i.public), None)
+
+    def require_bastion(self):
+        """The bastion, for the views drawn around it; TopologyError if there is none"""
+        if self.bastion is None:
+            raise TopologyError("No bastion host (instance with a public IP) in %s" % ", ".join(self.source))
+        return self.bastion
+
+    @property
+    def redis_nodes(self):
+        return tuple(i for i in self.instances if not i.public)
+
+    @property
+    def availability_zones(self):
+        return tuple(sorted({s.az for s in self.subnets if s.az}))
+
+    @property
+    def fleet(self):
+        return "%d Bastion + %d Redis Nodes" % (1 if self.bastion else 0, len(self.redis_nodes))
+
+    def instances_in(self, subnet_key):
+        return tuple(i for i in self.instances if i.subnet == subnet_key)
+
+    def groups_of(self, instance):
+        return tuple(self.security_group(key) for key in instance.security_groups)
+
+
+def _tag(body, default):
+    tags = body["attrs"].get("tags")
+    return tags.get("Name", default) if isinstance(tags, dict) else default
+
+
+def _state_vpc_id(state_path):
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    for resource in state.get("resources", []):
+        if resource.get("mode") == "managed" and resource.get("type") == "aws_vpc":
+            for instance in resource.get("instances", []):
+                vpc_id = instance.get("attributes", {}).get("id")
+                if vpc_id:
+                    return vpc_id
+    return None
+
+
+def _build(terraform_dir, outputs_path):
+    root = _Scope(_Module(terraform_dir))
+    resources = {}
+    for scope in root.scopes():
+        for (type_, name), body in scope.module.resources.items():
+            resources[(scope.path, type_, name)] = (scope, body)
+
+    def of_type(type_):
+        return [(key, scope, body) for key, (scope, body) in resources.items() if key[1] == type_]
+
+    def attr(scope, body, name):
+        return scope.resolve(body["attrs"].get(name))
+
+    def clean(text, scope):
+        return scope.resolve(text) if isinstance(text, str) else text
+
+    # Route tables: which gateway a subnet's default route goes through
+    routes = {}
+    for _, scope, body in of_type("aws_route_table_association"):
+        subnet, table = attr(scope, body, "subnet_id"), attr(scope, body, "route_table_id")
+        if not (isinstance(subnet, _ResourceRef) and isinstance(table, _ResourceRef)):
+            continue
+        _, table_body = resources[table.key]
+        for block, _, route in table_body["blocks"]:
+            if block != "route":
+                continue
+            if "gateway_id" in route["attrs"]:
+                routes[subnet.key] = "igw"
+            elif "nat_gateway_id" in route["attrs"]:
+                routes.setdefault(subnet.key, "nat")
+
+    subnets = []
+    for key, scope, body in of_type("aws_subnet"):
+        subnets.append(Subnet(key[2], clean(_tag(body, key[2]), scope), attr(scope, body, "cidr_block"),
+                              attr(scope, body, "availability_zone"), routes.get(key)))
+    subnets.sort(key=lambda s: tuple(int(p) for p in s.cidr.split("/")[0].split(".")) if s.cidr else ())
+
+    groups = []
+    for key, scope, body in of_type("aws_security_group"):
+        rules = []
+        for block, _, rule in body["blocks"]:
+            if block in ("ingress", "egress"):
+                values = {name: scope.resolve(value) for name, value in rule["attrs"].items()}
+                rules.append(Rule(block, str(values.get("protocol")), values.get("from_port"),
+                                  values.get("to_port"), tuple(values.get("cidr_blocks") or ())))
+        vpc = attr(scope, body, "vpc_id")
+        groups.append(SecurityGroup(key[2], clean(_tag(body, key[2]), scope),
+                                    isinstance(vpc, _ResourceRef) and vpc.type == "data.aws_vpc", tuple(rules)))
+
+    instances = {}
+    for key, scope, body in of_type("aws_instance"):
+        subnet = attr(scope, body, "subnet_id")
+        sgs = attr(scope, body, "security_groups") or attr(scope, body, "vpc_security_group_ids") or []
+        instances[key] = {
+            "key": key[2], "name": _tag(body, key[2]),
+            "instance_type": attr(scope, body, "instance_type"), "ami": attr(scope, body, "ami"),
+            "subnet": subnet.name if isinstance(subnet, _ResourceRef) else None,
+            "security_groups": tuple(g.name for g in sgs if isinstance(g, _ResourceRef)),
+            "public": attr(scope, body, "associate_public_ip_address") in (True, "true"),
+        }
+
+    # Deployed values: follow each root output to the instance attribute it exposes
+    source = [terraform_dir]
+    vpc_id = None
+    # Instances are listed in the order the root outputs name them (private-instance1,
+    # 2, 3), which is the node numbering of the inventory and connection guide
+    output_order = {}
+    if outputs_path and os.path.exists(outputs_path):
+        source.append(outputs_path)
+        with open(outputs_path) as f:
+            deployed = json.load(f)
+        for name, expression in root.module.outputs.items():
+            value = deployed.get(name, {}).get("value")
+            target = root.resolve(expression)
+            if not isinstance(value, str) or not isinstance(target, _ResourceRef):
+                continue
+            if target.type == "aws_vpc":
+                vpc_id = value
+            if target.key not in instances:
+                continue
+            # Output names and targets disagree in places (public-instance-id -> public_ip),
+            # so the value itself decides which field it fills
+            if value.startswith("i-"):
+                field = "instance_id"
+            else:
+                try:
+                    private = ipaddress.ip_address(value).is_private
+                except ValueError:
+                    continue
+                field = "private_ip" if private else "public_ip"
+            instances[target.key][field] = value
+            output_order.setdefault(target.key, len(output_order))
+
+    # terraform output -json only has vpc_id if the output existed at the last
+    # apply; the local state always has the VPC's id
+    state_path = os.path.join(terraform_dir, "terraform.tfstate")
+    if vpc_id is None and os.path.exists(state_path):
+        vpc_id = _state_vpc_id(state_path)
+        if vpc_id:
+            source.append(state_path)
+
+    vpcs = of_type("aws_vpc")
+    vpc_scope, vpc_body = (vpcs[0][1], vpcs[0][2]) if vpcs else (root, {"attrs": {}})
+    nats = of_type("aws_nat_gateway")
+    nat_subnet = attr(nats[0][1], nats[0][2], "subnet_id") if nats else None
+    provider = root.module.providers.get("aws", {})
+    return Topology(
+        region=root.resolve(provider.get("region")),
+        vpc_name=_tag(vpc_body, None) if vpcs else None,
+        vpc_cidr=attr(vpc_scope, vpc_body, "cidr_block"),
+        vpc_id=vpc_id,
+        internet_gateway=bool(of_type("aws_internet_gateway")),
+        nat_subnet=nat_subnet.name if isinstance(nat_subnet, _ResourceRef) else None,
+        peering=bool(of_type("aws_vpc_peering_connection")),
+        subnets=tuple(subnets),
+        security_groups=tuple(sorted(groups, key=lambda g: g.key)),
+        instances=tuple(Instance(**fields) for _, fields in sorted(
+            instances.items(), key=lambda item: (not item[1]["public"],
+                                                 output_order.get(item[0], len(output_order)), item[1]["name"]))),
+        source=tuple(os.path.relpath(path, ROOT) for path in source),
+    )
+
+
+def _fingerprint(paths):
+    digest = hashlib.sha1(b"infra-model-%d" % MODEL_VERSION)
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(("%s:%d:%d\n" % (path, stat.st_mtime_ns, stat.st_size)).encode())
+    return digest.hexdigest()[:16]
+
+
+def load(terraform_dir=None, outputs_path=None, use_cache=True):
+    """The parsed Topology, from memory, the on-disk cache or a fresh parse"""
+    terraform_dir = os.path.abspath(terraform_dir or os.path.join(ROOT, "terraform"))
+    if outputs_path is None:
+        outputs_path = os.path.join(ROOT, "terraform-outputs.json")
+    inputs = sorted(glob.glob(os.path.join(terraform_dir, "**", "*.tf"), recursive=True))
+    if os.path.exists(outputs_path):
+        inputs.append(os.path.abspath(outputs_path))
+    state_path = os.path.join(terraform_dir, "terraform.tfstate")
+    if os.path.exists(state_path):
+        inputs.append(state_path)
+    fingerprint = _fingerprint(inputs)
+    if fingerprint in _loaded:
+        return _loaded[fingerprint]
+
+    cache_path = os.path.join(CACHE_DIR, "infra-model-%s.pickle" % fingerprint)
+    topology = None
+    if use_cache:
+        try:
+            with open(cache_path, "rb") as f:
+                topology = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+            topology = None
+    if topology is None:
+        topology = _build(terraform_dir, outputs_path)
+        if use_cache:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                fd, partial = tempfile.mkstemp(dir=CACHE_DIR, suffix=".pickle")
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(topology, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(partial, cache_path)
+                for stale in glob.glob(os.path.join(CACHE_DIR, "infra-model-*.pickle")):
+                    if stale != cache_path:
+                        os.remove(stale)
+            except OSError:
+                pass  # read-only home: the model still works, just uncached
+    _loaded[fingerprint] = topology
+    return topology
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the infrastructure model parsed from Terraform")
+    parser.add_argument("--terraform", help="Terraform root module (default terraform/)")
+    parser.add_argument("--outputs", help="terraform output -json file (default terraform-outputs.json)")
+    parser.add_argument("--no-cache", action="store_true", help="parse even if a cached model exists")
+    parser.add_argument("--json", action="store_true", help="print the model as JSON")
+    args = parser.parse_args()
+
+    topology = load(args.terraform, args.outputs, use_cache=not args.no_cache)
+    if args.json:
+        print(json.dumps(topology.as_dict(), indent=2))
+        return
+
+    print("🏗️  %s VPC %s (%s) in %s" % (topology.vpc_name, topology.vpc_cidr, topology.vpc_id or "not deployed",
+                                      topology.region))
+    for subnet in topology.subnets:
+        print("   %-18s %-14s %-12s %s" % (subnet.name, subnet.cidr, subnet.az, "public" if subnet.public else "private"))
+    for group in topology.security_groups:
+        print("🔒 %s: %s" % (group.name, ", ".join(group.services())))
+    for instance in topology.instances:
+        print("🖥️  %-16s %-9s %-16s %s %s" % (instance.name, instance.instance_type, instance.subnet,
+                                             instance.private_ip or instance.public_ip or "-", instance.instance_id or ""))
+
+
+if __name__ == "__main__":
+    main()
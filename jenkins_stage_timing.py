@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Jenkins Stage Timing Analyzer
+Reads many builds of the pipeline - timestamped console logs or wfapi JSON
+(`<build>/wfapi/describe`, `<job>/wfapi/runs`) - one file at a time and reports
+per-stage duration distributions, trends across builds and each stage's share
+of the critical path, i.e. which stage to make faster first
+
+Console logs need timestamps: the Jenkinsfile enables `timestamps()`; fetch
+them with `<build>/timestamps/?time=yyyy-MM-dd'T'HH:mm:ss.SSSZ&appendLog`
+(plain `consoleText` has none)
+
+Examples:
+  python3 jenkins_stage_timing.py fixtures/jenkins/
+  python3 jenkins_stage_timing.py builds/*.log --status SUCCESS --recent 5 --json stage-timing.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+from datetime import datetime
+
+from perf_stats import percentile
+
+# [2025-06-27T10:15:03.123Z] line, 2025-06-27T10:15:03.123+0000  line, 10:15:03  line
+ISO_STAMP = re.compile(r"^\[?(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?)(Z|[+-]\d{2}:?\d{2})?\]?\s")
+CLOCK_STAMP = re.compile(r"^\[?(\d{2}):(\d{2}):(\d{2})\]?\s")
+STAGE_OPEN = re.compile(r"\[Pipeline\] \{ \((?:Branch: )?(.+)\)\s*$")
+BLOCK_OPEN = re.compile(r"\[Pipeline\] \{\s*$")
+BLOCK_CLOSE = re.compile(r"\[Pipeline\] \}\s*$")
+SKIPPED = re.compile(r'Stage "(.+)" skipped due to')
+FINISHED = re.compile(r"^(?:.*\s)?Finished: (\w+)\s*$")
+ERROR = re.compile(r"^(?:.*\s)?(?:ERROR: |script returned exit code [1-9])")
+
+
+class Build:
+    """One pipeline run: [(stage, start s, end s, status)] relative to the build start"""
+
+    __slots__ = ("source", "number", "status", "duration", "stages")
+
+    def __init__(self, source, number, status, duration, stages):
+        self.source = source
+        self.number = number
+        self.status = status
+        self.duration = duration
+        self.stages = stages
+
+
+def build_number(path):
+    numbers = re.findall(r"\d+", os.path.basename(os.path.dirname(path)) + "/" + os.path.basename(path))
+    return int(numbers[-1]) if numbers else None
+
+
+def parse_stamp(line, previous):
+    """Seconds since the epoch (or since midnight for HH:MM:SS) and the rest of the line"""
+    match = ISO_STAMP.match(line)
+    if match:
+        text, zone = match.group(1).replace(" ", "T"), match.group(2) or ""
+        if zone == "Z":
+            zone = "+00:00"
+        elif zone and ":" not in zone:
+            zone = zone[:3] + ":" + zone[3:]
+        stamp = datetime.fromisoformat(text + zone)
+        return stamp.timestamp(), line[match.end():]
+    match = CLOCK_STAMP.match(line)
+    if match:
+        seconds = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3))
+        # Clock-only stamps: carry over midnight
+        while previous is not None and seconds < previous - 43200:
+            seconds += 86400
+        return seconds, line[match.end():]
+    return None, line
+
+
+def parse_console(path):
+    """Stages from a timestamped console log, streamed line by line"""
+    stack = []  # stage name, or None for other blocks (withCredentials, script, ...)
+    open_stages = {}
+    stages = []
+    first = last = None
+    status = "UNKNOWN"
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            stamp, line = parse_stamp(raw.rstrip("\n"), last)
+            if stamp is None:
+                continue
+            if first is None:
+                first = stamp
+            last = stamp
+            match = STAGE_OPEN.search(line)
+            if match:
+                name = match.group(1)
+                stack.append(name)
+                open_stages[name] = [stamp, "SUCCESS"]
+                continue
+            if BLOCK_OPEN.search(line):
+                stack.append(None)
+                continue
+            if BLOCK_CLOSE.search(line):
+                name = stack.pop() if stack else None
+                if name is not None and name in open_stages:
+                    start, stage_status = open_stages.pop(name)
+                    stages.append((name, start - first, stamp - first, stage_status))
+                continue
+            match = SKIPPED.search(line)
+            if match:
+                if match.group(1) in open_stages:
+                    open_stages[match.group(1)][1] = "SKIPPED"
+                continue
+            if ERROR.match(line):
+                for name in stack:
+                    if name is not None:
+                        open_stages[name][1] = "FAILED"
+                continue
+            match = FINISHED.match(line)
+            if match:
+                status = match.group(1)
+    if first is None:
+        return None
+    # Stages still open when the log ended (aborted build)
+    for name, (start, stage_status) in open_stages.items():
+        stages.append((name, start - first, last - first, "ABORTED"))
+    return Build(path, build_number(path), status, last - first, sorted(stages, key=lambda s: s[1]))
+
+
+def parse_wfapi_run(run, source):
+    start = run.get("startTimeMillis", 0) / 1000.0
+    stages = []
+    for stage in run.get("stages", []):
+        begin = stage.get("startTimeMillis", 0) / 1000.0 - start
+        status = stage.get("status", "UNKNOWN")
+        # wfapi reports skipped stages as NOT_EXECUTED with a few ms of duration
+        stages.append((stage["name"], begin, begin + stage.get("durationMillis", 0) / 1000.0,
+                       "SKIPPED" if status == "NOT_EXECUTED" else status))
+    number = run.get("id")
+    return Build(source, int(number) if str(number).isdigit() else build_number(source),
+                 run.get("status", "UNKNOWN"), run.get("durationMillis", 0) / 1000.0, stages)
+
+
+def iter_builds(paths):
+    """Yield Build objects from files and directories, one file in memory at a time"""
+    for path in paths:
+        if os.path.isdir(path):
+            children = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+            yield from iter_builds(children)
+            continue
+        if path.endswith(".json"):
+            with open(path) as f:
+                data = json.load(f)
+            for run in data if isinstance(data, list) else [data]:
+                if "stages" in run:
+                    yield parse_wfapi_run(run, path)
+        else:
+            build = parse_console(path)
+            if build is None:
+                print("⚠️  %s has no timestamps; enable timestamps() and fetch the timestamped log" % path,
+                      file=sys.stderr)
+            else:
+                yield build
+
+
+def critical_path(build):
+    """{stage: seconds on the critical path}; parallel siblings off the path get nothing
+
+    Walks back from the build end, always following the stage that finished
+    last before the cursor. Time not covered by any stage is 'overhead'
+    """
+    stages = [s for s in build.stages if s[3] != "SKIPPED" and not any(
+        o is not s and s[1] <= o[1] < s[2] and o[2] <= s[2] and o[3] != "SKIPPED" for o in build.stages)]
+    shares = {}
+    cursor = build.duration
+    while True:
+        running = [s for s in stages if s[1] < cursor]
+        if not running:
+            break
+        name, start, end, _ = max(running, key=lambda s: (min(s[2], cursor), -s[1]))
+        shares[name] = shares.get(name, 0.0) + min(end, cursor) - start
+        cursor = start
+    shares["(overhead)"] = max(0.0, build.duration - sum(shares.values()))
+    return shares
+
+
+def trend(values, recent):
+    """Median change of the last `recent` builds against the earlier ones, in percent"""
+    if len(values) <= recent:
+        return None
+    before = statistics.median(values[:-recent])
+    after = statistics.median(values[-recent:])
+    return None if before == 0 else (after - before) / before * 100.0
+
+
+def slope(values):
+    """Least-squares seconds gained per build"""
+    if len(values) < 2:
+        return 0.0
+    mean_x = (len(values) - 1) / 2.0
+    mean_y = statistics.fmean(values)
+    numerator = sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values))
+    return numerator / sum((i - mean_x) ** 2 for i in range(len(values)))
+
+
+def analyse(builds, recent):
+    builds = sorted(builds, key=lambda b: (b.number is None, b.number or 0, b.source))
+    order = []
+    durations, statuses, critical = {}, {}, {}
+    wall = 0.0
+    for build in builds:
+        wall += build.duration
+        for name, start, end, status in build.stages:
+            if name not in durations:
+                order.append(name)
+                durations[name], statuses[name] = [], {}
+            statuses[name][status] = statuses[name].get(status, 0) + 1
+            if status != "SKIPPED":
+                durations[name].append(end - start)
+        for name, seconds in critical_path(build).items():
+            critical[name] = critical.get(name, 0.0) + seconds
+
+    stages = []
+    for name in order + ["(overhead)"]:
+        values = durations.get(name, [])
+        ordered = sorted(values)
+        stages.append({
+            "stage": name,
+            "runs": len(values),
+            "statuses": statuses.get(name, {}),
+            "min_s": round(ordered[0], 1) if ordered else None,
+            "p50_s": round(percentile(ordered, 0.50), 1) if ordered else None,
+            "p90_s": round(percentile(ordered, 0.90), 1) if ordered else None,
+            "max_s": round(ordered[-1], 1) if ordered else None,
+            "mean_s": round(statistics.fmean(ordered), 1) if ordered else None,
+            "trend_pct": None if trend(values, recent) is None else round(trend(values, recent), 1),
+            "slope_s_per_build": round(slope(values), 2),
+            "critical_s": round(critical.get(name, 0.0), 1),
+            "critical_share": round(critical.get(name, 0.0) / wall, 4) if wall else 0.0,
+        })
+    total = sorted(b.duration for b in builds)
+    return {
+        "builds": len(builds),
+        "build_numbers": [b.number for b in builds],
+        "build_p50_s": round(percentile(total, 0.50), 1),
+        "build_p90_s": round(percentile(total, 0.90), 1),
+        "stages": stages,
+    }
+
+
+def format_seconds(value):
+    if value is None:
+        return "-"
+    minutes, seconds = divmod(value, 60)
+    return "%dm%04.1fs" % (minutes, seconds) if minutes else "%.1fs" % seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage timing across Jenkins builds")
+    parser.add_argument("paths", nargs="+", help="timestamped console logs, wfapi JSON files or directories")
+    parser.add_argument("--status", help="only builds with this result, e.g. SUCCESS")
+    parser.add_argument("--last", type=int, help="only the newest N builds")
+    parser.add_argument("--recent", type=int, default=5, help="builds compared against the rest for trends")
+    parser.add_argument("--json", metavar="PATH", help="write the report as JSON")
+    args = parser.parse_args()
+
+    builds = [b for b in iter_builds(args.paths) if not args.status or b.status == args.status]
+    if args.last:
+        builds = sorted(builds, key=lambda b: b.number or 0)[-args.last:]
+    if not builds:
+        print("❌ No builds with stage timings found")
+        sys.exit(1)
+
+    report = analyse(builds, args.recent)
+    print("⏱️  Jenkins Stage Timing: %d builds, p50 %s, p90 %s" % (
+        report["builds"], format_seconds(report["build_p50_s"]), format_seconds(report["build_p90_s"])))
+    print("=" * 98)
+    print("%-28s %5s %9s %9s %9s %9s %9s %8s %9s" % (
+        "stage", "runs", "p50", "p90", "max", "mean", "trend", "skipped", "critical"))
+    for s in report["stages"]:
+        trend_text = "-" if s["trend_pct"] is None else "%+.0f%%" % s["trend_pct"]
+        print("%-28s %5d %9s %9s %9s %9s %9s %8d %8.1f%%" % (
+            s["stage"][:28], s["runs"], format_seconds(s["p50_s"]), format_seconds(s["p90_s"]),
+            format_seconds(s["max_s"]), format_seconds(s["mean_s"]), trend_text,
+            s["statuses"].get("SKIPPED", 0), s["critical_share"] * 100))
+
+    target = max((s for s in report["stages"] if s["stage"] != "(overhead)"),
+                 key=lambda s: s["critical_s"])
+    print("\n🎯 Attack first: %s (%.0f%% of pipeline wall time on the critical path)" % (
+        target["stage"], target["critical_share"] * 100))
+    for s in report["stages"]:
+        if s["trend_pct"] is not None and s["trend_pct"] >= 10:
+            print("📈 %s is %.0f%% slower over the last %d builds" % (s["stage"], s["trend_pct"], args.recent))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print("💾 Report written to %s" % args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Summary statistics shared by the Redis and pipeline tooling scripts
+Nearest-rank percentiles and the latency summary the reports print
+"""
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_summary(sorted_latencies):
+    """p50/p95/p99/max of sorted latencies in ms, as reported in the JSON output"""
+    return {
+        "p50": round(percentile(sorted_latencies, 0.50), 3),
+        "p95": round(percentile(sorted_latencies, 0.95), 3),
+        "p99": round(percentile(sorted_latencies, 0.99), 3),
+        "max": round(sorted_latencies[-1] if sorted_latencies else 0.0, 3),
+    }
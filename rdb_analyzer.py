@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+Offline RDB Snapshot Analyzer
+Streams a dump.rdb through a memory-mapped view (values are skipped, never
+materialised) and reports per-prefix key counts and sizes, encodings, TTL
+distribution and the largest keys - no load on the production nodes
+
+Usage:
+  python3 rdb_analyzer.py dump.rdb
+  python3 rdb_analyzer.py dump.rdb --separator : --prefix-depth 2 --top 50 --json report.json
+"""
+
+import argparse
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+# Opcodes
+OP_SLOT_INFO = 0xF4
+OP_FUNCTION2 = 0xF5
+OP_MODULE_AUX = 0xF7
+OP_IDLE = 0xF8
+OP_FREQ = 0xF9
+OP_AUX = 0xFA
+OP_RESIZEDB = 0xFB
+OP_EXPIRETIME_MS = 0xFC
+OP_EXPIRETIME = 0xFD
+OP_SELECTDB = 0xFE
+OP_EOF = 0xFF
+# Module value opcode of an unsigned integer
+MODULE_OPCODE_UINT = 2
+
+# Value types -> (logical type, encoding)
+TYPES = {
+    0: ("string", "raw"),
+    1: ("list", "linkedlist"),
+    2: ("set", "hashtable"),
+    3: ("zset", "skiplist"),
+    4: ("hash", "hashtable"),
+    5: ("zset", "skiplist"),
+    7: ("module", "module"),
+    9: ("hash", "zipmap"),
+    10: ("list", "ziplist"),
+    11: ("set", "intset"),
+    12: ("zset", "ziplist"),
+    13: ("hash", "ziplist"),
+    14: ("list", "quicklist"),
+    15: ("stream", "listpacks"),
+    16: ("hash", "listpack"),
+    17: ("zset", "listpack"),
+    18: ("list", "quicklist"),
+    19: ("stream", "listpacks"),
+    20: ("set", "listpack"),
+    21: ("stream", "listpacks"),
+    24: ("hash", "hashtable-ex"),
+    25: ("hash", "listpack-ex"),
+}
+
+ENCODING_NAMES = {value_type: "%s/%s" % names for value_type, names in TYPES.items()}
+
+# Single-blob encodings whose element count sits in the blob header
+BLOB_TYPES = {9, 10, 11, 12, 13, 16, 17, 20}
+
+# Parsed pages are released every RELEASE_INTERVAL bytes (progress every GiB)
+RELEASE_INTERVAL = 64 << 20
+
+TTL_BUCKETS = [
+    ("< 1 minute", 60),
+    ("< 1 hour", 3600),
+    ("< 1 day", 86400),
+    ("< 7 days", 7 * 86400),
+    ("< 30 days", 30 * 86400),
+    (">= 30 days", float("inf")),
+]
+
+
+class RdbFormatError(Exception):
+    pass
+
+
+def lzf_decompress(data, expected_length, limit=None):
+    """LZF decompression; stops early once `limit` bytes are produced"""
+    target = expected_length if limit is None else min(limit, expected_length)
+    out = bytearray()
+    i = 0
+    while i < len(data) and len(out) < target:
+        ctrl = data[i]
+        i += 1
+        if ctrl < 32:
+            out += data[i:i + ctrl + 1]
+            i += ctrl + 1
+            continue
+        length = ctrl >> 5
+        if length == 7:
+            length += data[i]
+            i += 1
+        ref = len(out) - ((ctrl & 0x1F) << 8) - data[i] - 1
+        i += 1
+        for _ in range(length + 2):
+            out.append(out[ref])
+            ref += 1
+    return bytes(out)
+
+
+class RdbReader:
+    """Cursor over a memory-mapped RDB file
+
+    Everything is read straight from the mapping; skip_* methods only move the
+    cursor so values never have to fit in memory
+    """
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.size = len(buf)
+        self.pos = 0
+
+    def byte(self):
+        value = self.buf[self.pos]
+        self.pos += 1
+        return value
+
+    def uint(self, size, order="little"):
+        value = int.from_bytes(self.buf[self.pos:self.pos + size], order)
+        self.pos += size
+        return value
+
+    def skip(self, size):
+        self.pos += size
+        if self.pos > self.size:
+            raise RdbFormatError("Unexpected end of file")
+
+    def length(self):
+        """Length encoding -> (value, is_special_encoding)"""
+        first = self.byte()
+        kind = first >> 6
+        if kind == 0:
+            return first & 0x3F, False
+        if kind == 1:
+            return ((first & 0x3F) << 8) | self.byte(), False
+        if kind == 3:
+            return first & 0x3F, True
+        if first == 0x80:
+            return self.uint(4, "big"), False
+        if first == 0x81:
+            return self.uint(8, "big"), False
+        raise RdbFormatError("Bad length encoding 0x%02x at offset %d" % (first, self.pos - 1))
+
+    def plain_length(self):
+        value, special = self.length()
+        if special:
+            raise RdbFormatError("Unexpected special encoding at offset %d" % (self.pos - 1))
+        return value
+
+    def string(self):
+        """Read a string (used for keys and AUX fields)"""
+        pos = self.pos
+        first = self.buf[pos]
+        if first < 0x40:
+            # Fast path: short plain string (6-bit length)
+            end = pos + 1 + first
+            if end > self.size:
+                raise RdbFormatError("Unexpected end of file")
+            self.pos = end
+            return bytes(self.buf[pos + 1:end])
+        value, special = self.length()
+        if not special:
+            data = bytes(self.buf[self.pos:self.pos + value])
+            self.skip(value)
+            return data
+        if value in (0, 1, 2):
+            size = 1 << value
+            number = int.from_bytes(self.buf[self.pos:self.pos + size], "little", signed=True)
+            self.skip(size)
+            return str(number).encode()
+        if value == 3:
+            compressed = self.plain_length()
+            original = self.plain_length()
+            data = lzf_decompress(self.buf[self.pos:self.pos + compressed], original)
+            self.skip(compressed)
+            return data
+        raise RdbFormatError("Unknown string encoding %d" % value)
+
+    def skip_string(self, header_bytes=0):
+        """Skip a string; optionally return its first header_bytes bytes"""
+        first = self.buf[self.pos]
+        if first < 0x80 and not header_bytes:
+            # Fast path: plain string with a 6- or 14-bit length
+            if first < 0x40:
+                self.skip(1 + first)
+            else:
+                self.skip(2 + (((first & 0x3F) << 8) | self.buf[self.pos + 1]))
+            return None
+        value, special = self.length()
+        if not special:
+            head = bytes(self.buf[self.pos:self.pos + header_bytes]) if header_bytes else None
+            self.skip(value)
+            return head
+        if value in (0, 1, 2):
+            self.skip(1 << value)
+            return None
+        if value == 3:
+            compressed = self.plain_length()
+            original = self.plain_length()
+            head = None
+            if header_bytes:
+                head = lzf_decompress(self.buf[self.pos:self.pos + compressed], original, header_bytes)
+            self.skip(compressed)
+            return head
+        raise RdbFormatError("Unknown string encoding %d" % value)
+
+    def skip_double(self):
+        # Old ZSET score: 1-byte length, 253/254/255 = nan/+inf/-inf
+        size = self.byte()
+        if size < 253:
+            self.skip(size)
+
+    def skip_module_values(self):
+        # Module values are self-describing opcode streams ending in EOF (0)
+        while True:
+            opcode = self.plain_length()
+            if opcode == 0:
+                return
+            if opcode in (1, 2):
+                self.plain_length()
+            elif opcode == 3:
+                self.skip(4)
+            elif opcode == 4:
+                self.skip(8)
+            elif opcode == 5:
+                self.skip_string()
+            else:
+                raise RdbFormatError("Unknown module opcode %d" % opcode)
+
+    def skip_stream(self, value_type):
+        for _ in range(self.plain_length()):
+            self.skip_string()  # node key (master ID)
+            self.skip_string()  # listpack
+        items = self.plain_length()
+        self.plain_length()  # last id ms
+        self.plain_length()  # last id seq
+        if value_type >= 19:
+            for _ in range(5):  # first id, max deleted id, entries added
+                self.plain_length()
+        for _ in range(self.plain_length()):  # consumer groups
+            self.skip_string()
+            self.plain_length()
+            self.plain_length()
+            if value_type >= 19:
+                self.plain_length()  # entries read
+            for _ in range(self.plain_length()):  # pending entries
+                self.skip(16 + 8)  # raw id + delivery time
+                self.plain_length()  # delivery count
+            for _ in range(self.plain_length()):  # consumers
+                self.skip_string()
+                self.skip(8)  # seen time
+                if value_type >= 21:
+                    self.skip(8)  # active time
+                self.skip(16 * self.plain_length())
+        return items
+
+    def skip_value(self, value_type):
+        """Skip one value; returns its element count when cheaply known"""
+        if value_type == 0:
+            self.skip_string()
+            return 1
+        if value_type in (1, 2):
+            count = self.plain_length()
+            for _ in range(count):
+                self.skip_string()
+            return count
+        if value_type == 3:
+            count = self.plain_length()
+            for _ in range(count):
+                self.skip_string()
+                self.skip_double()
+            return count
+        if value_type == 4:
+            count = self.plain_length()
+            for _ in range(count * 2):
+                self.skip_string()
+            return count
+        if value_type == 5:
+            count = self.plain_length()
+            for _ in range(count):
+                self.skip_string()
+                self.skip(8)
+            return count
+        if value_type == 7:
+            self.plain_length()  # module id
+            self.skip_module_values()
+            return None
+        if value_type in BLOB_TYPES:
+            return blob_count(value_type, self.skip_string(header_bytes=11))
+        if value_type == 14:
+            nodes = self.plain_length()
+            for _ in range(nodes):
+                self.skip_string()
+            return None
+        if value_type == 18:
+            count = 0
+            for _ in range(self.plain_length()):
+                container = self.plain_length()  # 1 = plain element, 2 = packed listpack
+                head = self.skip_string(header_bytes=6)
+                node_count = blob_count(20, head) if container == 2 else 1
+                count = None if count is None or node_count is None else count + node_count
+            return count
+        if value_type in (15, 19, 21):
+            return self.skip_stream(value_type)
+        if value_type == 24:
+            self.skip(8)  # minimum expire
+            count = self.plain_length()
+            for _ in range(count):
+                self.plain_length()  # field ttl
+                self.skip_string()
+                self.skip_string()
+            return count
+        if value_type == 25:
+            self.skip(8)  # minimum expire
+            head = self.skip_string(header_bytes=6)
+            count = blob_count(20, head)  # field, value, ttl triplets
+            return None if count is None else count // 3
+        raise RdbFormatError("Unsupported value type %d at offset %d" % (value_type, self.pos - 1))
+
+
+def blob_count(value_type, head):
+    """Element count from the header of a ziplist/listpack/intset/zipmap blob"""
+    if not head:
+        return None
+    if value_type in (16, 17, 20) and len(head) >= 6:
+        count = struct.unpack_from("<H", head, 4)[0]
+        if count == 0xFFFF:
+            return None
+        return count // 2 if value_type in (16, 17) else count
+    if value_type in (10, 12, 13) and len(head) >= 10:
+        count = struct.unpack_from("<H", head, 8)[0]
+        if count == 0xFFFF:
+            return None
+        return count // 2 if value_type in (12, 13) else count
+    if value_type == 11 and len(head) >= 8:
+        return struct.unpack_from("<I", head, 4)[0]
+    if value_type == 9 and len(head) >= 1:
+        return head[0] if head[0] < 254 else None
+    return None
+
+
+class Report:
+    """Aggregates per-key records without keeping them"""
+
+    def __init__(self, separator, prefix_depth, top, now_ms):
+        self.separator = separator.encode()
+        self.prefix_depth = prefix_depth
+        self.top = top
+        self.now_ms = now_ms
+        self.keys = 0
+        self.bytes = 0
+        self.prefixes = {}
+        self.encodings = {}
+        self.databases = {}
+        self.no_expiry = 0
+        self.ttl = {"already expired": 0}
+        self.ttl.update((label, 0) for label, _ in TTL_BUCKETS)
+        self.largest = []
+        self.aux = {}
+
+    def prefix(self, key):
+        """Prefix bytes of a key (None when it has fewer segments than the depth)"""
+        separator = self.separator
+        end = -1
+        for _ in range(self.prefix_depth):
+            end = key.find(separator, end + 1)
+            if end == -1:
+                return None
+        return key[:end + len(separator)]
+
+    def add(self, db, key, value_type, size, count, expire_ms):
+        # Hot path: one call per key, so keep it to dict/list updates
+        self.keys += 1
+        self.bytes += size
+
+        prefix = self.prefix(key)
+        stats = self.prefixes.get(prefix)
+        if stats is None:
+            stats = self.prefixes[prefix] = [0, 0]
+        stats[0] += 1
+        stats[1] += size
+
+        encoding = ENCODING_NAMES[value_type]
+        stats = self.encodings.get(encoding)
+        if stats is None:
+            stats = self.encodings[encoding] = [0, 0]
+        stats[0] += 1
+        stats[1] += size
+        self.databases[db] = self.databases.get(db, 0) + 1
+
+        if expire_ms is None:
+            self.no_expiry += 1
+        else:
+            remaining = (expire_ms - self.now_ms) / 1000.0
+            if remaining <= 0:
+                self.ttl["already expired"] += 1
+            else:
+                for label, limit in TTL_BUCKETS:
+                    if remaining < limit:
+                        self.ttl[label] += 1
+                        break
+
+        largest = self.largest
+        if len(largest) < self.top:
+            heapq.heappush(largest, (size, key, db, encoding, count))
+        elif self.top and size > largest[0][0]:
+            heapq.heapreplace(largest, (size, key, db, encoding, count))
+
+    def as_dict(self):
+        def table(stats, label):
+            return [{"name": label(name), "keys": keys, "bytes": size}
+                    for name, (keys, size) in sorted(stats.items(), key=lambda item: -item[1][1])]
+
+        def prefix_label(prefix):
+            return "(no prefix)" if prefix is None else prefix.decode(errors="replace") + "*"
+
+        return {
+            "keys": self.keys,
+            "serialized_bytes": self.bytes,
+            "aux": self.aux,
+            "databases": {str(db): keys for db, keys in sorted(self.databases.items())},
+            "prefixes": table(self.prefixes, prefix_label),
+            "encodings": table(self.encodings, str),
+            "ttl": dict([("no expiry", self.no_expiry)], **self.ttl),
+            "largest_keys": [
+                {"key": key.decode(errors="replace"), "db": db, "type": encoding, "bytes": size, "elements": count}
+                for size, key, db, encoding, count in sorted(self.largest, reverse=True)
+            ],
+        }
+
+
+def analyze(path, separator=":", prefix_depth=1, top=20, now_ms=None, progress=False):
+    """Single streaming pass over an RDB file -> report dict"""
+    return _with_mapping(path, lambda buf, release: _analyze(
+        buf, separator, prefix_depth, top, now_ms, progress, release))
+
+
+def rdb_length(path):
+    """Size in bytes of the RDB payload at the start of a file
+
+    Used to step over the RDB preamble of an AOF written with
+    aof-use-rdb-preamble
+    """
+    return _with_mapping(path, lambda buf, release: _analyze(
+        buf, ":", 1, 0, None, False, release))["rdb_bytes"]
+
+
+def _with_mapping(path, parse):
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 9:
+            raise RdbFormatError("%s is too small to be an RDB file" % path)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+            def release(upto):
+                # Drop already-parsed pages so resident memory stays flat
+                if hasattr(mmap, "MADV_DONTNEED"):
+                    mapped.madvise(mmap.MADV_DONTNEED, 0, upto - upto % mmap.PAGESIZE)
+
+            buf = memoryview(mapped)
+            try:
+                return parse(buf, release)
+            finally:
+                buf.release()
+
+
+def _analyze(buf, separator, prefix_depth, top, now_ms, progress, release):
+    if bytes(buf[:5]) != b"REDIS":
+        raise RdbFormatError("Missing REDIS magic header")
+    reader = RdbReader(buf)
+    reader.pos = 9
+    report = Report(separator, prefix_depth, top, now_ms or int(time.time() * 1000))
+    report.aux["rdb-format-version"] = bytes(buf[5:9]).decode()
+    db = 0
+    expire_ms = None
+    next_release = RELEASE_INTERVAL
+
+    while True:
+        opcode = reader.byte()
+        if opcode in TYPES:
+            key = reader.string()
+            start = reader.pos
+            count = reader.skip_value(opcode)
+            report.add(db, key, opcode, reader.pos - start, count, expire_ms)
+            expire_ms = None
+            if reader.pos >= next_release:
+                release(reader.pos)
+                next_release += RELEASE_INTERVAL
+                if progress and next_release % (1 << 30) < RELEASE_INTERVAL:
+                    print("   ... %.1f GiB, %d keys" % (reader.pos / (1 << 30), report.keys), file=sys.stderr)
+        elif opcode == OP_EOF:
+            break
+        elif opcode == OP_SELECTDB:
+            db = reader.plain_length()
+        elif opcode == OP_RESIZEDB:
+            reader.plain_length()
+            reader.plain_length()
+        elif opcode == OP_AUX:
+            field = reader.string().decode(errors="replace")
+            value = reader.string().decode(errors="replace")
+            report.aux[field] = value
+            if field == "ctime" and now_ms is None and value.isdigit():
+                # TTLs are relative to when the snapshot was taken
+                report.now_ms = int(value) * 1000
+        elif opcode == OP_EXPIRETIME_MS:
+            expire_ms = reader.uint(8)
+        elif opcode == OP_EXPIRETIME:
+            expire_ms = reader.uint(4) * 1000
+        elif opcode == OP_FREQ:
+            reader.skip(1)
+        elif opcode == OP_IDLE:
+            reader.plain_length()
+        elif opcode == OP_MODULE_AUX:
+            reader.plain_length()  # module id
+            if reader.plain_length() != MODULE_OPCODE_UINT:  # when opcode
+                raise RdbFormatError("Bad module aux 'when' opcode at offset %d" % (reader.pos - 1))
+            reader.plain_length()  # when (before / after the keyspace)
+            reader.skip_module_values()
+        elif opcode == OP_FUNCTION2:
+            reader.skip_string()
+        elif opcode == OP_SLOT_INFO:
+            for _ in range(3):
+                reader.plain_length()
+        else:
+            raise RdbFormatError("Unsupported opcode/type 0x%02x at offset %d" % (opcode, reader.pos - 1))
+
+    result = report.as_dict()
+    # EOF opcode is followed by an 8-byte checksum since RDB version 5
+    result["rdb_bytes"] = reader.pos + (8 if int(result["aux"]["rdb-format-version"]) >= 5 else 0)
+    return result
+
+
+def human(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return "%.1f %s" % (size, unit)
+        size /= 1024.0
+    return "%.1f TiB" % size
+
+
+def print_report(report, limit):
+    print("📦 %d keys, %s serialized (RDB v%s, redis %s)" % (
+        report["keys"], human(report["serialized_bytes"]),
+        report["aux"].get("rdb-format-version"), report["aux"].get("redis-ver", "?")))
+
+    print("\n🔑 Prefixes")
+    for row in report["prefixes"][:limit]:
+        print("   %-40s %10d keys %12s" % (row["name"], row["keys"], human(row["bytes"])))
+    if len(report["prefixes"]) > limit:
+        print("   ... %d more prefixes" % (len(report["prefixes"]) - limit))
+
+    print("\n🧱 Encodings")
+    for row in report["encodings"]:
+        print("   %-40s %10d keys %12s" % (row["name"], row["keys"], human(row["bytes"])))
+
+    print("\n⏳ TTL distribution")
+    for label, keys in report["ttl"].items():
+        print("   %-40s %10d keys" % (label, keys))
+
+    print("\n🐘 Largest keys")
+    for row in report["largest_keys"]:
+        elements = "" if row["elements"] is None else " (%d elements)" % row["elements"]
+        print("   %12s  db%-2d %-22s %s%s" % (human(row["bytes"]), row["db"], row["type"], row["key"], elements))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline, memory-mapped analysis of a Redis RDB snapshot")
+    parser.add_argument("rdb", help="path to dump.rdb")
+    parser.add_argument("--separator", default=":", help="key prefix separator (default ':')")
+    parser.add_argument("--prefix-depth", type=int, default=1, help="separator-delimited segments per prefix")
+    parser.add_argument("--top", type=int, default=20, help="number of largest keys to report")
+    parser.add_argument("--limit", type=int, default=30, help="prefix rows to print")
+    parser.add_argument("--json", metavar="PATH", help="also write the full report as JSON")
+    args = parser.parse_args()
+
+    print("🔍 Analyzing %s (%s)..." % (args.rdb, human(os.path.getsize(args.rdb))))
+    started = time.time()
+    report = analyze(args.rdb, args.separator, args.prefix_depth, args.top, progress=True)
+    elapsed = time.time() - started
+    report["elapsed_s"] = round(elapsed, 2)
+
+    print_report(report, args.limit)
+    print("\n✅ Done in %.1fs (%s/s)" % (elapsed, human(os.path.getsize(args.rdb) / max(elapsed, 1e-6))))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print("💾 Report written to %s" % args.json)
+
+
+if __name__ == "__main__":
+    main()
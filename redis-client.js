@@ -1,9 +1,97 @@
 const redis = require('redis');
 
+// Cluster mode: REDIS_CLUSTER_NODES lists seed nodes ("host:port,host:port" or
+// redis:// URLs); the rest of the topology is discovered via CLUSTER SLOTS.
+// Batch operations are split by hash slot so multi-key commands never span
+// slots (CROSSSLOT)
+const clusterNodes = (process.env.REDIS_CLUSTER_NODES || '')
+  .split(',')
+  .map((node) => node.trim())
+  .filter(Boolean);
+const clusterMode = process.env.REDIS_CLUSTER === 'true' || clusterNodes.length > 0;
+
+// Send read-only commands (GET, MGET, ...) to replicas instead of masters
+const readFromReplicas = process.env.REDIS_READ_FROM_REPLICAS === 'true';
+
+// Isolated connections kept per node for blocking/transactional commands;
+// regular commands are multiplexed and pipelined over one socket per node
+const poolSize = parseInt(process.env.REDIS_POOL_SIZE || '4', 10);
+
+// CRC16 (XMODEM) lookup table used by Redis Cluster for key -> slot mapping
+const CRC16_TABLE = (() => {
+  const table = new Uint16Array(256);
+  for (let i = 0; i < 256; i++) {
+    let crc = i << 8;
+    for (let j = 0; j < 8; j++) {
+      crc = crc & 0x8000 ? ((crc << 1) ^ 0x1021) & 0xffff : (crc << 1) & 0xffff;
+    }
+    table[i] = crc;
+  }
+  return table;
+})();
+
+const crc16 = (buffer) => {
+  let crc = 0;
+  for (const byte of buffer) {
+    crc = ((crc << 8) & 0xffff) ^ CRC16_TABLE[((crc >> 8) ^ byte) & 0xff];
+  }
+  return crc;
+};
+
+// Hash slot for a key, honouring {hash tags}
+const keySlot = (key) => {
+  let buffer = Buffer.from(key);
+  const open = buffer.indexOf(0x7b); // '{'
+  if (open !== -1) {
+    const close = buffer.indexOf(0x7d, open + 1); // '}'
+    if (close > open + 1) {
+      buffer = buffer.subarray(open + 1, close);
+    }
+  }
+  return crc16(buffer) % 16384;
+};
+
+const isolationPoolOptions = { min: 1, max: poolSize };
+
+// Command options for reads that must return raw Buffers (encoded values)
+const returnBuffers = redis.commandOptions({ returnBuffers: true });
+
+const toNodeUrl = (node) => (node.includes('://') ? node : `redis://${node}`);
+
 // Redis connection configuration for Render
 const getRedisClient = () => {
   const redisUrl = process.env.REDIS_URL || process.env.REDISCLOUD_URL;
-  
+
+  if (clusterMode) {
+    // Cluster: seed from REDIS_CLUSTER_NODES, falling back to REDIS_URL
+    const rootNodes = (clusterNodes.length > 0 ? clusterNodes : [redisUrl || 'localhost:6379'])
+      .map((node) => ({ url: toNodeUrl(node) }));
+    const tls = rootNodes[0].url.startsWith('rediss://');
+    // Nodes discovered through CLUSTER SLOTS are connected to with `defaults`
+    // only, so the seed URL's credentials have to be passed on explicitly
+    const seed = new URL(rootNodes[0].url);
+    const credentials = {};
+    if (seed.username) {
+      credentials.username = decodeURIComponent(seed.username);
+    }
+    if (seed.password) {
+      credentials.password = decodeURIComponent(seed.password);
+    }
+    console.log(
+      `Connecting to Redis Cluster via ${rootNodes.length} seed node(s)` +
+      ` (replica reads: ${readFromReplicas}, pool per node: ${poolSize})`
+    );
+    return redis.createCluster({
+      rootNodes,
+      useReplicas: readFromReplicas,
+      defaults: {
+        ...credentials,
+        socket: tls ? { tls, rejectUnauthorized: false } : {},
+        isolationPoolOptions
+      }
+    });
+  }
+
   if (redisUrl) {
     // Production: Use Render's Redis service
     console.log('Connecting to Redis via URL:', redisUrl.replace(/\/\/.*@/, '//***:***@'));
@@ -12,14 +100,17 @@ const getRedisClient = () => {
       socket: {
         tls: redisUrl.startsWith('rediss://'),
         rejectUnauthorized: false
-      }
+      },
+      isolationPoolOptions
     });
   } else {
-    // Development: Use local Redis
-    console.log('Connecting to local Redis on localhost:6379');
+    // Development: Use local Redis (or the docker-compose service)
+    const host = process.env.REDIS_HOST || 'localhost';
+    const port = parseInt(process.env.REDIS_PORT || '6379', 10);
+    console.log(`Connecting to local Redis on ${host}:${port}`);
     return redis.createClient({
-      host: 'localhost',
-      port: 6379
+      socket: { host, port },
+      isolationPoolOptions
     });
   }
 };
@@ -44,7 +135,7 @@ client.on('ready', () => {
 const connectRedis = async () => {
   try {
     await client.connect();
-    console.log('Redis connection established');
+    console.log(`Redis connection established${clusterMode ? ' (cluster mode)' : ''}`);
     return client;
   } catch (error) {
     console.error('Failed to connect to Redis:', error);
@@ -52,4 +143,13 @@ const connectRedis = async () => {
   }
 };
 
-module.exports = { client, connectRedis };
+// Clients for every master node, for commands that have to visit the whole
+// keyspace (SCAN); outside cluster mode this is just the shared client
+const masterClients = async () => {
+  if (!clusterMode) {
+    return [client];
+  }
+  return Promise.all(client.masters.map((master) => client.nodeClient(master)));
+};
+
+module.exports = { client, connectRedis, clusterMode, keySlot, returnBuffers, masterClients };
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Redis Workload Benchmark
+Drives a configurable workload over raw RESP (pipelined, pooled connections)
+against a single node and/or a Redis Cluster, writes versioned JSON results
+and flags regressions against a baseline run
+
+Examples:
+  # Launch a local single node and a local 3-node cluster, same workload
+  python3 redis_benchmark.py --launch --duration 20 --output results.json
+
+  # Existing deployments, compared against a previous run
+  python3 redis_benchmark.py --single 127.0.0.1:6379 \\
+      --cluster 10.0.2.143:6379,10.0.3.32:6379,10.0.4.214:6379 \\
+      --mix get:0.8,set:0.2 --distribution zipf --pipeline 32 \\
+      --baseline results.json
+"""
+
+import argparse
+import bisect
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from perf_stats import latency_summary
+from redis_resp import LocalDeployment, RespError, Router
+
+SCHEMA_VERSION = 1
+COMMANDS = ("get", "set", "incr", "del", "exists")
+
+
+def parse_weights(spec, cast=str):
+    """'get:0.8,set:0.2' -> ([get, set], [0.8, 0.2])"""
+    items, weights = [], []
+    for part in spec.split(","):
+        name, _, weight = part.partition(":")
+        items.append(cast(name.strip()))
+        weights.append(float(weight or 1))
+    return items, weights
+
+
+class Workload:
+    """Deterministic generator of (command, key, value size) operations"""
+
+    def __init__(self, config, seed):
+        self.config = config
+        self.rng = random.Random(seed)
+        self.commands, self.command_weights = parse_weights(config["mix"])
+        self.sizes, self.size_weights = parse_weights(config["value_sizes"], int)
+        unknown = set(self.commands) - set(COMMANDS)
+        if unknown:
+            raise ValueError("Unsupported command(s) in mix: %s" % ", ".join(sorted(unknown)))
+        self.keys = config["keys"]
+        self.payloads = {size: b"x" * size for size in self.sizes}
+        self._zipf_cdf = None
+        if config["distribution"] == "zipf":
+            self._zipf_cdf = self._build_zipf_cdf(self.keys, config["zipf_s"])
+
+    @staticmethod
+    def _build_zipf_cdf(n, s):
+        total = 0.0
+        cdf = []
+        for rank in range(1, n + 1):
+            total += 1.0 / (rank ** s)
+            cdf.append(total)
+        return [c / total for c in cdf]
+
+    def key(self):
+        distribution = self.config["distribution"]
+        if distribution == "zipf":
+            index = bisect.bisect_left(self._zipf_cdf, self.rng.random())
+        elif distribution == "hotset":
+            # hot_fraction of the keys receive hot_traffic of the requests
+            hot = max(1, int(self.keys * self.config["hot_fraction"]))
+            if self.rng.random() < self.config["hot_traffic"]:
+                index = self.rng.randrange(hot)
+            else:
+                index = self.rng.randrange(self.keys)
+        else:
+            index = self.rng.randrange(self.keys)
+        return "%s%d" % (self.config["key_prefix"], index)
+
+    def operation(self):
+        command = self.rng.choices(self.commands, self.command_weights)[0]
+        key = self.key()
+        if command == "set":
+            size = self.rng.choices(self.sizes, self.size_weights)[0]
+            return ("SET", key, self.payloads[size])
+        if command == "incr":
+            # Counters live in their own keyspace so INCR never hits a string value
+            return ("INCR", key + ":counter")
+        return (command.upper(), key)
+
+
+def preload(router, config, pipeline=256):
+    """SET every key once so reads hit existing values"""
+    workload = Workload(config, seed=0)
+    batch = []
+    for index in range(config["keys"]):
+        size = workload.rng.choices(workload.sizes, workload.size_weights)[0]
+        batch.append(("SET", "%s%d" % (config["key_prefix"], index), workload.payloads[size]))
+        if len(batch) == pipeline:
+            router.execute_many(batch)
+            batch = []
+    if batch:
+        router.execute_many(batch)
+
+
+def run_client(seeds, cluster, config, client_id):
+    """One benchmark client process: `connections` threads, each keeping one
+    pipelined batch in flight on its own pooled connection per node, until the
+    duration elapses"""
+    router = Router(seeds, cluster=cluster, pool_size=config["connections"])
+    depth = config["pipeline"]
+    deadline = time.perf_counter() + config["duration"]
+    lanes = []
+
+    def lane(index):
+        workload = Workload(config, seed=config["seed"] * 1000 + client_id * config["connections"] + index)
+        stats = {"ops": 0, "errors": 0, "latencies": []}
+        lanes.append(stats)
+        while time.perf_counter() < deadline:
+            batch = [workload.operation() for _ in range(depth)]
+            started = time.perf_counter()
+            replies = router.execute_many(batch)
+            stats["latencies"].append((time.perf_counter() - started) * 1000.0)
+            stats["ops"] += len(batch)
+            stats["errors"] += sum(1 for reply in replies if isinstance(reply, RespError))
+
+    try:
+        with ThreadPoolExecutor(max_workers=config["connections"]) as pool:
+            for future in [pool.submit(lane, i) for i in range(config["connections"])]:
+                future.result()
+    finally:
+        router.close()
+    return {"ops": sum(l["ops"] for l in lanes), "errors": sum(l["errors"] for l in lanes),
+            "redirects": router.redirects, "latencies": [x for l in lanes for x in l["latencies"]]}
+
+
+def run_layout(name, seeds, cluster, config):
+    """Run the workload against one deployment and summarise it"""
+    router = Router(seeds, cluster=cluster)
+    nodes = router.nodes
+    if cluster:
+        name = "%s-%d" % (name, len(nodes))
+    print("🚀 %s: %s (%d clients x %d connections x pipeline %d, %ss)" % (
+        name, ",".join(nodes), config["clients"], config["connections"], config["pipeline"], config["duration"]))
+    if config["preload"]:
+        preload(router, config)
+    router.close()
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=config["clients"]) as pool:
+        futures = [pool.submit(run_client, seeds, cluster, config, i) for i in range(config["clients"])]
+        parts = [f.result() for f in futures]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(l for part in parts for l in part["latencies"])
+    ops = sum(part["ops"] for part in parts)
+    result = {
+        "layout": name,
+        "nodes": nodes,
+        "ops": ops,
+        "errors": sum(part["errors"] for part in parts),
+        "redirects": sum(part["redirects"] for part in parts),
+        "duration_s": round(elapsed, 3),
+        "ops_per_sec": round(ops / elapsed, 1),
+        # Latency of one pipelined batch (its per-node pipelines are in flight together)
+        "batch_latency_ms": latency_summary(latencies),
+    }
+    print("   ✅ %.0f ops/s, p50 %.2f ms, p99 %.2f ms, %d errors, %d redirects" % (
+        result["ops_per_sec"], result["batch_latency_ms"]["p50"], result["batch_latency_ms"]["p99"],
+        result["errors"], result["redirects"]))
+    return result
+
+
+def compare(results, baseline, max_throughput_drop, max_p99_increase):
+    """Return regression messages for layouts present in both result sets"""
+    if baseline.get("schema_version") != SCHEMA_VERSION:
+        return ["baseline schema_version %s != %s" % (baseline.get("schema_version"), SCHEMA_VERSION)]
+    previous = {run["layout"]: run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in results["runs"]:
+        before = previous.get(run["layout"])
+        if not before:
+            continue
+        drop = 100.0 * (before["ops_per_sec"] - run["ops_per_sec"]) / max(before["ops_per_sec"], 1e-9)
+        if drop > max_throughput_drop:
+            regressions.append("%s: throughput down %.1f%% (%.0f -> %.0f ops/s)" % (
+                run["layout"], drop, before["ops_per_sec"], run["ops_per_sec"]))
+        p99_before = before["batch_latency_ms"]["p99"]
+        p99_now = run["batch_latency_ms"]["p99"]
+        increase = 100.0 * (p99_now - p99_before) / max(p99_before, 1e-9)
+        if increase > max_p99_increase:
+            regressions.append("%s: p99 up %.1f%% (%.2f -> %.2f ms)" % (
+                run["layout"], increase, p99_before, p99_now))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw-RESP Redis workload benchmark")
+    targets = parser.add_argument_group("targets")
+    targets.add_argument("--single", help="host:port of a single Redis node")
+    targets.add_argument("--cluster", help="comma-separated cluster seed nodes")
+    targets.add_argument("--launch", action="store_true",
+                         help="start a local single node and a local 3-master cluster "
+                              "(reported as local-single / local-cluster)")
+    targets.add_argument("--redis-server", default="redis-server", help="redis-server binary for --launch")
+    targets.add_argument("--base-port", type=int, default=7000, help="first port used by --launch")
+
+    workload = parser.add_argument_group("workload")
+    workload.add_argument("--keys", type=int, default=100000, help="size of the keyspace")
+    workload.add_argument("--key-prefix", default="bench:")
+    workload.add_argument("--distribution", choices=["uniform", "zipf", "hotset"], default="uniform")
+    workload.add_argument("--zipf-s", type=float, default=1.1, help="zipf exponent")
+    workload.add_argument("--hot-fraction", type=float, default=0.01, help="hotset: fraction of hot keys")
+    workload.add_argument("--hot-traffic", type=float, default=0.9, help="hotset: share of traffic to hot keys")
+    workload.add_argument("--value-sizes", default="64:0.7,1024:0.25,16384:0.05",
+                          help="value size mix, bytes:weight")
+    workload.add_argument("--mix", default="get:0.8,set:0.2",
+                          help="command mix, command:weight (%s)" % ",".join(COMMANDS))
+    workload.add_argument("--pipeline", type=int, default=16, help="commands per pipelined batch")
+    workload.add_argument("--clients", type=int, default=4, help="client processes")
+    workload.add_argument("--connections", type=int, default=2, help="concurrent pipelined batches per client (one connection per node each)")
+    workload.add_argument("--duration", type=float, default=10.0, help="seconds per layout")
+    workload.add_argument("--seed", type=int, default=1)
+    workload.add_argument("--no-preload", dest="preload", action="store_false",
+                          help="skip writing every key before the run")
+
+    output = parser.add_argument_group("results")
+    output.add_argument("--output", help="write JSON results here")
+    output.add_argument("--baseline", help="previous JSON results to compare against")
+    output.add_argument("--max-throughput-drop", type=float, default=10.0, help="allowed ops/s drop, %%")
+    output.add_argument("--max-p99-increase", type=float, default=25.0, help="allowed p99 increase, %%")
+    args = parser.parse_args()
+
+    if not (args.single or args.cluster or args.launch):
+        parser.error("give --single, --cluster and/or --launch")
+
+    config = {name: getattr(args, name) for name in (
+        "keys", "key_prefix", "distribution", "zipf_s", "hot_fraction", "hot_traffic", "value_sizes",
+        "mix", "pipeline", "clients", "connections", "duration", "seed", "preload")}
+    Workload(config, seed=0)  # validate the mix before starting anything
+
+    print("📊 Redis Workload Benchmark")
+    print("=" * 50)
+    runs = []
+    deployments = []
+    try:
+        if args.launch:
+            single = LocalDeployment(masters=1, base_port=args.base_port,
+                                     redis_server=args.redis_server).start()
+            deployments.append(single)
+            runs.append(run_layout("local-single", single.seeds, False, config))
+            cluster = LocalDeployment(masters=3, cluster=True, base_port=args.base_port + 10,
+                                      redis_server=args.redis_server).start()
+            deployments.append(cluster)
+            runs.append(run_layout("local-cluster", cluster.seeds, True, config))
+        if args.single:
+            runs.append(run_layout("single", [args.single], False, config))
+        if args.cluster:
+            runs.append(run_layout("cluster", args.cluster.split(","), True, config))
+    finally:
+        for deployment in deployments:
+            deployment.stop()
+
+    results = {
+        "schema_version": SCHEMA_VERSION,
+        "tool": os.path.basename(__file__),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "workload": config,
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print("💾 Results written to %s" % args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_throughput_drop, args.max_p99_increase)
+        if regressions:
+            print("❌ Regressions against %s:" % args.baseline)
+            for message in regressions:
+                print("   • %s" % message)
+            sys.exit(2)
+        print("✅ No regressions against %s" % args.baseline)
+
+
+if __name__ == "__main__":
+    main()
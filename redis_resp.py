@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Minimal RESP (Redis protocol) client shared by the Redis tooling scripts
+Pipelined connections, per-node connection pools, Redis Cluster slot routing
+and a launcher for throwaway local single-node / cluster deployments
+"""
+
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+CLUSTER_SLOTS = 16384
+
+
+class RespError(Exception):
+    """Error reply returned by the server (-ERR ..., -MOVED ..., ...)"""
+
+    @property
+    def kind(self):
+        return str(self).split(" ", 1)[0]
+
+
+class RedirectError(ConnectionError):
+    """A command was still redirected (MOVED/ASK) after the allowed number of hops"""
+
+
+def encode_command(args):
+    """Encode one command (sequence of str/bytes/int) as a RESP array"""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode()
+        else:
+            data = str(arg).encode()
+        out.append(b"$%d\r\n" % len(data))
+        out.append(data)
+        out.append(b"\r\n")
+    return b"".join(out)
+
+
+class RespConnection:
+    """One TCP connection speaking RESP2, with explicit pipelining"""
+
+    def __init__(self, host="127.0.0.1", port=6379, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb", buffering=65536)
+
+    @property
+    def address(self):
+        return "%s:%d" % (self.host, self.port)
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+    def send(self, commands):
+        """Write several commands in a single send (no replies read)"""
+        self.sock.sendall(b"".join(encode_command(c) for c in commands))
+
+    def read_reply(self):
+        """Read one reply; error replies are returned as RespError instances"""
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by %s" % self.address)
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            return RespError(payload.decode(errors="replace"))
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self.read_reply() for _ in range(length)]
+        raise ConnectionError("Unexpected RESP prefix %r from %s" % (prefix, self.address))
+
+    def pipeline(self, commands):
+        """Send all commands in one write and read every reply, in order"""
+        self.send(commands)
+        return [self.read_reply() for _ in commands]
+
+    def execute(self, *args):
+        """Run one command, raising RespError on an error reply"""
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+
+class ConnectionPool:
+    """Fixed-size pool of connections to one node"""
+
+    def __init__(self, host, port, size=4, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = queue.Queue()
+        for _ in range(size):
+            self._slots.put(None)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        self._slots.get()
+        try:
+            return RespConnection(self.host, self.port, self.timeout)
+        except OSError:
+            self._slots.put(None)
+            raise
+
+    def release(self, conn, broken=False):
+        if broken:
+            conn.close()
+            self._slots.put(None)
+        else:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _crc16_table():
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+_CRC16 = _crc16_table()
+
+
+def key_slot(key):
+    """Redis Cluster hash slot of a key (str or bytes), honouring {hash tags}"""
+    if isinstance(key, str):
+        key = key.encode()
+    start = key.find(b"{")
+    if start != -1:
+        end = key.find(b"}", start + 1)
+        if end > start + 1:
+            key = key[start + 1:end]
+    crc = 0
+    for byte in key:
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16[((crc >> 8) ^ byte) & 0xFF]
+    return crc % CLUSTER_SLOTS
+
+
+def parse_address(address, default_port=6379):
+    """'host:port' -> (host, port)"""
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, default_port
+    return host, int(port)
+
+
+def parse_info(reply):
+    """INFO reply -> dict of field -> str"""
+    if isinstance(reply, bytes):
+        reply = reply.decode()
+    info = {}
+    for line in reply.splitlines():
+        if line and not line.startswith("#") and ":" in line:
+            field, _, value = line.partition(":")
+            info[field] = value
+    return info
+
+
+class Router:
+    """Routes keys to node pools; a single node or a Redis Cluster
+
+    In cluster mode the slot map comes from CLUSTER SLOTS and is updated from
+    MOVED redirections; `redirects` counts how many were seen
+    """
+
+    def __init__(self, seeds, cluster=False, pool_size=4, timeout=10.0, max_redirects=5):
+        self.seeds = [parse_address(s) if isinstance(s, str) else s for s in seeds]
+        self.cluster = cluster
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.pools = {}
+        self.slots = [None] * CLUSTER_SLOTS
+        self.redirects = 0
+        if cluster:
+            self.refresh()
+        else:
+            self._pool(*self.seeds[0])
+
+    def _pool(self, host, port):
+        address = "%s:%d" % (host, port)
+        if address not in self.pools:
+            self.pools[address] = ConnectionPool(host, port, self.pool_size, self.timeout)
+        return address
+
+    def refresh(self):
+        """Reload the slot -> master map from the first reachable node"""
+        last_error = None
+        candidates = list(self.seeds) + [parse_address(a) for a in self.pools]
+        for host, port in candidates:
+            try:
+                conn = RespConnection(host, port, self.timeout)
+            except OSError as error:
+                last_error = error
+                continue
+            try:
+                ranges = conn.execute("CLUSTER", "SLOTS")
+            except (RespError, OSError) as error:
+                last_error = error
+                continue
+            finally:
+                conn.close()
+            for start, end, master, *_ in ranges:
+                node_host = master[0].decode() or host
+                address = self._pool(node_host, master[1])
+                for slot in range(start, end + 1):
+                    self.slots[slot] = address
+            return
+        raise ConnectionError("No cluster node reachable: %s" % last_error)
+
+    @property
+    def nodes(self):
+        return sorted(self.pools)
+
+    def node_for(self, key):
+        if not self.cluster:
+            return self.nodes[0]
+        address = self.slots[key_slot(key)]
+        if address is None:
+            self.refresh()
+            address = self.slots[key_slot(key)]
+        return address
+
+    def pipeline_by_node(self, commands, key_index=1):
+        """Split commands by owning node: {address: [(position, command), ...]}"""
+        groups = {}
+        for position, command in enumerate(commands):
+            address = self.node_for(command[key_index]) if len(command) > key_index else self.nodes[0]
+            groups.setdefault(address, []).append((position, command))
+        return groups
+
+    def _send_batches(self, batches):
+        """Pipeline each node's batch of (position, command, asking) and return
+        {address: replies}. Every batch is written before any reply is read, so
+        a call spanning several nodes costs one round trip, not one per node.
+        Pools are visited in address order, so threads sharing the router never
+        wait on each other's connections in a cycle
+        """
+        addresses = sorted(batches)
+        held = []
+        results = {}
+        try:
+            for address in addresses:
+                pool = self.pools[address]
+                conn = pool.acquire()
+                held.append((pool, conn))
+                wire = []
+                for _, command, asking in batches[address]:
+                    if asking:
+                        wire.append(("ASKING",))
+                    wire.append(command)
+                conn.send(wire)
+            for address, (_, conn) in zip(addresses, held):
+                replies = []
+                for _, _, asking in batches[address]:
+                    if asking:
+                        conn.read_reply()
+                    replies.append(conn.read_reply())
+                results[address] = replies
+        except (OSError, ConnectionError):
+            # Connections with unread replies cannot be reused
+            for pool, conn in held:
+                pool.release(conn, broken=True)
+            raise
+        for pool, conn in held:
+            pool.release(conn)
+        return results
+
+    def _redirect_target(self, reply, address):
+        """Node named by a '-MOVED <slot> <host>:<port>' or '-ASK ...' reply
+
+        MOVED means the slot has a new owner, so the slot map is updated. ASK
+        only covers one key of a slot being migrated and leaves the map alone
+        """
+        _, slot, target = str(reply).split()
+        host, _, port = target.rpartition(":")
+        # An empty host means "the address you reached me on"
+        target = self._pool(host or self.pools[address].host, int(port))
+        if reply.kind == "MOVED":
+            self.slots[int(slot)] = target
+        return target
+
+    def execute_many(self, commands, key_index=1):
+        """Pipeline commands to their nodes and return replies in order
+
+        MOVED/ASK replies are followed to the node they name (ASK with ASKING
+        first), at most `max_redirects` times; a command still redirected after
+        that raises RedirectError
+        """
+        replies = [None] * len(commands)
+        batches = {address: [(position, command, False) for position, command in batch]
+                   for address, batch in self.pipeline_by_node(commands, key_index).items()}
+        for _ in range(self.max_redirects + 1):
+            redirected = {}
+            for address, results in self._send_batches(batches).items():
+                for (position, command, _), reply in zip(batches[address], results):
+                    replies[position] = reply
+                    if self.cluster and isinstance(reply, RespError) and reply.kind in ("MOVED", "ASK"):
+                        target = self._redirect_target(reply, address)
+                        redirected.setdefault(target, []).append((position, command, reply.kind == "ASK"))
+            if not redirected:
+                return replies
+            self.redirects += sum(len(batch) for batch in redirected.values())
+            batches = redirected
+        position = next(iter(redirected.values()))[0][0]
+        raise RedirectError("%d command(s) still redirected after %d hops, last reply: %s"
+                            % (sum(len(batch) for batch in redirected.values()), self.max_redirects,
+                               replies[position]))
+
+    def execute(self, *args):
+        reply = self.execute_many([args])[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+
+def wait_for_ping(host, port, timeout=30.0):
+    """Block until the node answers PING"""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            conn = RespConnection(host, port, timeout=2.0)
+            try:
+                if conn.execute("PING") == "PONG":
+                    return
+            finally:
+                conn.close()
+        except (OSError, ConnectionError, RespError):
+            if time.time() > deadline:
+                raise TimeoutError("%s:%d did not answer PING within %.0fs" % (host, port, timeout))
+            time.sleep(0.1)
+
+
+class LocalDeployment:
+    """Throwaway redis-server processes on localhost
+
+    masters=1, replicas=0, cluster=False gives a plain single node; otherwise a
+    Redis Cluster with slots spread evenly over the masters and `replicas`
+    replicas attached to each master
+    """
+
+    def __init__(self, masters=1, replicas=0, cluster=False, base_port=7000,
+                 node_timeout=5000, redis_server="redis-server", extra_config=None):
+        self.masters = masters
+        self.replicas = replicas
+        self.cluster = cluster or masters > 1 or replicas > 0
+        self.base_port = base_port
+        self.node_timeout = node_timeout
+        self.redis_server = shutil.which(redis_server) or redis_server
+        self.extra_config = extra_config or {}
+        self.workdir = None
+        self.processes = {}
+        self.logs = {}
+
+    @property
+    def ports(self):
+        return [self.base_port + i for i in range(self.masters * (1 + self.replicas))]
+
+    @property
+    def master_ports(self):
+        return self.ports[:self.masters]
+
+    @property
+    def seeds(self):
+        return ["127.0.0.1:%d" % p for p in self.master_ports]
+
+    def start_node(self, port):
+        """(Re)start the redis-server process for one port"""
+        node_dir = os.path.join(self.workdir, str(port))
+        os.makedirs(node_dir, exist_ok=True)
+        args = [self.redis_server, "--port", str(port), "--bind", "127.0.0.1",
+                "--dir", node_dir, "--save", "", "--appendonly", "no",
+                "--protected-mode", "no", "--daemonize", "no"]
+        if self.cluster:
+            args += ["--cluster-enabled", "yes",
+                     "--cluster-config-file", "nodes-%d.conf" % port,
+                     "--cluster-node-timeout", str(self.node_timeout)]
+        for name, value in self.extra_config.items():
+            args += ["--" + name, str(value)]
+        self._close_log(port)
+        self.logs[port] = open(os.path.join(node_dir, "redis.log"), "ab")
+        process = subprocess.Popen(args, stdout=self.logs[port], stderr=subprocess.STDOUT)
+        self.processes[port] = process
+        wait_for_ping("127.0.0.1", port)
+        # A server already listening on the port answers too, while ours exits
+        conn = RespConnection("127.0.0.1", port)
+        try:
+            pid = parse_info(conn.execute("INFO", "server")).get("process_id")
+        finally:
+            conn.close()
+        if pid != str(process.pid):
+            raise OSError("Port %d is already in use by another redis-server (pid %s)" % (port, pid))
+
+    def start(self):
+        """Start every node (and form the cluster); on failure nothing is left running"""
+        if not shutil.which(self.redis_server):
+            raise FileNotFoundError("redis-server not found (use --redis-server PATH)")
+        self.workdir = tempfile.mkdtemp(prefix="redis-local-")
+        try:
+            for port in self.ports:
+                self.start_node(port)
+            if self.cluster:
+                self._form_cluster()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def _form_cluster(self):
+        conns = {}
+        try:
+            for port in self.ports:
+                conns[port] = RespConnection("127.0.0.1", port)
+            per_master = CLUSTER_SLOTS // self.masters
+            for i, port in enumerate(self.master_ports):
+                start = i * per_master
+                end = CLUSTER_SLOTS - 1 if i == self.masters - 1 else start + per_master - 1
+                conns[port].execute("CLUSTER", "ADDSLOTS", *range(start, end + 1))
+            for port in self.ports[1:]:
+                conns[port].execute("CLUSTER", "MEET", "127.0.0.1", self.ports[0])
+            self.wait_for_cluster_ok(conns)
+
+            node_ids = {port: conns[port].execute("CLUSTER", "MYID").decode()
+                        for port in self.master_ports}
+            for i, port in enumerate(self.ports[self.masters:]):
+                master = self.master_ports[i % self.masters]
+                self._replicate(conns[port], node_ids[master])
+        finally:
+            for conn in conns.values():
+                conn.close()
+
+    def _replicate(self, conn, master_id, timeout=30.0):
+        # The replica has to learn about the master through gossip first
+        deadline = time.time() + timeout
+        while True:
+            try:
+                conn.execute("CLUSTER", "REPLICATE", master_id)
+                return
+            except RespError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    def wait_for_cluster_ok(self, conns=None, timeout=60.0):
+        deadline = time.time() + timeout
+        own = conns is None
+        conns = conns or {p: RespConnection("127.0.0.1", p) for p in self.ports if self.alive(p)}
+        try:
+            while True:
+                states = [parse_info(c.execute("CLUSTER", "INFO")).get("cluster_state")
+                          for c in conns.values()]
+                if all(state == "ok" for state in states):
+                    return
+                if time.time() > deadline:
+                    raise TimeoutError("Cluster did not reach cluster_state:ok")
+                time.sleep(0.2)
+        finally:
+            if own:
+                for conn in conns.values():
+                    conn.close()
+
+    def alive(self, port):
+        process = self.processes.get(port)
+        return process is not None and process.poll() is None
+
+    def stop_node(self, port, kill=True):
+        process = self.processes.get(port)
+        if process and process.poll() is None:
+            if kill:
+                process.kill()
+            else:
+                process.terminate()
+            process.wait()
+        self._close_log(port)
+
+    def _close_log(self, port):
+        log = self.logs.pop(port, None)
+        if log is not None:
+            log.close()
+
+    def stop(self):
+        for port in list(self.processes):
+            self.stop_node(port)
+        self.processes = {}
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
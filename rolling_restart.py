@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Redis Rolling Restart
+Restarts the nodes from inventory.ini one at a time instead of all at once:
+replicas first, masters only after their slots were handed to a replica with
+CLUSTER FAILOVER. Each node is pre-warmed (AOF rewrite, persistence files read
+into the page cache), restarted, and must finish loading and catch up with its
+master before the next node is touched. Per-node downtime is reported
+
+Redis is reached at the inventory addresses (10.0.x.x, inside the VPC), so
+run it on the bastion or another host in the VPC, or pass --tunnel to forward
+each node's Redis port over its ssh connection (the inventory's ProxyCommand
+goes through the bastion)
+
+Examples:
+  # Plan only
+  python3 rolling_restart.py --inventory inventory.ini --dry-run
+
+  # Restart over ssh (through the bastion from the inventory), then restore
+  # the original masters
+  python3 rolling_restart.py --failback --json restart-report.json
+
+  # From outside the VPC (e.g. the Jenkins agent)
+  python3 rolling_restart.py --tunnel --failback
+
+  # Nodes reachable as local processes / containers
+  python3 rolling_restart.py --local --restart-command "docker restart redis-{name}"
+"""
+
+import argparse
+import json
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import time
+
+from redis_resp import RespConnection, RespError, parse_info
+
+DEFAULT_RESTART = "sudo systemctl restart redis-server"
+DEFAULT_PREWARM = ("sudo find {dir} -maxdepth 2 -type f \\( -name '*.rdb' -o -name '*.aof' \\) "
+                   "-exec cat {{}} + > /dev/null")
+TUNNEL_TIMEOUT = 30
+
+
+class RestartError(Exception):
+    pass
+
+
+def parse_inventory(path, group="redis_nodes"):
+    """Hosts of one group from an Ansible INI inventory, group/all vars merged in"""
+    sections = {}
+    section = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(("#", ";")):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                section = line[1:-1]
+                sections.setdefault(section, [])
+            elif section is not None:
+                sections[section].append(line)
+
+    def variables(name):
+        merged = {}
+        for line in sections.get(name, []):
+            key, _, value = line.partition("=")
+            value = value.strip()
+            # Only a quote pair around the whole value is syntax; quotes inside
+            # (ProxyCommand="ssh ...") belong to the value
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            merged[key.strip()] = value
+        return merged
+
+    common = variables("all:vars")
+    common.update(variables(group + ":vars"))
+    hosts = []
+    for line in sections.get(group, []):
+        fields = shlex.split(line)
+        host = dict(common)
+        host.update(field.split("=", 1) for field in fields[1:] if "=" in field)
+        host["name"] = fields[0]
+        host.setdefault("ansible_host", fields[0])
+        hosts.append(host)
+    if not hosts:
+        raise RestartError("No hosts in group [%s] of %s" % (group, path))
+    return hosts
+
+
+def parse_cluster_nodes(text):
+    """CLUSTER NODES reply -> list of node dicts"""
+    nodes = []
+    for line in text.decode().splitlines():
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        address = fields[1].split("@")[0]
+        host, _, port = address.rpartition(":")
+        flags = set(fields[2].split(","))
+        nodes.append({
+            "id": fields[0],
+            "address": "%s:%s" % (host, port),
+            "role": "master" if "master" in flags else "replica",
+            "master_id": None if fields[3] == "-" else fields[3],
+            "failed": bool(flags & {"fail", "fail?"}),
+            "connected": fields[7] == "connected",
+        })
+    return nodes
+
+
+class Node:
+    """One inventory host: Redis connection plus the commands run on it"""
+
+    def __init__(self, host, port, inventory_dir, local, timeout):
+        self.name = host["name"]
+        self.vars = host
+        self.host = host["ansible_host"]
+        self.port = int(host.get("redis_port", port))
+        self.address = "%s:%d" % (self.host, self.port)
+        self.inventory_dir = inventory_dir
+        self.local = local
+        self.timeout = timeout
+        # Where Redis is connected to: the node itself, or the local end of a tunnel
+        self.endpoint = (self.host, self.port)
+        self.tunnel = None
+
+    def connect(self):
+        return RespConnection(self.endpoint[0], self.endpoint[1], self.timeout)
+
+    def execute(self, *args):
+        conn = self.connect()
+        try:
+            return conn.execute(*args)
+        finally:
+            conn.close()
+
+    def info(self, section):
+        return parse_info(self.execute("INFO", section))
+
+    def shell(self, template, **fields):
+        command = template.format(name=self.name, host=self.host, port=self.port, **fields)
+        if self.local:
+            args = ["sh", "-c", command]
+        else:
+            args = self._ssh_args() + [command]
+        # Relative key paths in the inventory are relative to the inventory itself
+        result = subprocess.run(args, cwd=self.inventory_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RestartError("%s: '%s' failed (%d): %s" % (
+                self.name, command, result.returncode, result.stderr.strip()))
+        return result.stdout
+
+    def _ssh_args(self, *options):
+        args = ["ssh"]
+        key = self.vars.get("ansible_ssh_private_key_file")
+        if key:
+            args += ["-i", key]
+        try:
+            args += shlex.split(self.vars.get("ansible_ssh_common_args", ""))
+        except ValueError as error:
+            raise RestartError("%s: bad ansible_ssh_common_args (%s)" % (self.name, error))
+        args += list(options)
+        user = self.vars.get("ansible_user") or self.vars.get("ansible_ssh_user", "ubuntu")
+        return args + ["%s@%s" % (user, self.host)]
+
+    def open_tunnel(self, timeout):
+        """Forward a local port to this node's Redis port over ssh; the ssh
+        session outlives Redis restarts, only the forwarded connections drop"""
+        probe = socket.socket()
+        probe.bind(("127.0.0.1", 0))
+        local_port = probe.getsockname()[1]
+        probe.close()
+        args = self._ssh_args("-N", "-o", "ExitOnForwardFailure=yes",
+                              "-L", "127.0.0.1:%d:%s:%d" % (local_port, self.host, self.port))
+        self.tunnel = subprocess.Popen(args, cwd=self.inventory_dir, stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        deadline = time.time() + timeout
+        while True:
+            if self.tunnel.poll() is not None:
+                raise RestartError("%s: ssh tunnel failed (%d): %s" % (
+                    self.name, self.tunnel.returncode, self.tunnel.stderr.read().strip()))
+            try:
+                socket.create_connection(("127.0.0.1", local_port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline:
+                    self.close_tunnel()
+                    raise RestartError("%s: ssh tunnel not up within %ss" % (self.name, timeout))
+                time.sleep(0.2)
+        self.endpoint = ("127.0.0.1", local_port)
+
+    def close_tunnel(self):
+        if self.tunnel is not None:
+            self.tunnel.terminate()
+            self.tunnel.wait()
+            self.tunnel = None
+        self.endpoint = (self.host, self.port)
+
+
+def wait_until(check, timeout, interval=0.2, what="condition"):
+    """Poll check() until it returns a truthy value; connection errors count as not yet"""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            value = check()
+            if value:
+                return value
+        except (OSError, RespError):
+            pass
+        if time.time() > deadline:
+            raise RestartError("Timed out after %ss waiting for %s" % (timeout, what))
+        time.sleep(interval)
+
+
+class RollingRestart:
+    def __init__(self, nodes, args):
+        self.nodes = nodes
+        self.args = args
+        self.by_address = {node.address: node for node in nodes}
+        self.cluster = True
+
+    def topology(self):
+        """{address: cluster node dict} from the first reachable inventory node"""
+        for node in self.nodes:
+            try:
+                reply = node.execute("CLUSTER", "NODES")
+            except RespError:
+                # cluster-enabled no: roles come from INFO replication instead
+                self.cluster = False
+                return self._standalone_topology()
+            except OSError:
+                continue
+            return {entry["address"]: entry for entry in parse_cluster_nodes(reply)}
+        raise RestartError("No inventory node reachable")
+
+    def _standalone_topology(self):
+        topology = {}
+        for node in self.nodes:
+            info = node.info("replication")
+            role = "master" if info.get("role") == "master" else "replica"
+            topology[node.address] = {"id": node.address, "address": node.address, "role": role,
+                                      "master_id": None, "failed": False, "connected": True}
+        return topology
+
+    def plan(self):
+        """Inventory nodes in restart order: replicas, then masters"""
+        topology = self.topology()
+        for address in topology:
+            if address not in self.by_address:
+                print("⚠️  %s is in the cluster but not in the inventory; it will not be restarted" % address)
+        missing = [n.name for n in self.nodes if n.address not in topology]
+        if missing:
+            raise RestartError("Not cluster members (check redis_port / ansible_host): %s" % ", ".join(missing))
+        unhealthy = [a for a, entry in topology.items() if entry["failed"] or not entry["connected"]]
+        if unhealthy:
+            raise RestartError("Cluster is not healthy, refusing to start: %s" % ", ".join(unhealthy))
+        replicas = [n for n in self.nodes if topology[n.address]["role"] == "replica"]
+        masters = [n for n in self.nodes if topology[n.address]["role"] == "master"]
+        return topology, replicas + masters
+
+    def replicas_of(self, node, topology):
+        master_id = topology[node.address]["id"]
+        return [self.by_address[a] for a, entry in topology.items()
+                if entry["master_id"] == master_id and a in self.by_address]
+
+    def failover(self, node, topology):
+        """Promote a replica of `node`; returns the promoted Node or None"""
+        if not self.cluster:
+            return None
+        for replica in self.replicas_of(node, topology):
+            if replica.info("replication").get("master_link_status") != "up":
+                continue
+            started = time.time()
+            replica.execute("CLUSTER", "FAILOVER")
+            wait_until(lambda: replica.info("replication").get("role") == "master",
+                       self.args.failover_timeout, what="%s to take over from %s" % (replica.name, node.name))
+            wait_until(lambda: node.info("replication").get("role") == "slave",
+                       self.args.failover_timeout, what="%s to become a replica" % node.name)
+            print("   🔀 %s promoted in %.2fs" % (replica.name, time.time() - started))
+            return replica
+        return None
+
+    def prewarm(self, node):
+        persistence = node.info("persistence")
+        if self.args.rewrite_aof and persistence.get("aof_enabled") == "1":
+            # A freshly rewritten AOF is the smallest thing to replay on startup
+            node.execute("BGREWRITEAOF")
+            wait_until(lambda: node.info("persistence").get("aof_rewrite_in_progress") == "0"
+                       and node.info("persistence").get("aof_rewrite_scheduled") == "0",
+                       self.args.load_timeout, interval=0.5, what="AOF rewrite on %s" % node.name)
+        if self.args.prewarm_command:
+            directory = node.execute("CONFIG", "GET", "dir")[1].decode()
+            node.shell(self.args.prewarm_command, dir=shlex.quote(directory))
+
+    def wait_loaded(self, node):
+        """Wait until the node answers without LOADING; returns seconds spent loading"""
+        loading_since = None
+        last_report = 0
+        deadline = time.time() + self.args.load_timeout
+        while True:
+            try:
+                persistence = node.info("persistence")
+                if persistence.get("loading") == "0":
+                    node.execute("PING")
+                    return 0.0 if loading_since is None else time.time() - loading_since
+                loading_since = loading_since or time.time()
+                if time.time() - last_report >= 5:
+                    print("   ⏳ %s loading %s%%" % (node.name, persistence.get("loading_loaded_perc", "?")))
+                    last_report = time.time()
+            except RespError as error:
+                if error.kind != "LOADING":
+                    raise
+                loading_since = loading_since or time.time()
+            except OSError:
+                pass
+            if time.time() > deadline:
+                raise RestartError("%s did not finish loading within %ss" % (node.name, self.args.load_timeout))
+            time.sleep(0.2)
+
+    def caught_up(self, node):
+        info = node.info("replication")
+        if info.get("role") != "slave":
+            return True
+        if info.get("master_link_status") != "up" or info.get("master_sync_in_progress") != "0":
+            return False
+        address = "%s:%s" % (info["master_host"], info["master_port"])
+        if address in self.by_address:
+            master = self.by_address[address].connect()
+        else:
+            master = RespConnection(info["master_host"], int(info["master_port"]), node.timeout)
+        try:
+            master_offset = int(parse_info(master.execute("INFO", "replication"))["master_repl_offset"])
+        finally:
+            master.close()
+        return master_offset - int(info.get("slave_repl_offset", 0)) <= self.args.max_lag_bytes
+
+    def cluster_ok(self):
+        if not self.cluster:
+            return True
+        return all(parse_info(n.execute("CLUSTER", "INFO")).get("cluster_state") == "ok" for n in self.nodes)
+
+    def restart_node(self, node, topology):
+        role = topology[node.address]["role"]
+        print("🔄 %s (%s, %s)" % (node.name, node.address, role))
+        result = {"node": node.name, "address": node.address, "role": role, "promoted": None}
+
+        if role == "master":
+            promoted = self.failover(node, topology)
+            if promoted is not None:
+                result["promoted"] = promoted.name
+            elif not self.args.allow_master_downtime:
+                raise RestartError("%s is a master with no healthy replica; its slots would go offline "
+                                   "(--allow-master-downtime to accept that)" % node.name)
+            else:
+                print("   ⚠️  No replica to fail over to; %s's data is unavailable during the restart" % node.name)
+
+        started = time.time()
+        self.prewarm(node)
+        result["prewarm_s"] = round(time.time() - started, 3)
+
+        down_at = time.time()
+        node.shell(self.args.restart_command)
+        loading = self.wait_loaded(node)
+        up_at = time.time()
+        wait_until(lambda: self.caught_up(node), self.args.sync_timeout, interval=0.5,
+                   what="%s to catch up with its master" % node.name)
+        wait_until(self.cluster_ok, self.args.sync_timeout, interval=0.5, what="cluster_state:ok")
+        done_at = time.time()
+
+        result.update({
+            "restart_to_ready_s": round(up_at - down_at, 3),
+            "loading_s": round(loading, 3),
+            "catchup_s": round(done_at - up_at, 3),
+            # With a promoted replica clients keep being served; otherwise the restart window is the outage
+            "serving_downtime_s": 0.0 if role == "replica" or result["promoted"] else round(up_at - down_at, 3),
+        })
+        print("   ✅ ready in %.2fs (loading %.2fs), caught up in %.2fs" % (
+            result["restart_to_ready_s"], result["loading_s"], result["catchup_s"]))
+        return result
+
+    def failback(self, original):
+        """Hand slots back to the nodes that were masters before the restart"""
+        for node in original:
+            if node.info("replication").get("role") == "slave":
+                node.execute("CLUSTER", "FAILOVER")
+                wait_until(lambda: node.info("replication").get("role") == "master",
+                           self.args.failover_timeout, what="%s to become master again" % node.name)
+                print("↩️  %s is master again" % node.name)
+
+    def run(self):
+        topology, order = self.plan()
+        masters = [node for node in order if topology[node.address]["role"] == "master"]
+        results = []
+        for index, node in enumerate(order):
+            if index:
+                time.sleep(self.args.pause)
+                # Roles change as masters are failed over; always act on the current view
+                topology = self.topology()
+            results.append(self.restart_node(node, topology))
+        if self.args.failback and self.cluster:
+            self.failback(masters)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restart Redis nodes one at a time without a cluster outage")
+    parser.add_argument("--inventory", default="inventory.ini", help="Ansible INI inventory")
+    parser.add_argument("--group", default="redis_nodes", help="inventory group holding the Redis nodes")
+    parser.add_argument("--port", type=int, default=6379, help="Redis port unless the host sets redis_port")
+    parser.add_argument("--local", action="store_true", help="run commands locally instead of over ssh")
+    parser.add_argument("--tunnel", action="store_true",
+                        help="reach Redis through ssh port forwards (via the inventory's bastion) instead of "
+                             "connecting to the node addresses directly, which only works inside the VPC")
+    parser.add_argument("--restart-command", default=DEFAULT_RESTART,
+                        help="command restarting one node; {name}, {host} and {port} are filled in")
+    parser.add_argument("--prewarm-command", default=DEFAULT_PREWARM,
+                        help="command run before the restart; {dir} is the node's data directory "
+                             "('' to disable)")
+    parser.add_argument("--no-rewrite-aof", dest="rewrite_aof", action="store_false",
+                        help="skip BGREWRITEAOF before restarting")
+    parser.add_argument("--allow-master-downtime", action="store_true",
+                        help="restart masters that have no replica to fail over to")
+    parser.add_argument("--failback", action="store_true", help="restore the original masters at the end")
+    parser.add_argument("--max-lag-bytes", type=int, default=0, help="replication lag accepted as caught up")
+    parser.add_argument("--pause", type=float, default=5.0, help="seconds to wait between nodes")
+    parser.add_argument("--failover-timeout", type=float, default=60.0)
+    parser.add_argument("--load-timeout", type=float, default=600.0)
+    parser.add_argument("--sync-timeout", type=float, default=600.0)
+    parser.add_argument("--timeout", type=float, default=5.0, help="Redis socket timeout in seconds")
+    parser.add_argument("--dry-run", action="store_true", help="print the restart order and exit")
+    parser.add_argument("--json", metavar="PATH", help="write per-node timings as JSON")
+    args = parser.parse_args()
+
+    print("🔁 Redis Rolling Restart")
+    print("=" * 50)
+    inventory_dir = os.path.dirname(os.path.abspath(args.inventory))
+    nodes = [Node(host, args.port, inventory_dir, args.local, args.timeout)
+             for host in parse_inventory(args.inventory, args.group)]
+    orchestrator = RollingRestart(nodes, args)
+    try:
+        if args.tunnel:
+            for node in nodes:
+                node.open_tunnel(TUNNEL_TIMEOUT)
+                print("🔌 %s -> %s:%d" % (node.address, *node.endpoint))
+        topology, order = orchestrator.plan()
+        for index, node in enumerate(order, 1):
+            print("%d. %s (%s, %s)" % (index, node.name, node.address, topology[node.address]["role"]))
+        if args.dry_run:
+            return
+        results = orchestrator.run()
+    except RestartError as error:
+        print("❌ %s" % error)
+        sys.exit(1)
+    finally:
+        for node in nodes:
+            node.close_tunnel()
+
+    print("\n%-16s %-8s %-14s %10s %10s %10s %10s" % (
+        "node", "role", "promoted", "ready s", "loading s", "catchup s", "downtime s"))
+    for r in results:
+        print("%-16s %-8s %-14s %10.2f %10.2f %10.2f %10.2f" % (
+            r["node"], r["role"], r["promoted"] or "-", r["restart_to_ready_s"], r["loading_s"],
+            r["catchup_s"], r["serving_downtime_s"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print("💾 Report written to %s" % args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Stage timing analyzer against the recorded console logs in fixtures/jenkins"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import jenkins_stage_timing as timing  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "fixtures", "jenkins")
+
+
+def load(number):
+    return timing.parse_console(os.path.join(FIXTURES, "build-%d.log" % number))
+
+
+def durations(build):
+    return {name: round(end - start, 3) for name, start, end, _ in build.stages}
+
+
+def statuses(build):
+    return {name: status for name, _, _, status in build.stages}
+
+
+def test_successful_build_stages():
+    build = load(43)
+    assert build.number == 43
+    assert build.status == "SUCCESS"
+    assert build.duration == pytest.approx(272.261, abs=1e-3)
+    assert durations(build) == pytest.approx({
+        "Declarative: Checkout SCM": 2.4,
+        "SCM Checkout": 6.76,
+        "Environment Validation": 11.105,
+        "Key Pair Management": 3.348,
+        "Infrastructure": 133.189,
+        "Wait for Infrastructure": 96.975,
+        "Ansible Configuration": 0.0,
+        "Generate Connection Guide": 10.184,
+        "Declarative: Post Actions": 1.0,
+    }, abs=1e-3)
+    assert statuses(build)["Ansible Configuration"] == "SKIPPED"
+    assert list(statuses(build).values()).count("SKIPPED") == 1
+    assert "FAILED" not in statuses(build).values()
+
+
+def test_failed_build_skips_later_stages():
+    build = load(44)
+    assert build.status == "FAILURE"
+    assert build.duration == pytest.approx(118.912, abs=1e-3)
+    assert statuses(build)["Infrastructure"] == "FAILED"
+    assert durations(build)["Infrastructure"] == pytest.approx(89.716, abs=1e-3)
+    skipped = sorted(name for name, status in statuses(build).items() if status == "SKIPPED")
+    assert skipped == ["Ansible Configuration", "Generate Connection Guide", "Wait for Infrastructure"]
+    assert list(statuses(build).values()).count("FAILED") == 1
+
+
+def test_critical_path():
+    shares = timing.critical_path(load(43))
+    assert "Ansible Configuration" not in shares  # skipped stages are never on the path
+    assert max(shares, key=shares.get) == "Infrastructure"
+    assert shares["Infrastructure"] == pytest.approx(133.189, abs=1e-3)
+    assert shares["Wait for Infrastructure"] == pytest.approx(96.975, abs=1e-3)
+    assert shares["(overhead)"] == pytest.approx(7.3, abs=1e-3)
+    assert sum(shares.values()) == pytest.approx(272.261, abs=1e-3)
+
+    failed = timing.critical_path(load(44))
+    assert set(failed) == {"Declarative: Checkout SCM", "SCM Checkout", "Environment Validation",
+                           "Key Pair Management", "Infrastructure", "Declarative: Post Actions", "(overhead)"}
+    assert failed["Infrastructure"] == pytest.approx(89.716, abs=1e-3)
+
+
+def test_analyse_counts_statuses_across_builds():
+    report = timing.analyse([load(44), load(43)], recent=1)
+    assert report["builds"] == 2
+    assert report["build_numbers"] == [43, 44]
+    stages = {stage["stage"]: stage for stage in report["stages"]}
+    assert stages["Infrastructure"]["statuses"] == {"SUCCESS": 1, "FAILED": 1}
+    assert stages["Ansible Configuration"]["statuses"] == {"SKIPPED": 2}
+    assert stages["Ansible Configuration"]["runs"] == 0
+    assert stages["Wait for Infrastructure"]["statuses"] == {"SUCCESS": 1, "SKIPPED": 1}
+    assert stages["Wait for Infrastructure"]["runs"] == 1
+    assert stages["Infrastructure"]["critical_s"] == pytest.approx(222.9, abs=0.05)
@@ -0,0 +1,22 @@
+"""RDB analyzer against the snapshot fixtures in fixtures/rdb"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import rdb_analyzer  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "fixtures", "rdb")
+
+
+def test_module_aux_records_are_skipped():
+    # module-aux.rdb: a module aux record (moduleid, when opcode, when, values)
+    # before and after the keyspace, as RediSearch / RedisJSON write them
+    report = rdb_analyzer.analyze(os.path.join(FIXTURES, "module-aux.rdb"), now_ms=1760000000000)
+    assert report["keys"] == 2
+    assert report["aux"]["redis-ver"] == "7.2.4"
+    assert report["databases"] == {"0": 2}
+    assert [entry["key"] for entry in report["largest_keys"]] == ["user:1", "user:2"]
+    assert report["rdb_bytes"] == os.path.getsize(os.path.join(FIXTURES, "module-aux.rdb"))
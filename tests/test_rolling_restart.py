@@ -0,0 +1,41 @@
+"""Inventory parsing and ssh command lines of the rolling restart"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import rolling_restart  # noqa: E402
+
+INVENTORY = os.path.join(ROOT, "inventory.ini")
+
+
+def nodes():
+    return [rolling_restart.Node(host, 6379, ROOT, False, 5.0)
+            for host in rolling_restart.parse_inventory(INVENTORY)]
+
+
+def test_committed_inventory_hosts():
+    hosts = rolling_restart.parse_inventory(INVENTORY)
+    assert [host["name"] for host in hosts] == ["redis-node-1", "redis-node-2", "redis-node-3"]
+    assert all(host["ansible_host"].startswith("10.0.") for host in hosts)
+    assert hosts[0]["bastion_host"] == "3.110.104.52"
+
+
+def test_ssh_argv_keeps_proxy_command_whole():
+    node = nodes()[0]
+    args = node._ssh_args("-N")
+    assert args[:3] == ["ssh", "-i", "./redis-infra-key.pem"]
+    proxy = [arg for arg in args if arg.startswith("ProxyCommand=")]
+    assert proxy == ["ProxyCommand=ssh -W %h:%p -i ./redis-infra-key.pem -o StrictHostKeyChecking=no "
+                     "-o ConnectTimeout=30 ubuntu@3.110.104.52"]
+    assert args[-2:] == ["-N", "ubuntu@%s" % node.host]
+
+
+def test_wrapping_quotes_are_removed(tmp_path):
+    inventory = tmp_path / "inventory.ini"
+    inventory.write_text('[redis_nodes]\nn1 ansible_host=10.0.2.10\n\n'
+                         '[redis_nodes:vars]\nansible_ssh_common_args="-o ConnectTimeout=5"\n')
+    host = rolling_restart.parse_inventory(str(inventory))[0]
+    assert host["ansible_ssh_common_args"] == "-o ConnectTimeout=5"
@@ -0,0 +1,81 @@
+// Value codec benchmark: bytes per key and encode/decode throughput for every
+// codec in value-codec.js, over a few representative document shapes.
+//
+//   node value-codec-bench.js [--iterations 20000] [--threshold 1024] [--json]
+const { performance } = require('perf_hooks');
+const { CODECS, createCodec } = require('./value-codec');
+
+const args = process.argv.slice(2);
+const option = (name, fallback) => {
+  const index = args.indexOf(`--${name}`);
+  return index === -1 ? fallback : args[index + 1];
+};
+const ITERATIONS = parseInt(option('iterations', '20000'), 10);
+const THRESHOLD = parseInt(option('threshold', '1024'), 10);
+const AS_JSON = args.includes('--json');
+
+const makeUser = (i) => ({
+  id: i,
+  name: `user-${i}`,
+  email: `user-${i}@example.com`,
+  active: i % 2 === 0,
+  score: i * 1.5
+});
+
+const samples = {
+  small: makeUser(42),
+  medium: {
+    user: makeUser(7),
+    tags: Array.from({ length: 40 }, (_, i) => `tag-${i % 8}`),
+    history: Array.from({ length: 20 }, (_, i) => ({ ts: 1700000000000 + i * 1000, event: 'login', ok: true }))
+  },
+  large: {
+    items: Array.from({ length: 500 }, (_, i) => makeUser(i)),
+    description: 'Redis infrastructure benchmark document. '.repeat(50)
+  }
+};
+
+const time = (fn) => {
+  // Warm up before measuring
+  for (let i = 0; i < Math.min(1000, ITERATIONS); i++) {
+    fn();
+  }
+  const start = performance.now();
+  for (let i = 0; i < ITERATIONS; i++) {
+    fn();
+  }
+  return ITERATIONS / ((performance.now() - start) / 1000);
+};
+
+const results = [];
+for (const name of CODECS) {
+  let codec;
+  try {
+    codec = createCodec(name, { compressThreshold: THRESHOLD });
+  } catch (error) {
+    if (!AS_JSON) {
+      console.log(`⚠️  Skipping ${name}: ${error.message}`);
+    }
+    continue;
+  }
+
+  for (const [shape, value] of Object.entries(samples)) {
+    const encoded = codec.encode(value);
+    // Values are stored as Buffers/strings and read back as Buffers
+    const stored = Buffer.isBuffer(encoded) ? encoded : Buffer.from(encoded);
+    results.push({
+      codec: name,
+      shape,
+      bytesPerKey: stored.length,
+      encodeOpsPerSec: Math.round(time(() => codec.encode(value))),
+      decodeOpsPerSec: Math.round(time(() => codec.decode(stored)))
+    });
+  }
+}
+
+if (AS_JSON) {
+  console.log(JSON.stringify({ iterations: ITERATIONS, compressThreshold: THRESHOLD, results }, null, 2));
+} else {
+  console.log(`📊 Value codec benchmark (${ITERATIONS} iterations, compress >= ${THRESHOLD} bytes)`);
+  console.table(results);
+}
@@ -0,0 +1,104 @@
+const zlib = require('zlib');
+
+// Stored value formats
+//
+// Legacy values are plain JSON text and stay untagged. Every other format is
+// tagged with a 2-byte header: a marker byte that can never start a JSON
+// document (0xC1 is also invalid as UTF-8 and unused by MessagePack), then a
+// format byte. Old and new values can therefore live side by side and be
+// decoded whichever codec is currently configured for writes.
+const MARKER = 0xc1;
+const FORMAT_JSON = 0x01;
+const FORMAT_MSGPACK = 0x02;
+const FLAG_DEFLATE = 0x10;
+
+const CODECS = ['json', 'msgpack', 'json+deflate', 'msgpack+deflate'];
+
+// MessagePack is an optional dependency, only loaded when a codec needs it
+let msgpack = null;
+const loadMsgpack = () => {
+  if (!msgpack) {
+    try {
+      msgpack = require('@msgpack/msgpack');
+    } catch (error) {
+      throw new Error('MessagePack codec requires the @msgpack/msgpack package (npm install @msgpack/msgpack)');
+    }
+  }
+  return msgpack;
+};
+
+const tag = (format, payload) => {
+  const header = Buffer.from([MARKER, format]);
+  return Buffer.concat([header, payload], payload.length + 2);
+};
+
+// Compression favours speed: values are (de)compressed on the request path
+const deflate = (payload) => zlib.deflateRawSync(payload, { level: zlib.constants.Z_BEST_SPEED });
+const inflate = (payload) => zlib.inflateRawSync(payload);
+
+const isTagged = (raw) => Buffer.isBuffer(raw) && raw.length >= 2 && raw[0] === MARKER;
+
+// Decode any stored value (Buffer or string) regardless of its format
+const decodeValue = (raw) => {
+  if (raw === null || raw === undefined) {
+    return null;
+  }
+  if (!isTagged(raw)) {
+    return JSON.parse(Buffer.isBuffer(raw) ? raw.toString('utf8') : raw);
+  }
+
+  const format = raw[1];
+  let payload = raw.subarray(2);
+  if (format & FLAG_DEFLATE) {
+    payload = inflate(payload);
+  }
+  switch (format & ~FLAG_DEFLATE) {
+    case FORMAT_JSON:
+      return JSON.parse(payload.toString('utf8'));
+    case FORMAT_MSGPACK:
+      return loadMsgpack().decode(payload);
+    default:
+      throw new Error(`Unknown stored value format 0x${format.toString(16)}`);
+  }
+};
+
+// Build an encoder for one of CODECS; values at or above compressThreshold
+// bytes are deflated when the codec name ends in "+deflate"
+const createCodec = (name = 'json', { compressThreshold = 1024 } = {}) => {
+  if (!CODECS.includes(name)) {
+    throw new Error(`Unknown value codec "${name}" (expected one of: ${CODECS.join(', ')})`);
+  }
+  const [base, compression] = name.split('+');
+  if (base === 'msgpack') {
+    loadMsgpack();
+  }
+
+  const encode = (value) => {
+    let format;
+    let payload;
+    if (base === 'msgpack') {
+      format = FORMAT_MSGPACK;
+      const packed = msgpack.encode(value);
+      payload = Buffer.from(packed.buffer, packed.byteOffset, packed.byteLength);
+    } else {
+      const text = JSON.stringify(value);
+      if (!compression || Buffer.byteLength(text) < compressThreshold) {
+        return text;
+      }
+      format = FORMAT_JSON;
+      payload = Buffer.from(text);
+    }
+
+    if (compression && payload.length >= compressThreshold) {
+      const compressed = deflate(payload);
+      if (compressed.length < payload.length) {
+        return tag(format | FLAG_DEFLATE, compressed);
+      }
+    }
+    return tag(format, payload);
+  };
+
+  return { name, encode, decode: decodeValue };
+};
+
+module.exports = { CODECS, createCodec, decodeValue };